@@ -0,0 +1,146 @@
+"""
+Deterministic fixtures shared by the benchmarks
+"""
+import random
+
+from icgphutils.aws.dynamodb.types import DBTypes
+
+
+def make_large_item(target_bytes: int = 400 * 1024, seed: int = 0) -> dict:
+    """
+    Returns a nested item close to the DynamoDB item size limit
+
+    :param target_bytes: approximate wire size of the item
+    :param seed: random seed
+    :return: item with float values, as passed to add_item
+    """
+    rng = random.Random(seed)
+    item = {
+        'pk': 'ACCOUNT#0001',
+        'sk': 'LEDGER#2022-10-01',
+        'balance': 10512.25,
+        'currency': 'PHP',
+        'limits': {'daily': 50000.0, 'monthly': 1000000.0, 'tiers': [1000.0, 5000.0, 20000.0]},
+        'entries': []
+    }
+    size = 0
+    i = 0
+    while size < target_bytes:
+        entry = {
+            'id': f'TX#{i:06d}',
+            'amount': round(rng.uniform(1, 100000), 2),
+            'fee': round(rng.uniform(0, 50), 4),
+            'quantity': rng.randint(1, 1000),
+            'tags': ['deposit', 'bank'] if i % 2 else ['withdrawal'],
+            'settled': i % 3 == 0,
+            'meta': {'channel': 'mobile', 'device': f'D{i % 97:03d}', 'rate': rng.random()}
+        }
+        item['entries'].append(entry)
+        if i % 256 == 0:
+            size = DBTypes.estimate_size(DBTypes.convert_dict_to_db_item(DBTypes.replace_float(item)))
+        i += 1
+    return item
+
+
+def make_ledger_item(rows: int = 1000, seed: int = 0) -> dict:
+    """
+    Returns a ledger item with a given number of entries
+
+    :param rows: number of entries
+    :param seed: random seed
+    :return: item with float values, as passed to add_item
+    """
+    rng = random.Random(seed)
+    return {
+        'pk': 'ACCOUNT#0001',
+        'sk': 'LEDGER#2022-10-01',
+        'balance': 10512.25,
+        'currency': 'PHP',
+        'entries': [
+            {
+                'id': f'TX#{i:06d}',
+                'amount': round(rng.uniform(1, 100000), 2),
+                'fee': 0.015,
+                'quantity': i,
+                'tags': ['deposit', 'bank'],
+                'settled': i % 2 == 0
+            }
+            for i in range(rows)
+        ]
+    }
+
+
+def make_query_page(rows: int = 10000, seed: int = 0) -> list:
+    """
+    Returns a page of ddb-formatted items as returned by the low-level Query API
+
+    :param rows: number of items
+    :param seed: random seed
+    :return: list of ddb-formatted items
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            'pk': {'S': f'SYMBOL#{i % 50:03d}'},
+            'sk': {'S': f'TRADE#{i:08d}'},
+            'price': {'N': str(round(rng.uniform(0.0001, 70000), 8))},
+            'quantity': {'N': str(rng.randint(1, 10 ** 6))},
+            'side': {'S': 'BUY' if i % 2 else 'SELL'},
+            'filled': {'BOOL': i % 5 != 0},
+            'fees': {'M': {'maker': {'N': '0.001'}, 'taker': {'N': '0.0015'}}}
+        }
+        for i in range(rows)
+    ]
+
+
+def make_decimal_page(rows: int = 10000, seed: int = 0) -> list:
+    """
+    Returns a page of items with Decimal values, as returned by table-based queries
+
+    :param rows: number of items
+    :param seed: random seed
+    :return: list of items
+    """
+    return DBTypes.convert_db_list_to_generic_item(make_query_page(rows, seed))
+
+
+def make_price_stream(length: int = 10000, seed: int = 0) -> list:
+    """
+    Returns price, quantity and step triples resembling exchange order flow
+
+    :param length: number of triples
+    :param seed: random seed
+    :return: list of (price, quantity, step) tuples of floats
+    """
+    rng = random.Random(seed)
+    steps = (0.00000001, 0.000001, 0.0001, 0.01, 0.5, 1.0, 5.0)
+    stream = []
+    for _ in range(length):
+        price = rng.choice((rng.uniform(0.00001, 1), rng.uniform(1, 100), rng.uniform(100, 70000)))
+        quantity = rng.uniform(0.0001, 10000)
+        stream.append((price, quantity, rng.choice(steps)))
+    return stream
+
+
+def make_response_payload(rows: int = 100, seed: int = 0) -> dict:
+    """
+    Returns an API response payload with a list of orders
+
+    :param rows: number of orders
+    :param seed: random seed
+    :return: json-serializable dictionary
+    """
+    rng = random.Random(seed)
+    return {
+        'orders': [
+            {
+                'id': f'ORD#{i:08d}',
+                'symbol': 'BTCPHP',
+                'price': round(rng.uniform(1, 70000), 2),
+                'quantity': round(rng.uniform(0.0001, 10), 8),
+                'status': 'FILLED'
+            }
+            for i in range(rows)
+        ],
+        'next': None
+    }
@@ -0,0 +1,220 @@
+"""
+Timing, allocation and baseline comparison helpers for the benchmarks
+"""
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'icgphutils')
+
+
+class BenchmarkResult:
+
+    # Metric name and whether higher values are better
+    METRICS = (
+        ('ops_per_sec', True),
+        ('alloc_blocks', False),
+        ('alloc_kib', False),
+        ('peak_kib', False)
+    )
+    # Absolute changes below these are noise, whatever the relative change
+    MIN_DELTAS = {
+        'ops_per_sec': 0,
+        'alloc_blocks': 16,
+        'alloc_kib': 4,
+        'peak_kib': 4
+    }
+
+    def __init__(self, name: str, ops_per_sec: float, alloc_blocks: int, alloc_kib: float, peak_kib: float):
+        self.name = name
+        self.ops_per_sec = ops_per_sec
+        self.alloc_blocks = alloc_blocks
+        self.alloc_kib = alloc_kib
+        self.peak_kib = peak_kib
+
+    def to_dict(self) -> Dict:
+        return {metric: getattr(self, metric) for metric, _ in BenchmarkResult.METRICS}
+
+    def __str__(self):
+        return (
+            f'{self.name:<44} {self.ops_per_sec:>14,.1f} ops/s {self.alloc_blocks:>9,d} blocks '
+            f'{self.alloc_kib:>11,.1f} KiB alloc {self.peak_kib:>11,.1f} KiB peak'
+        )
+
+
+class Benchmark:
+    """
+    Runs functions repeatedly and measures throughput, allocations and peak memory
+    """
+
+    def __init__(self, repeat: int = 5, min_time: float = 0.2):
+        """
+        :param repeat: number of timing rounds; the fastest round is reported
+        :param min_time: minimum duration of a timing round in seconds
+        """
+        self.__repeat = repeat
+        self.__min_time = min_time
+
+    def measure(self, name: str, func: Callable[[], object], ops: int = 1) -> BenchmarkResult:
+        """
+        :param name: benchmark name
+        :param func: function without arguments to benchmark
+        :param ops: number of operations performed by one call, e.g. rows of a page
+        :return: BenchmarkResult
+        """
+        func()
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        number = max(1, int(number * self.__min_time / 0.2))
+        seconds = min(timer.repeat(repeat=self.__repeat, number=number)) / number
+
+        # Peak is measured on its own, as snapshots allocate memory themselves
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        result = func()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        del result
+
+        # Memory still held after the call, i.e. the result and anything it leaks
+        ignored = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        stats = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), 'lineno')
+        alloc_blocks = sum(max(0, stat.count_diff) for stat in stats)
+        alloc_bytes = sum(max(0, stat.size_diff) for stat in stats)
+        return BenchmarkResult(name, ops / seconds, alloc_blocks, alloc_bytes / 1024, peak / 1024)
+
+
+def measure_import_time(module: str, runs: int = 7) -> BenchmarkResult:
+    """
+    Measures a cold import of a module in fresh interpreters
+
+    ops_per_sec is the number of cold imports per second; alloc_blocks, alloc_kib and peak_kib report
+    the memory allocated by the import. The cumulative time reported by -X importtime is used so that
+    interpreter start-up is excluded.
+
+    :param module: dotted module name
+    :param runs: number of interpreters started; the median is reported
+    :return: BenchmarkResult
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_PATH, os.environ.get('PYTHONPATH')])))
+    pattern = re.compile(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+' + re.escape(module) + r'\s*$', re.MULTILINE)
+    times = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=True
+        )
+        times.append(int(pattern.search(completed.stderr).group(1)) / 1e6)
+
+    # Tracing slows imports down considerably, so memory is measured in a separate interpreter
+    script = (
+        'import json, tracemalloc\n'
+        'tracemalloc.start()\n'
+        f'import {module}\n'
+        'current, peak = tracemalloc.get_traced_memory()\n'
+        'blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics(\'filename\'))\n'
+        'print(json.dumps([blocks, current, peak]))\n'
+    )
+    completed = subprocess.run(
+        [sys.executable, '-c', script],
+        env=env,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True
+    )
+    blocks, current, peak = json.loads(completed.stdout)
+    return BenchmarkResult(f'import {module}', 1 / statistics.median(times), blocks, current / 1024, peak / 1024)
+
+
+def find_imported_modules(module: str, candidates: List[str]) -> List[str]:
+    """
+    Imports a module in a fresh interpreter and tells which of the candidate modules it loaded
+
+    :param module: dotted module name
+    :param candidates: dotted names of modules that should not be loaded
+    :return: candidates found in sys.modules after the import
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_PATH, os.environ.get('PYTHONPATH')])))
+    script = (
+        'import json, sys\n'
+        f'import {module}\n'
+        f'print(json.dumps([name for name in {list(candidates)!r} if name in sys.modules]))\n'
+    )
+    completed = subprocess.run(
+        [sys.executable, '-c', script],
+        env=env,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True
+    )
+    return json.loads(completed.stdout)
+
+
+def save_baseline(path: str, results: List[BenchmarkResult]):
+    baseline = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {result.name: result.to_dict() for result in results}
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(
+    path: str,
+    results: List[BenchmarkResult],
+    threshold: float,
+    metrics: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Compares results to a saved baseline
+
+    :param path: baseline file
+    :param results: current results
+    :param threshold: allowed relative regression, e.g. 0.1 for 10%
+    :param metrics: metrics to compare; defaults to all
+    :return: list of regressions; empty if none
+    """
+    with open(path) as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.name)
+        if expected is None:
+            continue
+        for metric, higher_is_better in BenchmarkResult.METRICS:
+            if metrics is not None and metric not in metrics:
+                continue
+            old = expected.get(metric)
+            new = getattr(result, metric)
+            if not old or abs(new - old) < BenchmarkResult.MIN_DELTAS[metric]:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -threshold) or (not higher_is_better and change > threshold):
+                regressions.append(f'{result.name}: {metric} {old:,.1f} -> {new:,.1f} ({change:+.1%})')
+    return regressions
@@ -0,0 +1,194 @@
+"""
+Benchmark suite for the hot paths of icgphutils
+
+Reports ops/sec, allocated blocks and KiB (tracemalloc) and peak memory per function, and the
+cold import time (-X importtime) of the package entry points. Results can be saved as a JSON baseline;
+when compared to a baseline, the run fails if any metric regresses by more than the threshold. The
+import suite also fails if an entry point eagerly loads a heavy dependency such as boto3.
+
+Usage:
+    python benchmarks/run.py [--filter dbtypes] [--quick]
+    python benchmarks/run.py --save-baseline benchmarks/baselines/local.json
+    python benchmarks/run.py --baseline benchmarks/baselines/local.json --threshold 0.15 [--metric ops_per_sec]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'icgphutils'))
+
+import fixtures  # noqa: E402
+import harness  # noqa: E402
+
+from icgphutils.aws.dynamodb.types import DBTypes  # noqa: E402
+from icgphutils.helpers import func_apply_value_step  # noqa: E402
+from icgphutils.helpers import func_floor_to_precision  # noqa: E402
+from icgphutils.http import HttpUtils  # noqa: E402
+from icgphutils.log import Logger  # noqa: E402
+
+
+def bench_dbtypes(benchmark: harness.Benchmark, quick: bool):
+    rows = 1000 if quick else 10000
+    size = 40 if quick else 400
+    float_item = fixtures.make_large_item(size * 1024)
+    item = DBTypes.replace_float(float_item)
+    db_item = DBTypes.convert_dict_to_db_item(item)
+    page = fixtures.make_query_page(rows)
+    decimal_page = fixtures.make_decimal_page(rows)
+
+    yield benchmark.measure(
+        f'dbtypes.convert_dict_to_db_item[{size}KB]', lambda: DBTypes.convert_dict_to_db_item(item)
+    )
+    yield benchmark.measure(
+        f'dbtypes.convert_db_dict_to_generic_item[{size}KB]', lambda: DBTypes.convert_db_dict_to_generic_item(db_item)
+    )
+    yield benchmark.measure(
+        f'dbtypes.convert_db_dict_to_decimal_item[{size}KB]', lambda: DBTypes.convert_db_dict_to_decimal_item(db_item)
+    )
+    yield benchmark.measure(
+        f'dbtypes.convert_db_list_to_generic_item[{rows}]',
+        lambda: DBTypes.convert_db_list_to_generic_item(page),
+        ops=rows
+    )
+    yield benchmark.measure(
+        f'dbtypes.convert_list_to_db_item[{rows}]', lambda: DBTypes.convert_list_to_db_item(decimal_page), ops=rows
+    )
+    yield benchmark.measure(f'dbtypes.replace_float[{size}KB]', lambda: DBTypes.replace_float(float_item))
+    yield benchmark.measure(
+        f'dbtypes.replace_decimal[{rows}]', lambda: DBTypes.replace_decimal({'Items': decimal_page}), ops=rows
+    )
+
+
+def bench_numeric(benchmark: harness.Benchmark, quick: bool):
+    stream = fixtures.make_price_stream(1000 if quick else 10000)
+
+    def floor_prices():
+        for price, quantity, _ in stream:
+            func_floor_to_precision(price)
+            func_floor_to_precision(quantity, 4)
+
+    def apply_steps():
+        for price, _, step in stream:
+            func_apply_value_step(price, step)
+
+    yield benchmark.measure(f'numeric.func_floor_to_precision[{len(stream)}]', floor_prices, ops=2 * len(stream))
+    yield benchmark.measure(f'numeric.func_apply_value_step[{len(stream)}]', apply_steps, ops=len(stream))
+
+    # replace_float against the json round-trip add_item used before it
+    for rows in (10, 100 if quick else 1000):
+        item = fixtures.make_ledger_item(rows)
+        assert json_round_trip(item) == DBTypes.replace_float(item)
+        yield benchmark.measure(f'numeric.replace_float[{rows} rows]', lambda: DBTypes.replace_float(item))
+        yield benchmark.measure(f'numeric.json_round_trip[{rows} rows]', lambda: json_round_trip(item))
+
+
+def json_round_trip(item: dict) -> dict:
+    return json.loads(json.dumps(item), parse_float=Decimal)
+
+
+def bench_http(benchmark: harness.Benchmark, quick: bool):
+    rows = 100 if quick else 1000
+    small = {'code': 'OK', 'message': 'Order accepted'}
+    page = fixtures.make_response_payload(rows)
+    decimal_page = {'items': fixtures.make_decimal_page(rows)}
+
+    yield benchmark.measure('http.generate_http_response[small]', lambda: HttpUtils.generate_http_response(small))
+    yield benchmark.measure(f'http.generate_http_response[{rows}]', lambda: HttpUtils.generate_http_response(page))
+    yield benchmark.measure(
+        f'http.generate_http_response[decimal {rows}]', lambda: HttpUtils.generate_http_response(decimal_page)
+    )
+
+
+def bench_logger(benchmark: harness.Benchmark, quick: bool):
+    logger = Logger.get_logger()
+    level = logger.level
+    devnull = open(os.devnull, 'w')
+    stream = Logger.handler.setStream(devnull)
+    try:
+        logger.setLevel(logging.INFO)
+        yield benchmark.measure('logger.get_logger', Logger.get_logger)
+        yield benchmark.measure('logger.info[enabled]', lambda: logger.info('Order %s filled at %s', 'ORD#1', 1.5))
+        yield benchmark.measure('logger.debug[disabled]', lambda: logger.debug('Order %s filled at %s', 'ORD#1', 1.5))
+    finally:
+        logger.setLevel(level)
+        Logger.handler.setStream(stream)
+        devnull.close()
+
+
+# Entry points and the modules they must not load at import time
+LAZY_IMPORTS = {
+    'icgphutils': ('decimal', 'random', 'botocore'),
+    'icgphutils.log': ('decimal', 'random', 'botocore'),
+    'icgphutils.aws': ('boto3', 'botocore'),
+    'icgphutils.aws.awslambda': ('boto3', 'botocore', 'asyncio'),
+    'icgphutils.aws.ssm': ('boto3', 'botocore'),
+    'icgphutils.http.authorizer': ('boto3', 'botocore', 'asyncio'),
+    'icgphutils.aws.dynamodb': ('boto3', 'numpy', 'asyncio')
+}
+
+
+def bench_import(benchmark: harness.Benchmark, quick: bool):
+    for module in LAZY_IMPORTS:
+        yield harness.measure_import_time(module, runs=3 if quick else 7)
+
+
+def check_lazy_imports() -> List[str]:
+    violations = []
+    for module, heavy_modules in LAZY_IMPORTS.items():
+        for name in harness.find_imported_modules(module, heavy_modules):
+            violations.append(f'import {module} loads {name}')
+    return violations
+
+
+SUITES = {
+    'dbtypes': bench_dbtypes,
+    'numeric': bench_numeric,
+    'http': bench_http,
+    'logger': bench_logger,
+    'import': bench_import
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filter', action='append', choices=sorted(SUITES), help='suites to run; defaults to all')
+    parser.add_argument('--quick', action='store_true', help='smaller fixtures and fewer rounds')
+    parser.add_argument('--save-baseline', metavar='PATH', help='save results as a JSON baseline')
+    parser.add_argument('--baseline', metavar='PATH', help='compare results to a JSON baseline')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed relative regression (default 0.1)')
+    parser.add_argument('--metric', action='append', choices=[m for m, _ in harness.BenchmarkResult.METRICS],
+                        help='metrics compared to the baseline; defaults to all')
+    args = parser.parse_args()
+
+    benchmark = harness.Benchmark(repeat=3 if args.quick else 5, min_time=0.05 if args.quick else 0.2)
+    results = []
+    for name in args.filter or SUITES:
+        for result in SUITES[name](benchmark, args.quick):
+            print(result)
+            results.append(result)
+
+    failures = check_lazy_imports() if 'import' in (args.filter or SUITES) else []
+    for failure in failures:
+        print(f'EAGER IMPORT {failure}')
+
+    if args.save_baseline:
+        harness.save_baseline(args.save_baseline, results)
+        print(f'Baseline saved to {args.save_baseline}')
+
+    if args.baseline:
+        regressions = harness.compare_to_baseline(args.baseline, results, args.threshold, args.metric)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            return 1
+        print(f'No regressions above {args.threshold:.0%}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
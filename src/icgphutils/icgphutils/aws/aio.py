@@ -0,0 +1,56 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from icgphutils.aws.awslambda import Lambda
+from icgphutils.constants import Constants
+
+
+class AsyncLambda:
+    """
+    asyncio counterpart of Lambda; blocking invocations run on a bounded thread pool
+    """
+
+    def __init__(self, max_concurrency: int = Constants.LAMBDA_MAX_WORKERS):
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.__executor.shutdown(wait=False)
+
+    async def invoke(
+        self,
+        function_name: str,
+        payload: Optional[Dict] = None,
+        invocation_type: str = Lambda.REQUEST_RESPONSE
+    ) -> Optional[Dict]:
+        return await self.__run(Lambda.invoke, function_name, payload, invocation_type)
+
+    async def invoke_many(
+        self,
+        requests: List[Tuple[str, Optional[Dict]]],
+        invocation_type: str = Lambda.REQUEST_RESPONSE
+    ) -> List[Dict]:
+        """
+        :param requests: list of tuples of function name and payload
+        :param invocation_type: 'RequestResponse' to wait for the results, or 'Event' to queue the invocations
+        :return: same as Lambda.invoke_many
+        """
+        return list(await asyncio.gather(*(
+            self.__run(Lambda.try_invoke, function_name, payload, invocation_type)
+            for function_name, payload in requests
+        )))
+
+    async def __run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, partial(func, *args))
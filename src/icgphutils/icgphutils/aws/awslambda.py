@@ -1,25 +1,123 @@
-import boto3
-import os
-import json
-from typing import Optional
 from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from icgphutils.aws.client import LazyClient
 from icgphutils.constants import Constants
+from icgphutils.jsoncodec import JsonCodec
+from icgphutils.log import Logger
 
 
 class Lambda:
-    gl_client = boto3.client('lambda', region_name=os.getenv('REGION', Constants.DEFAULT_REGION))
+    gl_client = LazyClient('lambda')
+
+    REQUEST_RESPONSE = 'RequestResponse'
+    EVENT = 'Event'
+
+    @classmethod
+    def invoke(
+        cls,
+        function_name: str,
+        payload: Optional[Dict] = None,
+        invocation_type: str = REQUEST_RESPONSE
+    ) -> Optional[Dict]:
+        """
+        Invokes a function
+
+        :param function_name: name or ARN of the function
+        :param payload: JSON-serializable event; Decimal, datetime and set values are supported
+        :param invocation_type: 'RequestResponse' to wait for the result, or 'Event' to queue the invocation
+        :return: decoded response payload; None for 'Event' invocations
+        """
+        resp = cls.__invoke(function_name, payload, invocation_type)
+        return cls.__read_payload(resp)
+
+    @classmethod
+    def invoke_many(
+        cls,
+        requests: List[Tuple[str, Optional[Dict]]],
+        max_workers: int = Constants.LAMBDA_MAX_WORKERS,
+        invocation_type: str = REQUEST_RESPONSE
+    ) -> List[Dict]:
+        """
+        Invokes functions concurrently on the shared client
+
+        :param requests: list of tuples of function name and payload
+        :param max_workers: maximum number of concurrent invocations
+        :param invocation_type: 'RequestResponse' to wait for the results, or 'Event' to queue the invocations
+        :return: list of dictionaries with 'Payload' (decoded response payload, or None) and 'Error' (dictionary
+            with 'Code' and 'Message', or None) in the same order as requests
+        """
+        if not requests:
+            return []
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(requests))) as executor:
+            return list(executor.map(
+                lambda request: cls.try_invoke(request[0], request[1], invocation_type),
+                requests
+            ))
 
     @classmethod
-    def invoke(cls, function_name: str, payload: Optional[Dict] =None) -> Dict:
+    def try_invoke(
+        cls,
+        function_name: str,
+        payload: Optional[Dict] = None,
+        invocation_type: str = REQUEST_RESPONSE
+    ) -> Dict:
+        """
+        Invokes a function, returning errors instead of raising them
+
+        :param function_name: name or ARN of the function
+        :param payload: JSON-serializable event; Decimal, datetime and set values are supported
+        :param invocation_type: 'RequestResponse' to wait for the result, or 'Event' to queue the invocation
+        :return: dictionary with 'Payload' (decoded response payload, or None) and 'Error' (dictionary with
+            'Code' and 'Message' of a client, connection, payload or function error, or None)
+        """
+        # Imported here so that Lambda.invoke, used by authorizers on every cold start, does not load botocore
+        from botocore.exceptions import BotoCoreError
+        from botocore.exceptions import ClientError
+
+        try:
+            resp = cls.__invoke(function_name, payload, invocation_type)
+            response_payload = cls.__read_payload(resp)
+        except ClientError as e:
+            Logger.get_logger().error(e.response.get('Error').get('Message'))
+            error = {'Code': e.response.get('Error').get('Code'), 'Message': e.response.get('Error').get('Message')}
+            return {'Payload': None, 'Error': error}
+        except (BotoCoreError, ValueError) as e:
+            # Timeouts, connection errors and response payloads that are not JSON
+            Logger.get_logger().error(f'Invoking {function_name} failed: {e}')
+            return {'Payload': None, 'Error': {'Code': type(e).__name__, 'Message': str(e)}}
+
+        if resp.get('FunctionError'):
+            message = response_payload.get('errorMessage') if isinstance(response_payload, dict) else None
+            return {'Payload': response_payload, 'Error': {'Code': resp['FunctionError'], 'Message': message}}
+        return {'Payload': response_payload, 'Error': None}
 
+    @classmethod
+    def __invoke(cls, function_name: str, payload: Optional[Dict], invocation_type: str) -> Dict:
+        params = {'FunctionName': function_name, 'InvocationType': invocation_type}
         if payload is not None:
-            resp = cls.gl_client.invoke(
-                FunctionName=function_name,
-                Payload=bytes(json.dumps(payload).encode('utf-8'))
-            )
-        else:
-            resp = cls.gl_client.invoke(
-                FunctionName=function_name
-            )
-        response_payload = json.loads(resp['Payload'].read().decode())
-        return response_payload
+            params['Payload'] = JsonCodec.dumps_bytes(payload)
+        return cls.gl_client.invoke(**params)
+
+    @staticmethod
+    def __read_payload(resp: Dict) -> Optional[Dict]:
+        body = resp.get('Payload')
+        if body is None:
+            return None
+        # Bytes are parsed directly, avoiding a decoded copy of the body
+        content = body.read()
+        if not content:
+            return None
+        return JsonCodec.loads(content)
+
+
+def __getattr__(name):
+    # AsyncLambda lives in icgphutils.aws.aio so that asyncio is only imported by its users
+    if name == 'AsyncLambda':
+        from icgphutils.aws.aio import AsyncLambda
+        return AsyncLambda
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
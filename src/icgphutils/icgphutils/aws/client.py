@@ -0,0 +1,115 @@
+import os
+import threading
+
+from typing import TYPE_CHECKING
+
+from icgphutils.constants import Constants
+
+if TYPE_CHECKING:
+    from botocore.config import Config
+
+
+class ClientFactory:
+    """
+    Creates boto3 clients and resources on first use and caches them per (service, region, config)
+
+    boto3 itself is only imported when the first client or resource is created, keeping it out of cold starts
+    that never call AWS.
+    """
+
+    __lock = threading.RLock()
+    __clients = {}
+    __local = threading.local()
+
+    @staticmethod
+    def build_config(**options) -> 'Config':
+        """
+        Returns the botocore Config shared by all clients
+
+        :param options: botocore Config options overriding the defaults
+        :return: botocore Config
+        """
+        from botocore.config import Config
+
+        settings = {
+            'max_pool_connections': Constants.AWS_MAX_POOL_CONNECTIONS,
+            'connect_timeout': Constants.AWS_CONNECT_TIMEOUT,
+            'read_timeout': Constants.AWS_READ_TIMEOUT
+        }
+        if 'tcp_keepalive' in Config.OPTION_DEFAULTS:
+            # Not available on older botocore versions
+            settings['tcp_keepalive'] = Constants.AWS_TCP_KEEPALIVE
+        settings.update(options)
+        return Config(**settings)
+
+    @classmethod
+    def get_client(cls, service_name: str, region_name: str = None, **config_options):
+        """
+        Returns the shared client of a service; clients are thread-safe and shared by all threads
+
+        :param service_name: AWS service name
+        :param region_name: AWS region; defaults to the REGION environment variable
+        :param config_options: botocore Config options overriding the defaults
+        :return: boto3 client
+        """
+        key = cls.__get_key(service_name, region_name, config_options)
+        client = cls.__clients.get(key)
+        if client is None:
+            with cls.__lock:
+                client = cls.__clients.get(key)
+                if client is None:
+                    import boto3
+                    client = boto3.client(service_name, region_name=key[1], config=cls.build_config(**config_options))
+                    cls.__clients[key] = client
+        return client
+
+    @classmethod
+    def get_resource(cls, service_name: str, region_name: str = None, **config_options):
+        """
+        Returns the resource of a service for the calling thread; resources are not thread-safe
+
+        :param service_name: AWS service name
+        :param region_name: AWS region; defaults to the REGION environment variable
+        :param config_options: botocore Config options overriding the defaults
+        :return: boto3 resource
+        """
+        key = cls.__get_key(service_name, region_name, config_options)
+        resources = getattr(cls.__local, 'resources', None)
+        if resources is None:
+            resources = cls.__local.resources = {}
+        resource = resources.get(key)
+        if resource is None:
+            with cls.__lock:
+                import boto3
+                # The default boto3 session is not thread-safe
+                resource = boto3.resource(service_name, region_name=key[1], config=cls.build_config(**config_options))
+            resources[key] = resource
+        return resource
+
+    @classmethod
+    def clear(cls):
+        """
+        Drops all cached clients and the resources of the calling thread
+        """
+        with cls.__lock:
+            cls.__clients.clear()
+        cls.__local.resources = {}
+
+    @staticmethod
+    def __get_key(service_name: str, region_name: str, config_options: dict) -> tuple:
+        if region_name is None:
+            region_name = os.getenv('REGION', Constants.DEFAULT_REGION)
+        return service_name, region_name, tuple(sorted((k, repr(v)) for k, v in config_options.items()))
+
+
+class LazyClient:
+    """
+    Class attribute that resolves to the shared client of a service on first access
+    """
+
+    def __init__(self, service_name: str, **config_options):
+        self.__service_name = service_name
+        self.__config_options = config_options
+
+    def __get__(self, instance, owner):
+        return ClientFactory.get_client(self.__service_name, **self.__config_options)
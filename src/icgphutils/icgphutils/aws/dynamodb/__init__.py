@@ -1,56 +1,112 @@
-import os
-import json
-import boto3
+import queue
+import threading
+import time
 
-from decimal import Decimal
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from itertools import islice
 from botocore.exceptions import ClientError
+from typing import Callable
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
+from icgphutils.aws.client import ClientFactory
+from icgphutils.aws.dynamodb.backend import DynamoDBBackend
+from icgphutils.aws.dynamodb.backend import TableAdapter
+from icgphutils.aws.dynamodb.cache import ItemCache
+from icgphutils.aws.dynamodb.compact import ColumnarResult
+from icgphutils.aws.dynamodb.compact import CompactMode
+from icgphutils.aws.dynamodb.compact import RecordFactory
+from icgphutils.aws.dynamodb.counter import ShardedCounter
+from icgphutils.aws.dynamodb.expressions import UpdateExpressionBuilder
+from icgphutils.aws.dynamodb.metrics import Instrumentation
+from icgphutils.aws.dynamodb.pagination import Paginator
+from icgphutils.aws.dynamodb.params import RequestParams
+from icgphutils.aws.dynamodb.retry import Backoff
+from icgphutils.aws.dynamodb.singleflight import SingleFlight
+from icgphutils.aws.dynamodb.throttle import AdaptiveRateLimiter
+from icgphutils.aws.dynamodb.transaction import TransactionBuilder
 from icgphutils.aws.dynamodb.types import DBTypes
+from icgphutils.aws.dynamodb.writebehind import WriteBehindBuffer
 from icgphutils.constants import Constants
 from icgphutils.log import Logger
 
 
 class DynamoDB:
 
-    def __init__(self, table_name):
+    READ_OPERATIONS = ('GetItem', 'Query', 'Scan', 'TransactGetItems', 'BatchGetItem')
+
+    def __init__(
+        self,
+        table_name,
+        cache: Optional[ItemCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        backend: Optional[DynamoDBBackend] = None,
+        single_flight: Optional[SingleFlight] = None
+    ):
+        """
+        :param table_name: name of the table
+        :param cache: read-through cache for get_item and transact_get_item; writes made through
+            this instance invalidate the affected keys. Strongly consistent get_item calls skip the lookup
+            and only refresh the cache
+        :param rate_limiter: client-side rate limiter; throttled calls are retried with backoff by the limiter
+            instead of botocore
+        :param instrumentation: receives consumed capacity, item count, response size and latency of every call
+        :param backend: implementation of the DynamoDB API to use instead of boto3, e.g. InMemoryBackend
+        :param single_flight: coalesces concurrent get_item and transact_get_item calls for the same key;
+            writes made through this instance detach the reads in flight for the affected keys
+        """
         self.__table_name = table_name
-        self.__client = boto3.client('dynamodb', region_name=os.getenv('REGION', Constants.DEFAULT_REGION))
+        self.__cache = cache
+        self.__rate_limiter = rate_limiter
+        self.__instrumentation = instrumentation
+        self.__backend = backend
+        self.__single_flight = single_flight
         self.__logger = Logger.get_logger()
 
-        # For table-based queries
-        dynamodb = boto3.resource('dynamodb', region_name=os.getenv('REGION', Constants.DEFAULT_REGION))
-        self.__db_table = dynamodb.Table(self.__table_name)
+        self.__config_options = AdaptiveRateLimiter.CLIENT_CONFIG if rate_limiter is not None else {}
+        if backend is None:
+            self.__client = ClientFactory.get_client('dynamodb', **self.__config_options)
+            # For table-based queries
+            self.__db_table = ClientFactory.get_resource('dynamodb', **self.__config_options).Table(self.__table_name)
+        else:
+            self.__client = backend
+            self.__db_table = TableAdapter(backend, self.__table_name)
+
+        # Resources are not thread-safe; other threads get their own table
+        self.__local = threading.local()
+        self.__local.table = self.__db_table
+
+        if self.__rate_limiter is not None:
+            self.__rate_limiter.register(self.__table_name, self.__client)
 
     def transact_get_item(self, keys: Dict):
         """
         Transaction-based implementation of GetItem
 
+        With a cache, cached items are returned without a call, so the read is only as fresh as the cache.
+
         :param keys: dictionary of primary key and sort key (if any)
         :return: item info
         """
-        item = None
-        try:
-            result = self.__client.transact_get_items(
-                TransactItems=[
-                    {
-                        'Get': {
-                            'Key': DBTypes.convert_dict_to_db_item(keys),
-                            'TableName': self.__table_name
-                        }
-                    }
-                ]
-            )
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
-        else:
-            db_item = result['Responses'][0].get('Item')
+        db_key = DBTypes.convert_dict_to_db_item(keys)
+        if self.__cache is not None:
+            db_item = self.__cache.get(self.__table_name, db_key)
             if db_item is not None:
-                item = DBTypes.convert_db_dict_to_generic_item(db_item)
-        return item
+                return DBTypes.convert_db_dict_to_generic_item(db_item)
+        if self.__single_flight is None:
+            return self.__transact_get_item(db_key)
+        return self.__single_flight.do(
+            SingleFlight.make_key('TransactGetItems', self.__table_name, keys, True),
+            lambda: self.__transact_get_item(db_key)
+        )
 
     def transact_add_item(self, entry: Dict, keys: Optional[List] = None):
         """
@@ -61,167 +117,796 @@ class DynamoDB:
         :return: result dictionary
         """
         try:
-            if keys is None:
-                # Always overwrite
-                result = self.__client.transact_write_items(
-                    TransactItems=[
-                        {
-                            'Put': {
-                                'Item': DBTypes.convert_dict_to_db_item(entry),
-                                'TableName': self.__table_name
-                            }
-                        }
-                    ]
-                )
-            else:
-                checks = ' AND '.join(f'attribute_not_exists({key})' for key in keys)
-                result = self.__client.transact_write_items(
-                    TransactItems=[
-                        {
-                            'Put': {
-                                'Item': DBTypes.convert_dict_to_db_item(entry),
-                                'TableName': self.__table_name,
-                                'ConditionExpression': checks
-                            }
-                        }
-                    ]
-                )
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
+            # keys of None always overwrites
+            result = self.__execute('TransactWriteItems', self.__client.transact_write_items, {
+                'TransactItems': [TransactionBuilder.build_put(self.__table_name, entry, keys)]
+            }, units=2)
+        finally:
+            self.__invalidate(entry)
         return result
 
-    def transact_update_item(self, keys: Dict, attributes: Dict):
+    def transact_update_item(
+        self,
+        keys: Dict,
+        attributes: Optional[Dict] = None,
+        add: Optional[Dict] = None,
+        remove: Optional[List[str]] = None,
+        append: Optional[Dict] = None,
+        before: Optional[Dict] = None,
+        skip_zero_add: bool = False,
+        document_paths: bool = False
+    ):
         """
         Transaction-based implementation of UpdateItem
 
         :param keys: dictionary of primary key and sort key (if any)
-        :param attributes: attributes for update
-        :return: result dictionary
+        :param attributes: attribute names and values to SET
+        :param add: attribute names and numbers or sets to ADD
+        :param remove: attribute names to REMOVE
+        :param append: attribute names and lists to append to list attributes
+        :param before: current item; when given, only changes against it are sent
+        :param skip_zero_add: leave out ADD deltas of 0
+        :param document_paths: read the names as document paths, e.g. 'a.b[0]'
+        :return: result dictionary; None if there is nothing to update
         """
+        operation = TransactionBuilder.build_update(
+            self.__table_name, keys, attributes, add, remove, append, before, skip_zero_add, document_paths
+        )
+        if operation is None:
+            return None
         try:
-            expr = 'set {}'.format(','.join(f'#{k}=:{k}' for k in attributes))
-            expression_attribute_values = {f':{k}': v for k, v in attributes.items()}
-            expr_names = {f'#{k}': k for k in attributes}
-            checks = ' AND '.join(f'attribute_exists({key})' for key in keys)
-            result = self.__client.transact_write_items(
-                TransactItems=[
-                    {
-                        'Update': {
-                            'Key': DBTypes.convert_dict_to_db_item(keys),
-                            'TableName': self.__table_name,
-                            'UpdateExpression': expr,
-                            'ConditionExpression': checks,
-                            'ExpressionAttributeNames': expr_names,
-                            'ExpressionAttributeValues': DBTypes.convert_dict_to_db_item(expression_attribute_values)
-                        }
-                    }
-                ]
-            )
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
+            result = self.__execute('TransactWriteItems', self.__client.transact_write_items, {
+                'TransactItems': [operation]
+            }, units=2)
+        finally:
+            self.__invalidate(keys)
         return result
 
+    def transaction(self, atomic: bool = True) -> TransactionBuilder:
+        """
+        Returns a TransactionBuilder that submits its operations on exit of the with block
+
+        :param atomic: raise if the operations do not fit in a single call; if False, they are split across
+            several calls, each atomic on its own
+        :return: TransactionBuilder defaulting to this table
+        """
+        return TransactionBuilder(self, self.__table_name, atomic=atomic)
+
+    def sharded_counter(self, name: str, **kwargs) -> ShardedCounter:
+        """
+        Returns a ShardedCounter stored in this table
+
+        :param name: name of the counter
+        :param kwargs: options of ShardedCounter
+        :return: ShardedCounter
+        """
+        return ShardedCounter(self, self.__table_name, name, **kwargs)
+
+    def write_behind(self, **kwargs) -> WriteBehindBuffer:
+        """
+        Returns a WriteBehindBuffer that coalesces updates and writes them with this instance
+
+        :param kwargs: options of WriteBehindBuffer
+        :return: WriteBehindBuffer
+        """
+        return WriteBehindBuffer(self, **kwargs)
+
     def transact_write_items(self, **kwargs):
+        transact_items = kwargs.get('TransactItems', [])
         try:
-            result = self.__client.transact_write_items(**kwargs)
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
+            result = self.__execute(
+                'TransactWriteItems', self.__client.transact_write_items, kwargs, units=2 * len(transact_items)
+            )
+        finally:
+            self.__invalidate_transact_items(transact_items)
         return result
 
     def update_item_custom(self, **kwargs):
         try:
-            result = self.__client.update_item(**kwargs)
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
+            result = self.__execute('UpdateItem', self.__client.update_item, kwargs)
+        finally:
+            self.__invalidate_item(kwargs.get('TableName', self.__table_name), kwargs.get('Key', {}))
         return result
 
     def add_item(self, entry: Dict, keys: Optional[List] = None) -> Dict:
-        payload = json.loads(json.dumps(entry), parse_float=Decimal)
+        payload = DBTypes.replace_float(entry)
+        table = self.__get_thread_table()
         try:
             if keys is None:
                 # Always overwrite
-                response = self.__db_table.put_item(
-                    Item=payload
-                )
+                response = self.__execute('PutItem', table.put_item, {
+                    'Item': payload
+                })
             else:
                 checks = ' AND '.join(f'attribute_not_exists({key})' for key in keys)
-                response = self.__db_table.put_item(
-                    Item=payload,
-                    ConditionExpression=checks
-                )
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
+                response = self.__execute('PutItem', table.put_item, {
+                    'Item': payload,
+                    'ConditionExpression': checks
+                })
+        finally:
+            self.__invalidate(entry)
         return response
 
     def get_item(self, keys: Dict, consistent_read: Optional[bool] = True) -> Dict:
-        response = None
-        try:
-            response = self.__db_table.get_item(
-                Key=keys,
-                ConsistentRead=consistent_read
-            )
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
-        return response.get('Item')
+        # Cached items may predate writes made elsewhere, so only eventually consistent reads are served from it
+        if self.__cache is not None and not consistent_read:
+            db_key = DBTypes.convert_dict_to_db_item(keys)
+            db_item = self.__cache.get(self.__table_name, db_key)
+            if db_item is not None:
+                return DBTypes.convert_db_dict_to_decimal_item(db_item)
+        if self.__single_flight is None:
+            return self.__get_item(keys, consistent_read)
+        return self.__single_flight.do(
+            SingleFlight.make_key('GetItem', self.__table_name, keys, consistent_read),
+            lambda: self.__get_item(keys, consistent_read)
+        )
 
     def query(self, **kwargs):
-        try:
-            response = self.__db_table.query(**kwargs)
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
-        return response
+        return self.__execute('Query', self.__get_thread_table().query, kwargs)
 
     def scan(self, **kwargs):
-        try:
-            response = self.__db_table.scan(**kwargs)
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
+        response = self.__execute('Scan', self.__get_thread_table().scan, kwargs)
         return DBTypes.replace_decimal(response)
 
-    def update_item(self, keys: Dict, attributes: Dict):
+    def iter_query(
+        self,
+        pages: bool = False,
+        limit: Optional[int] = None,
+        prefetch: bool = True,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Generator-based implementation of Query that follows LastEvaluatedKey lazily
+
+        :param pages: yield whole response pages instead of items
+        :param limit: maximum number of items to return
+        :param prefetch: fetch the next page in the background while the current page is consumed
+        :param kwargs: Query request parameters
+        :return: iterator of items or pages
+        """
+        # Pages are read with the shared client, which unlike table resources is thread-safe, so prefetching
+        # does not build a resource in its thread
+        def fetch_page(request):
+            return DynamoDB.__deserialize_page(self.__execute('Query', self.__client.query, request))
+
+        request = RequestParams.to_client_params(self.__table_name, kwargs)
+        return self.__iter_pages(fetch_page, request, pages, limit, prefetch)
+
+    def iter_scan(
+        self,
+        pages: bool = False,
+        limit: Optional[int] = None,
+        prefetch: bool = True,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Generator-based implementation of Scan that follows LastEvaluatedKey lazily
+
+        :param pages: yield whole response pages instead of items
+        :param limit: maximum number of items to return
+        :param prefetch: fetch the next page in the background while the current page is consumed
+        :param kwargs: Scan request parameters
+        :return: iterator of items or pages
+        """
+        def fetch_page(request):
+            return DynamoDB.__deserialize_page(self.__execute('Scan', self.__client.scan, request))
+
+        request = RequestParams.to_client_params(self.__table_name, kwargs)
+        return self.__iter_pages(fetch_page, request, pages, limit, prefetch)
+
+    def query_compact(
+        self,
+        attributes: List[str],
+        mode: str = CompactMode.COLUMNAR,
+        limit: Optional[int] = None,
+        **kwargs
+    ):
+        """
+        Query implementation that materializes all pages into a compact representation
+
+        :param attributes: attributes to keep; also used as the projection unless ProjectionExpression is given
+        :param mode: CompactMode.COLUMNAR for a ColumnarResult, CompactMode.RECORDS for __slots__-based records
+        :param limit: maximum number of items to return
+        :param kwargs: Query request parameters
+        :return: ColumnarResult or list of records
+        """
+        return self.__read_compact('Query', self.__client.query, attributes, mode, limit, kwargs)
+
+    def scan_compact(
+        self,
+        attributes: List[str],
+        mode: str = CompactMode.COLUMNAR,
+        limit: Optional[int] = None,
+        **kwargs
+    ):
+        """
+        Scan implementation that materializes all pages into a compact representation
+
+        :param attributes: attributes to keep; also used as the projection unless ProjectionExpression is given
+        :param mode: CompactMode.COLUMNAR for a ColumnarResult, CompactMode.RECORDS for __slots__-based records
+        :param limit: maximum number of items to return
+        :param kwargs: Scan request parameters
+        :return: ColumnarResult or list of records
+        """
+        return self.__read_compact('Scan', self.__client.scan, attributes, mode, limit, kwargs)
+
+    def parallel_scan(
+        self,
+        total_segments: int,
+        workers: Optional[int] = None,
+        callback: Optional[Callable[[int, List[Dict]], None]] = None,
+        queue_size: int = Constants.DYNAMODB_SCAN_QUEUE_SIZE,
+        **kwargs
+    ):
+        """
+        Parallel implementation of Scan using Segment/TotalSegments
+
+        :param total_segments: number of segments to split the table into
+        :param workers: number of segments scanned concurrently
+        :param callback: function called with the segment number and items of every page;
+            if given, items are not collected
+        :param queue_size: maximum number of pages buffered between the workers and the caller
+        :param kwargs: Scan request parameters
+        :return: iterator of items; if callback is given, dictionary of number of items processed per segment
+        """
+        if workers is None:
+            workers = min(total_segments, Constants.DYNAMODB_MAX_WORKERS)
+        request = RequestParams.to_client_params(self.__table_name, kwargs)
+
+        if callback is None:
+            return self.__iter_parallel_scan(total_segments, workers, queue_size, request)
+
+        def process_segment(segment):
+            count = 0
+            for page in self.__iter_segment(segment, total_segments, request):
+                callback(segment, page['Items'])
+                count += len(page['Items'])
+            return count
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            counts = executor.map(process_segment, range(total_segments))
+            return dict(zip(range(total_segments), counts))
+
+    def update_item(
+        self,
+        keys: Dict,
+        attributes: Optional[Dict] = None,
+        add: Optional[Dict] = None,
+        remove: Optional[List[str]] = None,
+        append: Optional[Dict] = None,
+        before: Optional[Dict] = None,
+        skip_zero_add: bool = False,
+        document_paths: bool = False
+    ):
+        """
+        Updates an existing item
+
+        :param keys: dictionary of primary key and sort key (if any)
+        :param attributes: attribute names and values to SET
+        :param add: attribute names and numbers or sets to ADD
+        :param remove: attribute names to REMOVE
+        :param append: attribute names and lists to append to list attributes
+        :param before: current item; when given, only changes against it are sent
+        :param skip_zero_add: leave out ADD deltas of 0
+        :param document_paths: read the names as document paths, e.g. 'a.b[0]'
+        :return: result dictionary; None if there is nothing to update
+        """
+        params = UpdateExpressionBuilder.build(
+            keys, attributes, add, remove, append, before, skip_zero_add, document_paths
+        )
+        if params is None:
+            return None
+        if 'ExpressionAttributeValues' in params:
+            params['ExpressionAttributeValues'] = DBTypes.replace_float(params['ExpressionAttributeValues'])
         try:
-            expr = 'set {}'.format(','.join(f'#{k}=:{k}' for k in attributes))
-            expression_attribute_values = {f':{k}': v for k, v in attributes.items()}
-            expr_names = {f'#{k}': k for k in attributes}
-            checks = ' AND '.join(f'attribute_exists({key})' for key in keys)
-            result = self.__db_table.update_item(
-                Key=keys,
-                UpdateExpression=expr,
-                ExpressionAttributeNames=expr_names,
-                ExpressionAttributeValues=expression_attribute_values,
-                ConditionExpression=checks,
+            result = self.__execute('UpdateItem', self.__get_thread_table().update_item, dict(
+                params,
+                Key=DBTypes.replace_float(keys),
                 ReturnValues='ALL_NEW'
-            )
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
+            ))
+        finally:
+            self.__invalidate(keys)
         return result
 
     def delete_item(self, keys: Dict):
-        response = None
         try:
-            response = self.__db_table.delete_item(
-                Key=keys
-            )
-        except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
+            response = self.__execute('DeleteItem', self.__get_thread_table().delete_item, {
+                'Key': keys
+            })
+        finally:
+            self.__invalidate(keys)
         return response
 
     def execute_statement(self, **kwargs):
-        response = None
+        kind = DynamoDB.__get_statement_kind(kwargs.get('Statement', ''))
+        response = self.__execute('ExecuteStatement', self.__client.execute_statement, kwargs, kind=kind)
+        response['Items'] = DBTypes.convert_db_list_to_generic_item(response['Items'])
+        return response
+
+    def iter_statement(
+        self,
+        statement: str,
+        parameters: Optional[List] = None,
+        page_size: Optional[int] = None,
+        consistent_read: bool = False,
+        pages: bool = False,
+        prefetch: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Generator-based implementation of ExecuteStatement that follows NextToken lazily
+
+        :param statement: PartiQL statement
+        :param parameters: python values of the statement parameters
+        :param page_size: maximum number of items evaluated per call
+        :param consistent_read: use strongly consistent reads
+        :param pages: yield whole response pages instead of items
+        :param prefetch: fetch the next page in the background while the current page is consumed
+        :return: iterator of items or pages, converted page by page
+        """
+        request = {'Statement': statement, 'ConsistentRead': consistent_read}
+        if parameters:
+            request['Parameters'] = DynamoDB.__to_statement_parameters(parameters)
+        if page_size is not None:
+            request['Limit'] = page_size
+        kind = DynamoDB.__get_statement_kind(statement)
+
+        def fetch_page(params):
+            response = self.__execute('ExecuteStatement', self.__client.execute_statement, params, kind=kind)
+            response['Items'] = DBTypes.convert_db_list_to_generic_item(response.get('Items', []))
+            return response
+
+        for page in Paginator.iter_pages(
+            fetch_page, request, request_token='NextToken', response_token='NextToken', prefetch=prefetch
+        ):
+            if pages:
+                yield page
+            else:
+                yield from page['Items']
+
+    def batch_execute_statements(
+        self,
+        statements: List[Union[str, Tuple[str, List]]],
+        consistent_read: bool = False,
+        max_workers: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        BatchExecuteStatement-based implementation of ExecuteStatement for many statements
+
+        Statements are sent in groups of 25, concurrently. A group must contain only reads or only writes.
+
+        :param statements: statements, or tuples of statement and python values of its parameters
+        :param consistent_read: use strongly consistent reads
+        :param max_workers: maximum number of concurrent BatchExecuteStatement calls
+        :return: list of dictionaries with 'Item' (python-formatted, or None) and 'Error' (dictionary
+            with 'Code' and 'Message', or None) in the same order as statements
+        """
+        if not statements:
+            return []
+        if max_workers is None:
+            max_workers = Constants.DYNAMODB_MAX_WORKERS
+
+        requests = []
+        for statement in statements:
+            statement, parameters = (statement, None) if isinstance(statement, str) else statement
+            request = {'Statement': statement, 'ConsistentRead': consistent_read}
+            if parameters:
+                request['Parameters'] = DynamoDB.__to_statement_parameters(parameters)
+            requests.append(request)
+
+        groups = list(self.__chunk(requests, Constants.DYNAMODB_BATCH_STATEMENT_SIZE))
+        results = []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as executor:
+            for group_results in executor.map(self.__execute_statement_group, groups):
+                results.extend(group_results)
+        return results
+
+    def batch_add_items(self, entries: Iterable[Dict], max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        BatchWriteItem-based implementation of PutItem for many items
+
+        :param entries: iterable of dictionaries of items to be added
+        :param max_workers: maximum number of concurrent BatchWriteItem calls
+        :return: list of per-batch stats
+        """
+        requests = (
+            {'PutRequest': {'Item': DBTypes.convert_dict_to_db_item(entry)}}
+            for entry in entries
+        )
+        return self.__batch_write(requests, max_workers)
+
+    def batch_delete_items(self, keys: Iterable[Dict], max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        BatchWriteItem-based implementation of DeleteItem for many items
+
+        :param keys: iterable of dictionaries of primary key and sort key (if any)
+        :param max_workers: maximum number of concurrent BatchWriteItem calls
+        :return: list of per-batch stats
+        """
+        requests = (
+            {'DeleteRequest': {'Key': DBTypes.convert_dict_to_db_item(key)}}
+            for key in keys
+        )
+        return self.__batch_write(requests, max_workers)
+
+    def batch_get_items(
+        self,
+        keys: List[Dict],
+        projection: Optional[List[str]] = None,
+        consistent_read: bool = False,
+        max_workers: Optional[int] = None
+    ) -> List[Optional[Dict]]:
+        """
+        BatchGetItem-based implementation of GetItem for many items
+
+        :param keys: list of dictionaries of primary key and sort key (if any)
+        :param projection: list of top-level attributes to return; if None, all attributes are returned
+        :param consistent_read: use strongly consistent reads
+        :param max_workers: maximum number of concurrent BatchGetItem calls
+        :return: list of items in the same order as keys; None for keys that were not found
+        """
+        if not keys:
+            return []
+        if max_workers is None:
+            max_workers = Constants.DYNAMODB_MAX_WORKERS
+
+        db_keys = [DBTypes.convert_dict_to_db_item(key) for key in keys]
+        signatures = [DBTypes.get_key_signature(db_key) for db_key in db_keys]
+        unique_keys = list(dict(zip(signatures, db_keys)).values())
+        key_names = list(dict.fromkeys(name for key in keys for name in key))
+
+        request = {'ConsistentRead': consistent_read}
+        if projection is not None:
+            # Key attributes are always fetched so results can be matched back to the input
+            names = list(dict.fromkeys(list(projection) + key_names))
+            request['ProjectionExpression'] = ','.join(f'#p{i}' for i in range(len(names)))
+            request['ExpressionAttributeNames'] = {f'#p{i}': name for i, name in enumerate(names)}
+            extra_names = [name for name in key_names if name not in projection]
+        else:
+            extra_names = []
+
+        chunks = list(self.__chunk(unique_keys, Constants.DYNAMODB_BATCH_GET_SIZE))
+        found = {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            for db_items in executor.map(lambda chunk: self.__get_batch(chunk, request), chunks):
+                for db_item in db_items:
+                    signature = DBTypes.get_key_signature({name: db_item[name] for name in key_names if name in db_item})
+                    for name in extra_names:
+                        db_item.pop(name, None)
+                    found[signature] = db_item
+
+        items = []
+        for signature in signatures:
+            db_item = found.get(signature)
+            items.append(DBTypes.convert_db_dict_to_generic_item(db_item) if db_item is not None else None)
+        return items
+
+    def __execute_statement_group(self, requests: List[Dict]) -> List[Dict]:
+        # Reads and writes cannot be mixed in one call, so the first statement decides
+        kind = DynamoDB.__get_statement_kind(requests[0]['Statement'])
         try:
-            response = self.__client.execute_statement(**kwargs)
+            response = self.__execute('BatchExecuteStatement', self.__client.batch_execute_statement, {
+                'Statements': requests
+            }, kind=kind, units=len(requests))
         except ClientError as e:
-            self.__logger.error(e.response.get('Error').get('Message'))
-            raise
-        response['Items'] = DBTypes.convert_db_list_to_generic_item(response['Items'])
-        return response
\ No newline at end of file
+            error = {'Code': e.response.get('Error').get('Code'), 'Message': e.response.get('Error').get('Message')}
+            return [{'Item': None, 'Error': error} for _ in requests]
+
+        results = []
+        for result in response['Responses']:
+            db_item = result.get('Item')
+            results.append({
+                'Item': DBTypes.convert_db_dict_to_generic_item(db_item) if db_item else None,
+                'Error': result.get('Error')
+            })
+        return results
+
+    @staticmethod
+    def __get_statement_kind(statement: str) -> str:
+        is_read = statement.lstrip().upper().startswith('SELECT')
+        return AdaptiveRateLimiter.READ if is_read else AdaptiveRateLimiter.WRITE
+
+    @staticmethod
+    def __to_statement_parameters(parameters: List) -> List[Dict]:
+        db_values = DBTypes.convert_dict_to_db_item({str(i): value for i, value in enumerate(parameters)})
+        return [db_values[str(i)] for i in range(len(parameters))]
+
+    def __get_item(self, keys: Dict, consistent_read: Optional[bool]) -> Dict:
+        if self.__cache is not None:
+            db_key = DBTypes.convert_dict_to_db_item(keys)
+            generation = self.__cache.get_generation(self.__table_name, db_key)
+        response = self.__execute('GetItem', self.__get_thread_table().get_item, {
+            'Key': keys,
+            'ConsistentRead': consistent_read
+        })
+        item = response.get('Item')
+        if self.__cache is not None and item is not None:
+            self.__cache.set(self.__table_name, db_key, DBTypes.convert_dict_to_db_item(item), generation)
+        return item
+
+    def __transact_get_item(self, db_key: Dict) -> Dict:
+        item = None
+        if self.__cache is not None:
+            generation = self.__cache.get_generation(self.__table_name, db_key)
+        result = self.__execute('TransactGetItems', self.__client.transact_get_items, {
+            'TransactItems': [
+                {
+                    'Get': {
+                        'Key': db_key,
+                        'TableName': self.__table_name
+                    }
+                }
+            ]
+        }, units=2)
+        db_item = result['Responses'][0].get('Item')
+        if db_item is not None:
+            item = DBTypes.convert_db_dict_to_generic_item(db_item)
+            if self.__cache is not None:
+                self.__cache.set(self.__table_name, db_key, db_item, generation)
+        return item
+
+    def __execute(self, operation: str, func: Callable, params: Dict, kind: Optional[str] = None, units: float = 1):
+        if kind is None:
+            kind = AdaptiveRateLimiter.READ if operation in DynamoDB.READ_OPERATIONS else AdaptiveRateLimiter.WRITE
+        rate_limiter = self.__rate_limiter
+        instrumentation = self.__instrumentation
+        if instrumentation is not None:
+            params = instrumentation.prepare(params)
+        attempt = 0
+        while True:
+            if rate_limiter is not None:
+                rate_limiter.acquire(self.__table_name, kind, units)
+            start = time.perf_counter()
+            try:
+                result = func(**params)
+            except ClientError as e:
+                if instrumentation is not None:
+                    instrumentation.record(
+                        operation, self.__table_name, kind == AdaptiveRateLimiter.READ, params, None,
+                        time.perf_counter() - start, e.response.get('Error', {}).get('Code')
+                    )
+                if (
+                    rate_limiter is not None
+                    and attempt + 1 < rate_limiter.max_attempts
+                    and AdaptiveRateLimiter.is_throttling_error(e)
+                ):
+                    attempt += 1
+                    rate_limiter.on_throttle(self.__table_name, kind, attempt)
+                    continue
+                self.__logger.error(e.response.get('Error').get('Message'))
+                raise
+            if instrumentation is not None:
+                instrumentation.record(
+                    operation, self.__table_name, kind == AdaptiveRateLimiter.READ, params, result,
+                    time.perf_counter() - start
+                )
+            if rate_limiter is not None:
+                rate_limiter.on_success(self.__table_name, kind)
+                consumed = DynamoDB.__get_consumed_units(result, self.__table_name)
+                if consumed is not None:
+                    rate_limiter.settle(self.__table_name, kind, consumed - units)
+            return result
+
+    @staticmethod
+    def __get_consumed_units(result: Dict, table_name: str) -> Optional[float]:
+        consumed = result.get('ConsumedCapacity')
+        if consumed is None:
+            return None
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        return sum(capacity.get('CapacityUnits', 0) for capacity in consumed if capacity.get('TableName') == table_name)
+
+    def __read_compact(
+        self,
+        operation: str,
+        func: Callable,
+        attributes: List[str],
+        mode: str,
+        limit: Optional[int],
+        request: Dict
+    ):
+        request = RequestParams.to_client_params(self.__table_name, request)
+        if 'ProjectionExpression' not in request:
+            names = request.setdefault('ExpressionAttributeNames', {})
+            placeholders = []
+            for i, name in enumerate(attributes):
+                names[f'#c{i}'] = name
+                placeholders.append(f'#c{i}')
+            request['ProjectionExpression'] = ','.join(placeholders)
+
+        pages = Paginator.iter_pages(lambda params: self.__execute(operation, func, params), request, limit=limit)
+        if mode == CompactMode.RECORDS:
+            records = []
+            for page in pages:
+                records.extend(RecordFactory.from_db_items(attributes, page['Items']))
+            return records
+
+        result = ColumnarResult(attributes)
+        for page in pages:
+            result.add_page(page['Items'])
+        return result
+
+    def __iter_parallel_scan(self, total_segments: int, workers: int, queue_size: int, request: Dict) -> Iterator[Dict]:
+        pages = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        done = object()
+
+        def put(entry):
+            # Gives up once the caller stops consuming, so blocked workers can exit
+            while not stop.is_set():
+                try:
+                    pages.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def scan_segment(segment):
+            error = None
+            try:
+                for page in self.__iter_segment(segment, total_segments, request):
+                    if not put(page['Items']):
+                        return
+            except Exception as e:
+                error = e
+            finally:
+                put((done, error))
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = [executor.submit(scan_segment, segment) for segment in range(total_segments)]
+
+        finished = 0
+        try:
+            while finished < total_segments:
+                entry = pages.get()
+                if isinstance(entry, tuple) and entry[0] is done:
+                    finished += 1
+                    if entry[1] is not None:
+                        raise entry[1]
+                else:
+                    yield from entry
+        finally:
+            # Running segments stop at their next page; queued ones are cancelled before they start,
+            # as shutdown(cancel_futures=True) does on Python 3.9+
+            stop.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def __iter_segment(self, segment: int, total_segments: int, request: Dict) -> Iterator[Dict]:
+        # Workers share the thread-safe client instead of each building a table resource
+        def fetch_page(params):
+            return DynamoDB.__deserialize_page(self.__execute('Scan', self.__client.scan, params))
+
+        request = dict(request, Segment=segment, TotalSegments=total_segments)
+        return Paginator.iter_pages(fetch_page, request, prefetch=False)
+
+    @staticmethod
+    def __deserialize_page(page: Dict) -> Dict:
+        # Only items are converted here: LastEvaluatedKey is sent back as ExclusiveStartKey as returned
+        if 'Items' in page:
+            page['Items'] = DBTypes.convert_db_list_to_generic_item(page['Items'])
+        return page
+
+    @staticmethod
+    def __iter_pages(fetch_page, request: Dict, pages: bool, limit: Optional[int], prefetch: bool) -> Iterator[Dict]:
+        for page in Paginator.iter_pages(fetch_page, request, limit=limit, prefetch=prefetch):
+            if not pages:
+                yield from page['Items']
+            elif 'LastEvaluatedKey' in page:
+                # The next request was already made with the ddb-formatted key; callers get it the way
+                # table-based operations return it
+                yield dict(page, LastEvaluatedKey=DBTypes.convert_db_dict_to_decimal_item(page['LastEvaluatedKey']))
+            else:
+                yield page
+
+    def __get_batch(self, db_keys: List[Dict], request: Dict) -> List[Dict]:
+        retries = 0
+        db_items = []
+        pending = {self.__table_name: dict(request, Keys=db_keys)}
+        while True:
+            result = self.__execute('BatchGetItem', self.__client.batch_get_item, {
+                'RequestItems': pending
+            }, units=len(pending[self.__table_name]['Keys']))
+            db_items.extend(result['Responses'].get(self.__table_name, []))
+            pending = result.get('UnprocessedKeys')
+            if not pending:
+                break
+            if retries >= Constants.DYNAMODB_MAX_RETRIES:
+                self.__logger.error(
+                    f'{len(pending[self.__table_name]["Keys"])} keys left unprocessed after {retries} retries'
+                )
+                break
+            retries += 1
+            Backoff.sleep(retries)
+        return db_items
+
+    @staticmethod
+    def __chunk(iterable: Iterable, size: int) -> Iterator[List]:
+        iterator = iter(iterable)
+        chunk = list(islice(iterator, size))
+        while chunk:
+            yield chunk
+            chunk = list(islice(iterator, size))
+
+    def __batch_write(self, requests: Iterable[Dict], max_workers: Optional[int] = None) -> List[Dict]:
+        if max_workers is None:
+            max_workers = Constants.DYNAMODB_MAX_WORKERS
+
+        stats = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            in_flight = set()
+            for batch_no, chunk in enumerate(self.__chunk(requests, Constants.DYNAMODB_BATCH_WRITE_SIZE)):
+                # Bound the number of pending batches so input is consumed lazily
+                if len(in_flight) >= max_workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    stats.extend(future.result() for future in done)
+                in_flight.add(executor.submit(self.__write_batch, batch_no, chunk))
+            stats.extend(future.result() for future in in_flight)
+
+        return sorted(stats, key=lambda batch: batch['batch'])
+
+    def __write_batch(self, batch_no: int, requests: List[Dict]) -> Dict:
+        start = time.perf_counter()
+        retries = 0
+        pending = {self.__table_name: requests}
+        try:
+            while True:
+                result = self.__execute('BatchWriteItem', self.__client.batch_write_item, {
+                    'RequestItems': pending
+                }, units=len(pending[self.__table_name]))
+                pending = result.get('UnprocessedItems')
+                if not pending or retries >= Constants.DYNAMODB_MAX_RETRIES:
+                    break
+                retries += 1
+                Backoff.sleep(retries)
+        finally:
+            if self.__cache is not None or self.__single_flight is not None:
+                for request in requests:
+                    write = request.get('PutRequest') or request['DeleteRequest']
+                    self.__invalidate_item(self.__table_name, write.get('Item') or write['Key'])
+
+        unprocessed = len(pending.get(self.__table_name, [])) if pending else 0
+        if unprocessed:
+            self.__logger.error(f'Batch {batch_no}: {unprocessed} items left unprocessed after {retries} retries')
+
+        return {
+            'batch': batch_no,
+            'items': len(requests),
+            'written': len(requests) - unprocessed,
+            'unprocessed': unprocessed,
+            'retries': retries,
+            'elapsed': time.perf_counter() - start
+        }
+
+    def __invalidate(self, keys: Dict):
+        if self.__cache is not None:
+            # Keys may come from a full item, so only the key attributes are serialized
+            key_names = self.__cache.get_key_names(self.__table_name)
+            if key_names is not None and all(name in keys for name in key_names):
+                db_key = DBTypes.convert_dict_to_db_item({name: keys[name] for name in key_names})
+                self.__cache.invalidate(self.__table_name, db_key)
+        if self.__single_flight is not None:
+            # Reads that started before the write must not be joined by reads made after it
+            db_item = DBTypes.convert_dict_to_db_item(DBTypes.replace_float(keys))
+            self.__single_flight.forget_item(self.__table_name, db_item)
+
+    def __invalidate_item(self, table_name: str, db_item: Dict):
+        if self.__cache is not None:
+            self.__cache.invalidate_item(table_name, db_item)
+        if self.__single_flight is not None:
+            self.__single_flight.forget_item(table_name, db_item)
+
+    def __invalidate_transact_items(self, transact_items: List[Dict]):
+        if self.__cache is None and self.__single_flight is None:
+            return
+        for table_name, db_item in TransactionBuilder.get_written_items(transact_items):
+            self.__invalidate_item(table_name, db_item)
+
+    def __get_thread_table(self):
+        if self.__backend is not None:
+            return self.__db_table
+        table = getattr(self.__local, 'table', None)
+        if table is None:
+            table = ClientFactory.get_resource('dynamodb', **self.__config_options).Table(self.__table_name)
+            self.__local.table = table
+        return table
@@ -0,0 +1,276 @@
+import asyncio
+import copy
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from icgphutils.aws.dynamodb import DynamoDB
+from icgphutils.aws.dynamodb.backend import DynamoDBBackend
+from icgphutils.aws.dynamodb.cache import ItemCache
+from icgphutils.aws.dynamodb.metrics import Instrumentation
+from icgphutils.aws.dynamodb.singleflight import SingleFlight
+from icgphutils.aws.dynamodb.throttle import AdaptiveRateLimiter
+from icgphutils.aws.dynamodb.transaction import TransactionBuilder
+from icgphutils.aws.dynamodb.types import DBTypes
+from icgphutils.constants import Constants
+
+
+class AsyncSingleFlight:
+    """
+    asyncio counterpart of SingleFlight, coalescing identical calls of tasks running on the same event loop
+    """
+
+    def __init__(self):
+        self.__flights = {}
+        self.__calls = 0
+        self.__coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable]) -> Any:
+        """
+        Awaits func, unless a call for the same key is in flight
+
+        Cancelling a caller does not cancel the call while other callers wait for it.
+
+        :param key: hashable key of the call
+        :param func: coroutine function without arguments making the call
+        :return: result of func; exceptions of func are raised in every waiting task
+        """
+        self.__calls += 1
+        flight = self.__flights.get(key)
+        if flight is not None:
+            self.__coalesced += 1
+            return copy.deepcopy(await asyncio.shield(flight))
+
+        flight = self.__flights[key] = asyncio.ensure_future(func())
+        flight.add_done_callback(lambda _: self.__land(key, flight))
+        return await asyncio.shield(flight)
+
+    def forget_item(self, table_name: str, db_item: Dict):
+        """
+        Detaches the reads in flight for the key of an item; calls already waiting still get their result
+
+        :param table_name: name of the table
+        :param db_item: ddb-formatted item or key
+        """
+        for key in [key for key in self.__flights if SingleFlight.is_item_key(key, table_name, db_item)]:
+            del self.__flights[key]
+
+    def stats(self) -> Dict:
+        """
+        :return: dictionary with the number of calls, coalesced calls and calls in flight
+        """
+        return {'calls': self.__calls, 'coalesced': self.__coalesced, 'in_flight': len(self.__flights)}
+
+    def __land(self, key: Hashable, flight: asyncio.Future):
+        # A write may have detached the flight and a newer call taken its place
+        if self.__flights.get(key) is flight:
+            del self.__flights[key]
+
+
+class AsyncDynamoDB:
+    """
+    asyncio counterpart of DynamoDB; blocking calls run on a bounded thread pool
+    """
+
+    def __init__(
+        self,
+        table_name,
+        max_concurrency: int = Constants.DYNAMODB_MAX_WORKERS,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        backend: Optional[DynamoDBBackend] = None,
+        single_flight: Optional[AsyncSingleFlight] = None,
+        cache: Optional[ItemCache] = None
+    ):
+        self.__table_name = table_name
+        self.__db = DynamoDB(
+            table_name,
+            cache=cache,
+            rate_limiter=rate_limiter,
+            instrumentation=instrumentation,
+            backend=backend
+        )
+        self.__single_flight = single_flight
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.__executor.shutdown(wait=False)
+
+    async def __run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, partial(func, *args, **kwargs))
+
+    def __forget(self, *items: Dict):
+        # Reads that started before a write must not be joined by reads made after it
+        if self.__single_flight is not None:
+            for item in items:
+                db_item = DBTypes.convert_dict_to_db_item(DBTypes.replace_float(item))
+                self.__single_flight.forget_item(self.__table_name, db_item)
+
+    def __forget_db_items(self, written: List[Tuple[str, Dict]]):
+        if self.__single_flight is not None:
+            for table_name, db_item in written:
+                self.__single_flight.forget_item(table_name, db_item)
+
+    async def transact_get_item(self, keys: Dict):
+        if self.__single_flight is None:
+            return await self.__run(self.__db.transact_get_item, keys)
+        return await self.__single_flight.do(
+            SingleFlight.make_key('TransactGetItems', self.__table_name, keys, True),
+            lambda: self.__run(self.__db.transact_get_item, keys)
+        )
+
+    async def transact_add_item(self, entry: Dict, keys: Optional[List] = None):
+        try:
+            return await self.__run(self.__db.transact_add_item, entry, keys)
+        finally:
+            self.__forget(entry)
+
+    async def transact_update_item(
+        self,
+        keys: Dict,
+        attributes: Optional[Dict] = None,
+        add: Optional[Dict] = None,
+        remove: Optional[List[str]] = None,
+        append: Optional[Dict] = None,
+        before: Optional[Dict] = None,
+        skip_zero_add: bool = False,
+        document_paths: bool = False
+    ):
+        try:
+            return await self.__run(
+                self.__db.transact_update_item, keys, attributes, add, remove, append, before, skip_zero_add,
+                document_paths
+            )
+        finally:
+            self.__forget(keys)
+
+    async def transact_write_items(self, **kwargs):
+        try:
+            return await self.__run(self.__db.transact_write_items, **kwargs)
+        finally:
+            self.__forget_db_items(TransactionBuilder.get_written_items(kwargs.get('TransactItems', [])))
+
+    async def update_item_custom(self, **kwargs):
+        try:
+            return await self.__run(self.__db.update_item_custom, **kwargs)
+        finally:
+            self.__forget_db_items([(kwargs.get('TableName', self.__table_name), kwargs.get('Key', {}))])
+
+    async def add_item(self, entry: Dict, keys: Optional[List] = None) -> Dict:
+        try:
+            return await self.__run(self.__db.add_item, entry, keys)
+        finally:
+            self.__forget(entry)
+
+    async def get_item(self, keys: Dict, consistent_read: Optional[bool] = True) -> Dict:
+        if self.__single_flight is None:
+            return await self.__run(self.__db.get_item, keys, consistent_read)
+        return await self.__single_flight.do(
+            SingleFlight.make_key('GetItem', self.__table_name, keys, consistent_read),
+            lambda: self.__run(self.__db.get_item, keys, consistent_read)
+        )
+
+    async def query(self, **kwargs):
+        return await self.__run(self.__db.query, **kwargs)
+
+    async def scan(self, **kwargs):
+        return await self.__run(self.__db.scan, **kwargs)
+
+    async def update_item(
+        self,
+        keys: Dict,
+        attributes: Optional[Dict] = None,
+        add: Optional[Dict] = None,
+        remove: Optional[List[str]] = None,
+        append: Optional[Dict] = None,
+        before: Optional[Dict] = None,
+        skip_zero_add: bool = False,
+        document_paths: bool = False
+    ):
+        try:
+            return await self.__run(
+                self.__db.update_item, keys, attributes, add, remove, append, before, skip_zero_add, document_paths
+            )
+        finally:
+            self.__forget(keys)
+
+    async def delete_item(self, keys: Dict):
+        try:
+            return await self.__run(self.__db.delete_item, keys)
+        finally:
+            self.__forget(keys)
+
+    async def execute_statement(self, **kwargs):
+        return await self.__run(self.__db.execute_statement, **kwargs)
+
+    async def batch_execute_statements(
+        self,
+        statements: List[Union[str, Tuple[str, List]]],
+        consistent_read: bool = False
+    ) -> List[Dict]:
+        return await self.__run(self.__db.batch_execute_statements, statements, consistent_read)
+
+    async def batch_get_items(
+        self,
+        keys: List[Dict],
+        projection: Optional[List[str]] = None,
+        consistent_read: bool = False
+    ) -> List[Optional[Dict]]:
+        return await self.__run(self.__db.batch_get_items, keys, projection, consistent_read)
+
+    async def batch_add_items(self, entries: List[Dict]) -> List[Dict]:
+        try:
+            return await self.__run(self.__db.batch_add_items, entries)
+        finally:
+            self.__forget(*entries)
+
+    async def batch_delete_items(self, keys: List[Dict]) -> List[Dict]:
+        try:
+            return await self.__run(self.__db.batch_delete_items, keys)
+        finally:
+            self.__forget(*keys)
+
+    async def get_items(self, keys: List[Dict], consistent_read: Optional[bool] = True) -> List[Dict]:
+        """
+        Runs GetItem for every key concurrently
+
+        :param keys: list of dictionaries of primary key and sort key (if any)
+        :param consistent_read: use strongly consistent reads
+        :return: list of items in the same order as keys
+        """
+        return list(await asyncio.gather(*(self.get_item(key, consistent_read) for key in keys)))
+
+    async def add_items(self, entries: List[Dict], keys: Optional[List] = None) -> List[Dict]:
+        """
+        Runs PutItem for every entry concurrently
+
+        :param entries: list of dictionaries of items to be added
+        :param keys: list of primary key and sort key; if None,operation is always overwrite
+        :return: list of results in the same order as entries
+        """
+        return list(await asyncio.gather(*(self.add_item(entry, keys) for entry in entries)))
+
+    async def update_items(self, updates: List[Dict]) -> List[Dict]:
+        """
+        Runs UpdateItem for every update concurrently
+
+        :param updates: list of dictionaries of update_item arguments ('keys', 'attributes', 'add', ...)
+        :return: list of results in the same order as updates
+        """
+        return list(await asyncio.gather(*(self.update_item(**update) for update in updates)))
@@ -0,0 +1,103 @@
+from typing import Dict
+
+from icgphutils.aws.dynamodb.params import RequestParams
+from icgphutils.aws.dynamodb.types import DBTypes
+
+
+class DynamoDBBackend:
+    """
+    Interface of the low-level DynamoDB API used by the DynamoDB class
+
+    A boto3 DynamoDB client satisfies it as is. Implementations take and return ddb-formatted
+    items and raise botocore ClientError with the same error codes as DynamoDB.
+    """
+
+    def describe_table(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def get_item(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def put_item(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def update_item(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def delete_item(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def query(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def scan(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def batch_get_item(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def batch_write_item(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def transact_get_items(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def transact_write_items(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def execute_statement(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+    def batch_execute_statement(self, **kwargs) -> Dict:
+        raise NotImplementedError
+
+
+class TableAdapter:
+    """
+    Table-based API, as used through boto3 resources, on top of any DynamoDBBackend
+
+    Accepts python values and boto3 condition objects and returns Decimal-based items like a boto3 Table.
+    Thread-safe if the backend is.
+    """
+
+    def __init__(self, backend: DynamoDBBackend, table_name: str):
+        self.__backend = backend
+        self.__table_name = table_name
+
+    @property
+    def name(self) -> str:
+        return self.__table_name
+
+    def get_item(self, **kwargs) -> Dict:
+        return self.__to_resource_response(self.__backend.get_item(**self.__to_client_params(kwargs)))
+
+    def put_item(self, **kwargs) -> Dict:
+        return self.__to_resource_response(self.__backend.put_item(**self.__to_client_params(kwargs)))
+
+    def update_item(self, **kwargs) -> Dict:
+        return self.__to_resource_response(self.__backend.update_item(**self.__to_client_params(kwargs)))
+
+    def delete_item(self, **kwargs) -> Dict:
+        return self.__to_resource_response(self.__backend.delete_item(**self.__to_client_params(kwargs)))
+
+    def query(self, **kwargs) -> Dict:
+        return self.__to_resource_response(self.__backend.query(**self.__to_client_params(kwargs)))
+
+    def scan(self, **kwargs) -> Dict:
+        return self.__to_resource_response(self.__backend.scan(**self.__to_client_params(kwargs)))
+
+    def __to_client_params(self, params: Dict) -> Dict:
+        client_params = RequestParams.to_client_params(self.__table_name, params)
+        if 'Item' in params:
+            client_params['Item'] = DBTypes.convert_dict_to_db_item(params['Item'])
+        return client_params
+
+    @staticmethod
+    def __to_resource_response(response: Dict) -> Dict:
+        response = dict(response)
+        for field in ('Item', 'Attributes', 'LastEvaluatedKey'):
+            if field in response:
+                response[field] = DBTypes.convert_db_dict_to_decimal_item(response[field])
+        if 'Items' in response:
+            response['Items'] = [DBTypes.convert_db_dict_to_decimal_item(item) for item in response['Items']]
+        return response
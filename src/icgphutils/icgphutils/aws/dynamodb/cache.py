@@ -0,0 +1,131 @@
+import threading
+
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from icgphutils.aws.dynamodb.types import DBTypes
+from icgphutils.cache import TTLCache
+from icgphutils.constants import Constants
+
+
+class ItemCache:
+    """
+    Read-through cache of ddb-formatted items keyed by (table, serialized key)
+
+    A single instance can be shared by several DynamoDB instances and survives warm invocations
+    when created at module level.
+
+    Invalidations bump a generation counter of the key, shared with the other keys of its stripe. Readers take
+    the generation before fetching and pass it to set, so an item fetched before an invalidation is not cached
+    after it.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = Constants.DYNAMODB_CACHE_TTL,
+        table_ttls: Optional[Dict[str, float]] = None,
+        max_entries: Optional[int] = Constants.DYNAMODB_CACHE_MAX_ENTRIES,
+        max_bytes: Optional[int] = None
+    ):
+        """
+        :param ttl: default time-to-live of items in seconds; if None, items do not expire
+        :param table_ttls: time-to-live per table name, overriding ttl
+        :param max_entries: maximum number of cached items
+        :param max_bytes: maximum estimated size of cached items
+        """
+        self.__ttl = ttl
+        self.__table_ttls = dict(table_ttls or {})
+        self.__cache = TTLCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=DBTypes.estimate_size)
+        self.__key_names = {}
+        self.__epoch = 0
+        self.__generations = [0] * Constants.DYNAMODB_CACHE_GENERATION_STRIPES
+        self.__lock = threading.Lock()
+
+    def get(self, table_name: str, db_key: Dict) -> Optional[Dict]:
+        """
+        Returns a cached item
+
+        :param table_name: name of the table
+        :param db_key: ddb-formatted dict of primary key and sort key (if any)
+        :return: ddb-formatted item; None on a miss
+        """
+        return self.__cache.get((table_name, DBTypes.get_key_signature(db_key)))
+
+    def get_generation(self, table_name: str, db_key: Dict) -> tuple:
+        """
+        Returns the invalidation generation of a key
+
+        :param table_name: name of the table
+        :param db_key: ddb-formatted dict of primary key and sort key (if any)
+        :return: opaque value to pass to set once the item is fetched
+        """
+        # Recorded before the fetch, so that writes made during it can already invalidate the key
+        self.__key_names.setdefault(table_name, tuple(db_key))
+        stripe = self.__get_stripe((table_name, DBTypes.get_key_signature(db_key)))
+        with self.__lock:
+            return self.__epoch, self.__generations[stripe]
+
+    def set(self, table_name: str, db_key: Dict, db_item: Dict, generation: Optional[tuple] = None):
+        """
+        Caches an item
+
+        :param table_name: name of the table
+        :param db_key: ddb-formatted dict of primary key and sort key (if any)
+        :param db_item: ddb-formatted item
+        :param generation: value of get_generation taken before the item was fetched; if the key was invalidated
+            since, the item is not cached
+        """
+        # Key names are needed to invalidate from full items written later
+        self.__key_names.setdefault(table_name, tuple(db_key))
+        cache_key = (table_name, DBTypes.get_key_signature(db_key))
+        stripe = self.__get_stripe(cache_key)
+        with self.__lock:
+            if generation is not None and generation != (self.__epoch, self.__generations[stripe]):
+                return
+            self.__cache.set(cache_key, db_item, ttl=self.__table_ttls.get(table_name, self.__ttl))
+
+    def get_key_names(self, table_name: str) -> Optional[Tuple[str, ...]]:
+        """
+        Returns the key attribute names of a table, once an item of the table has been cached
+
+        :param table_name: name of the table
+        :return: tuple of key attribute names
+        """
+        return self.__key_names.get(table_name)
+
+    def invalidate(self, table_name: str, db_key: Dict):
+        """
+        Drops a cached item
+
+        :param table_name: name of the table
+        :param db_key: ddb-formatted dict of primary key and sort key (if any)
+        """
+        cache_key = (table_name, DBTypes.get_key_signature(db_key))
+        stripe = self.__get_stripe(cache_key)
+        with self.__lock:
+            self.__generations[stripe] += 1
+            self.__cache.pop(cache_key)
+
+    def invalidate_item(self, table_name: str, db_item: Dict):
+        """
+        Drops the cached item with the same key as a full ddb-formatted item
+
+        :param table_name: name of the table
+        :param db_item: ddb-formatted item
+        """
+        key_names = self.__key_names.get(table_name)
+        if key_names is not None and all(name in db_item for name in key_names):
+            self.invalidate(table_name, {name: db_item[name] for name in key_names})
+
+    def clear(self):
+        with self.__lock:
+            self.__epoch += 1
+            self.__cache.clear()
+
+    @property
+    def stats(self) -> Dict:
+        return self.__cache.stats
+
+    def __get_stripe(self, cache_key: tuple) -> int:
+        return hash(cache_key) % len(self.__generations)
@@ -0,0 +1,183 @@
+import math
+
+from decimal import Decimal
+from functools import lru_cache
+
+# Integers with more digits fail DynamoDB's 38-digit precision; TypeSerializer raises for them
+_MAX_INT = 10 ** 38
+
+
+class DBCodec:
+    """
+    Single-pass converters between ddb-formatted and python-formatted data
+
+    Nesting is walked with an explicit stack, so depth is not limited by the recursion limit.
+    """
+
+    @staticmethod
+    def serialize(item: dict) -> dict:
+        """
+        Converts a python dict to its ddb equivalent format; floats are written as N strings at any depth
+        :param item: Data to be converted
+        :return: dict containing ddb-formatted data
+        """
+        db_item = {}
+        pending = [(item, db_item)]
+        while pending:
+            source, target = pending.pop()
+            if type(target) is dict:
+                for k, v in source.items():
+                    target[k] = _to_wire(v, pending)
+            else:
+                for v in source:
+                    target.append(_to_wire(v, pending))
+        return db_item
+
+    @staticmethod
+    def deserialize(db_item: dict) -> dict:
+        """
+        Converts a ddb-formatted dict to its python equivalent; numbers become int or float
+        except inside number sets, which keep Decimal
+        :param db_item: Data to be converted
+        :return: dict containing python-formatted data
+        """
+        item = {}
+        pending = [(db_item, item)]
+        while pending:
+            source, target = pending.pop()
+            if type(target) is dict:
+                for k, v in source.items():
+                    target[k] = _to_native(v, pending)
+            else:
+                for v in source:
+                    target.append(_to_native(v, pending))
+        return item
+
+    @staticmethod
+    def deserialize_decimal(db_item: dict) -> dict:
+        """
+        Converts a ddb-formatted dict to its python equivalent, keeping numbers as Decimal
+        :param db_item: Data to be converted
+        :return: dict containing python-formatted data
+        """
+        deserializer = _get_deserializer()
+        return {k: deserializer.deserialize(v) for k, v in db_item.items()}
+
+    @staticmethod
+    def replace_float(obj):
+        """
+        Converts floats to Decimal using their shortest string form, as json.dumps does;
+        containers are copied only when something inside them changes
+        :param obj: Data to be converted
+        :return: data without floats
+        """
+        return _replace_float(obj)
+
+    @staticmethod
+    def parse_number(value: str):
+        """
+        Parses an N string into int when integral, else float
+        :param value: ddb number string
+        :return: int or float
+        """
+        return _parse_number(value)
+
+
+def _parse_number(value: str):
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    number = float(value)
+    if number.is_integer() or not math.isfinite(number):
+        # Exponent notation, trailing zeros, or beyond float precision
+        number = Decimal(value)
+        if number == number.to_integral_value():
+            return int(number)
+        return float(number)
+    return number
+
+
+def _replace_float(value):
+    value_type = type(value)
+    if value_type is float:
+        # Infinity and NaN are left for the serializer to reject
+        return Decimal(repr(value)) if math.isfinite(value) else value
+    if value_type is str or value_type is int or value_type is bool or value is None:
+        return value
+    if isinstance(value, dict):
+        replaced = None
+        for k, v in value.items():
+            new_value = _replace_float(v)
+            if new_value is not v:
+                if replaced is None:
+                    replaced = dict(value)
+                replaced[k] = new_value
+        return value if replaced is None else replaced
+    if isinstance(value, (list, tuple, set, frozenset)):
+        replaced = None
+        for i, v in enumerate(value):
+            new_value = _replace_float(v)
+            if new_value is not v and replaced is None:
+                replaced = list(value)
+            if replaced is not None:
+                replaced[i] = new_value
+        return value if replaced is None else type(value)(replaced)
+    return value
+
+
+def _to_wire(value, pending: list) -> dict:
+    value_type = type(value)
+    if value_type is str:
+        return {'S': value}
+    if value_type is float:
+        return {'N': str(value)}
+    if value_type is int and -_MAX_INT < value < _MAX_INT:
+        return {'N': str(value)}
+    if value_type is bool:
+        return {'BOOL': value}
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, dict):
+        db_map = {}
+        pending.append((value, db_map))
+        return {'M': db_map}
+    if value_type is list or value_type is tuple:
+        db_list = []
+        pending.append((value, db_list))
+        return {'L': db_list}
+    return _get_serializer().serialize(value)
+
+
+def _to_native(db_value: dict, pending: list):
+    for tag, value in db_value.items():
+        if tag == 'S':
+            return value
+        if tag == 'N':
+            return _parse_number(value)
+        if tag == 'M':
+            item = {}
+            pending.append((value, item))
+            return item
+        if tag == 'L':
+            items = []
+            pending.append((value, items))
+            return items
+        if tag == 'BOOL':
+            return value
+        if tag == 'NULL':
+            return None
+        return _get_deserializer().deserialize(db_value)
+
+
+# boto3 is imported on first use, as importing it dominates cold starts; both are stateless and reused
+@lru_cache(maxsize=None)
+def _get_serializer():
+    from boto3.dynamodb.types import TypeSerializer
+    return TypeSerializer()
+
+
+@lru_cache(maxsize=None)
+def _get_deserializer():
+    from boto3.dynamodb.types import TypeDeserializer
+    return TypeDeserializer()
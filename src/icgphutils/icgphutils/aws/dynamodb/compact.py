@@ -0,0 +1,240 @@
+from array import array
+from functools import lru_cache
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+from icgphutils.aws.dynamodb.codec import DBCodec
+
+
+@lru_cache(maxsize=None)
+def _get_numpy():
+    # Imported on first use, as importing numpy takes longer than the rest of the package
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    return numpy
+
+
+class CompactMode:
+    COLUMNAR = 'columnar'
+    RECORDS = 'records'
+
+
+class ColumnarResult:
+    """
+    Column-oriented container of query or scan results
+
+    Numeric columns are parsed straight from N strings into typed arrays: int64 while every value
+    is an integer, float64 once a float or missing value is seen (missing values become NaN).
+    Other columns are kept as lists. Columns are returned as NumPy arrays when NumPy is installed;
+    these share memory with the result, so all pages must be added before columns are read.
+    """
+
+    # Column kinds in promotion order
+    KIND_INT = 'q'
+    KIND_FLOAT = 'd'
+    KIND_OBJECT = 'o'
+
+    def __init__(self, attributes: Iterable[str]):
+        self.__kinds = {name: None for name in attributes}
+        self.__columns = {name: [] for name in self.__kinds}
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    @property
+    def attributes(self) -> List[str]:
+        return list(self.__columns)
+
+    def add_page(self, db_items: List[Dict]):
+        """
+        Appends a page of ddb-formatted items
+
+        :param db_items: ddb-formatted items
+        """
+        for name in self.__columns:
+            values = [_to_value(db_item.get(name)) for db_item in db_items]
+            self.__extend(name, values)
+        self.__count += len(db_items)
+
+    def column(self, name: str):
+        """
+        Returns a column
+
+        :param name: attribute name
+        :return: NumPy array, typed array or list
+        """
+        column = self.__columns[name]
+        numpy = _get_numpy()
+        if numpy is not None and isinstance(column, array):
+            return numpy.frombuffer(column, dtype=numpy.int64 if column.typecode == 'q' else numpy.float64)
+        return column
+
+    def sum(self, name: str):
+        """
+        Returns the sum of a numeric column, ignoring missing values
+
+        :param name: attribute name
+        :return: int or float
+        """
+        column = self.column(name)
+        numpy = _get_numpy()
+        if numpy is not None and not isinstance(column, list):
+            return numpy.nansum(column).item()
+        return sum(value for value in column if value is not None and value == value)
+
+    def sum_by(self, key: str, value: str) -> Dict:
+        """
+        Returns the sum of a numeric column per distinct value of another column, ignoring missing values
+
+        :param key: attribute name to group by
+        :param value: attribute name to sum
+        :return: dictionary of group value to sum
+        """
+        keys = self.column(key)
+        values = self.column(value)
+        numpy = _get_numpy()
+        if numpy is not None and not isinstance(values, list):
+            codes = {}
+            inverse = numpy.fromiter(
+                (codes.setdefault(group, len(codes)) for group in keys), dtype=numpy.int64, count=len(keys)
+            )
+            sums = numpy.bincount(inverse, weights=numpy.nan_to_num(values), minlength=len(codes))
+            if values.dtype == numpy.int64:
+                sums = sums.astype(numpy.int64)
+            return dict(zip(codes, sums.tolist()))
+
+        totals = {}
+        for group, number in zip(keys, values):
+            if number is not None and number == number:
+                totals[group] = totals.get(group, 0) + number
+        return totals
+
+    def to_records(self) -> List:
+        """
+        Returns the rows as __slots__-based records
+
+        :return: list of records
+        """
+        record_class = RecordFactory.get_record_class(tuple(self.__columns))
+        columns = [self.column(name) for name in self.__columns]
+        if _get_numpy() is not None:
+            columns = [column.tolist() if not isinstance(column, list) else column for column in columns]
+        return [record_class(*row) for row in zip(*columns)]
+
+    def __extend(self, name: str, values: List):
+        kind = self.__kinds[name]
+        page_kind = ColumnarResult.__get_kind(values)
+        kind = page_kind if kind is None else max(kind, page_kind, key=ColumnarResult.__rank)
+        column = self.__columns[name]
+
+        if kind == ColumnarResult.KIND_OBJECT:
+            if isinstance(column, array):
+                column = column.tolist()
+            column.extend(values)
+        else:
+            if kind == ColumnarResult.KIND_FLOAT:
+                values = [float('nan') if v is None else v for v in values]
+            if not isinstance(column, array) or column.typecode != kind:
+                column = array(kind, column)
+            size = len(column)
+            try:
+                column.extend(values)
+            except OverflowError:
+                # Integers beyond int64; the values appended before the overflow are dropped
+                kind = ColumnarResult.KIND_OBJECT
+                column = column[:size].tolist() + values
+        self.__kinds[name] = kind
+        self.__columns[name] = column
+
+    @staticmethod
+    def __rank(kind: str) -> int:
+        return (ColumnarResult.KIND_INT, ColumnarResult.KIND_FLOAT, ColumnarResult.KIND_OBJECT).index(kind)
+
+    @staticmethod
+    def __get_kind(values: List) -> str:
+        kind = ColumnarResult.KIND_INT
+        for value in values:
+            value_type = type(value)
+            if value_type is int:
+                continue
+            if value_type is float or value is None:
+                kind = ColumnarResult.KIND_FLOAT
+            else:
+                return ColumnarResult.KIND_OBJECT
+        return kind
+
+
+class RecordFactory:
+    """
+    Creates __slots__-based record classes from projection lists
+    """
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_record_class(attributes: Tuple[str, ...]):
+        """
+        Returns the record class of a projection; classes are cached per attribute tuple
+
+        :param attributes: attribute names, which must be valid identifiers
+        :return: record class
+        """
+        for name in attributes:
+            if not name.isidentifier():
+                raise ValueError(f'Attribute {name} is not a valid record field name')
+
+        def __init__(self, *values):
+            for name, value in zip(attributes, values):
+                setattr(self, name, value)
+
+        def __iter__(self):
+            return (getattr(self, name) for name in attributes)
+
+        def __eq__(self, other):
+            return type(self) is type(other) and tuple(self) == tuple(other)
+
+        def __repr__(self):
+            fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in attributes)
+            return f'Record({fields})'
+
+        def to_dict(self):
+            return {name: getattr(self, name) for name in attributes}
+
+        return type('Record', (), {
+            '__slots__': attributes,
+            '_fields': attributes,
+            '__init__': __init__,
+            '__iter__': __iter__,
+            '__eq__': __eq__,
+            '__hash__': None,
+            '__repr__': __repr__,
+            'to_dict': to_dict
+        })
+
+    @staticmethod
+    def from_db_items(attributes: Tuple[str, ...], db_items: List[Dict]) -> List:
+        """
+        Builds records from ddb-formatted items without creating intermediate dicts
+
+        :param attributes: attribute names
+        :param db_items: ddb-formatted items
+        :return: list of records
+        """
+        record_class = RecordFactory.get_record_class(tuple(attributes))
+        return [record_class(*[_to_value(db_item.get(name)) for name in attributes]) for db_item in db_items]
+
+
+def _to_value(db_value):
+    if db_value is None:
+        return None
+    number = db_value.get('N')
+    if number is not None:
+        return DBCodec.parse_number(number)
+    text = db_value.get('S')
+    if text is not None:
+        return text
+    return DBCodec.deserialize({'value': db_value})['value']
@@ -0,0 +1,184 @@
+import random
+import threading
+import zlib
+
+from botocore.exceptions import ClientError
+from decimal import Decimal
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Union
+
+from icgphutils.aws.dynamodb.transaction import TransactionBuilder
+from icgphutils.aws.dynamodb.types import DBTypes
+from icgphutils.cache import TTLCache
+from icgphutils.constants import Constants
+from icgphutils.log import Logger
+
+
+class ShardedCounter:
+    """
+    Atomic counter spread over several shard items so that its write throughput is not bound by a single partition
+
+    Shard i of counter name is stored under the key '<name>#<i>'. Increments ADD to one shard, chosen at random
+    or by hashing a caller-supplied shard key; the total is the sum of all shards.
+    """
+
+    def __init__(
+        self,
+        db,
+        table_name: str,
+        name: str,
+        shards: int = Constants.DYNAMODB_COUNTER_SHARDS,
+        key_attribute: str = 'pk',
+        sort_key: Optional[Dict] = None,
+        value_attribute: str = 'count',
+        cache_ttl: Optional[float] = None
+    ):
+        """
+        :param db: DynamoDB instance the shards are read and written with
+        :param table_name: name of the table
+        :param name: name of the counter
+        :param shards: number of shard items
+        :param key_attribute: partition key attribute of the table
+        :param sort_key: sort key attribute and value shared by all shards, if the table has a sort key
+        :param value_attribute: attribute holding the value of a shard
+        :param cache_ttl: time-to-live in seconds of totals returned by approximate reads; if None, approximate
+            reads always read the shards
+        """
+        if shards < 1:
+            raise ValueError('A counter needs at least one shard')
+
+        self.__db = db
+        self.__table_name = table_name
+        self.__name = name
+        self.__shards = shards
+        self.__key_attribute = key_attribute
+        self.__sort_key = dict(sort_key or {})
+        self.__value_attribute = value_attribute
+        self.__cache_ttl = cache_ttl
+        self.__cache = TTLCache(max_entries=1, ttl=cache_ttl)
+        self.__unread = 0
+        self.__lock = threading.Lock()
+        self.__logger = Logger.get_logger()
+
+    @property
+    def shards(self) -> int:
+        return self.__shards
+
+    def increment(self, amount: Union[int, float, Decimal] = 1, shard_key: Optional[str] = None) -> int:
+        """
+        Adds to the counter
+
+        :param amount: number added; may be negative
+        :param shard_key: key hashed to pick the shard, e.g. an account id; if None, a random shard is used
+        :return: shard that was written
+        """
+        if shard_key is None:
+            shard = random.randrange(self.__shards)
+        else:
+            shard = zlib.crc32(shard_key.encode()) % self.__shards
+        self.__db.update_item_custom(**ShardedCounter.__build_add(
+            self.__table_name, self.__get_shard_key(shard), self.__value_attribute, amount
+        ))
+        with self.__lock:
+            self.__unread += amount
+        return shard
+
+    def total(self, consistent_read: bool = False, approximate: bool = False) -> Union[int, float]:
+        """
+        Returns the value of the counter
+
+        :param consistent_read: use strongly consistent reads
+        :param approximate: return the last total read within cache_ttl, plus increments made through this
+            instance since, instead of reading the shards
+        :return: sum of all shards
+        """
+        if approximate:
+            found, total, _ = self.__cache.lookup('total')
+            if found:
+                with self.__lock:
+                    return total + self.__unread
+        with self.__lock:
+            unread = self.__unread
+        values = self.get_shard_values(consistent_read)
+        total = sum(values)
+        with self.__lock:
+            self.__unread -= unread
+        if self.__cache_ttl is not None:
+            self.__cache.set('total', total)
+        return total
+
+    def get_shard_values(self, consistent_read: bool = False) -> List[Union[int, float]]:
+        """
+        Reads all shards with parallel BatchGetItem calls
+
+        :param consistent_read: use strongly consistent reads
+        :return: list of shard values; 0 for shards that were never written
+        """
+        items = self.__db.batch_get_items(
+            [self.__get_shard_key(shard) for shard in range(self.__shards)],
+            projection=[self.__value_attribute],
+            consistent_read=consistent_read
+        )
+        return [item.get(self.__value_attribute, 0) if item is not None else 0 for item in items]
+
+    def reshard(self, shards: int, max_attempts: int = Constants.DYNAMODB_MAX_RETRIES):
+        """
+        Changes the number of shards
+
+        Growing only starts using the new shards. Shrinking folds the value of each removed shard into a
+        remaining one with a transaction that deletes the removed shard only if it did not change meanwhile.
+        Other writers must be configured with the new number of shards; increments they make to removed
+        shards afterwards are not counted.
+
+        :param shards: new number of shards
+        :param max_attempts: attempts per removed shard when concurrent increments cancel the transaction
+        """
+        if shards < 1:
+            raise ValueError('A counter needs at least one shard')
+
+        removed = range(shards, self.__shards)
+        self.__shards = shards
+        for shard in removed:
+            for attempt in range(max_attempts):
+                try:
+                    self.__fold_shard(shard, shard % shards)
+                    break
+                except ClientError as e:
+                    if e.response.get('Error').get('Code') != 'TransactionCanceledException' \
+                            or attempt + 1 == max_attempts:
+                        raise
+                    self.__logger.warning(f'Folding shard {shard} of {self.__name} was cancelled, retrying')
+        self.__cache.clear()
+
+    def __fold_shard(self, shard: int, target: int):
+        keys = self.__get_shard_key(shard)
+        item = self.__db.get_item(keys, consistent_read=True)
+        if item is None:
+            return
+        value = item.get(self.__value_attribute, 0)
+        transaction = TransactionBuilder(self.__db, self.__table_name, atomic=True)
+        transaction.add_operation({'Update': ShardedCounter.__build_add(
+            self.__table_name, self.__get_shard_key(target), self.__value_attribute, value
+        )})
+        transaction.delete(
+            keys,
+            condition_expression='#v = :v',
+            expression_attribute_names={'#v': self.__value_attribute},
+            expression_attribute_values={':v': value}
+        )
+        transaction.commit()
+
+    def __get_shard_key(self, shard: int) -> Dict:
+        return dict(self.__sort_key, **{self.__key_attribute: f'{self.__name}#{shard}'})
+
+    @staticmethod
+    def __build_add(table_name: str, keys: Dict, value_attribute: str, amount) -> Dict:
+        return {
+            'TableName': table_name,
+            'Key': DBTypes.convert_dict_to_db_item(DBTypes.replace_float(keys)),
+            'UpdateExpression': 'ADD #v :v',
+            'ExpressionAttributeNames': {'#v': value_attribute},
+            'ExpressionAttributeValues': DBTypes.convert_dict_to_db_item({':v': DBTypes.replace_float(amount)})
+        }
@@ -0,0 +1,650 @@
+import re
+
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from icgphutils.constants import Constants
+
+
+_TOKEN = re.compile(
+    r'\s*(?:(#[A-Za-z0-9_]+)|(:[A-Za-z0-9_]+)|([A-Za-z_][A-Za-z0-9_]*)|(\d+)|(<>|<=|>=|[=<>(),.\[\]+\-]))'
+)
+_KINDS = ('name', 'value', 'name', 'number', 'op')
+_COMPARATORS = ('=', '<>', '<', '<=', '>', '>=')
+_FUNCTIONS = ('attribute_exists', 'attribute_not_exists', 'attribute_type', 'begins_with', 'contains')
+_UPDATE_CLAUSES = ('SET', 'REMOVE', 'ADD', 'DELETE')
+_ORDERED_TYPES = ('N', 'S', 'B')
+_SET_TYPES = ('SS', 'NS', 'BS')
+
+
+class ExpressionEvaluator:
+    """
+    Evaluates DynamoDB condition, key condition, filter, update and projection expressions
+    against ddb-formatted items
+
+    Expressions are parsed once and cached; placeholders are resolved on every evaluation.
+    Invalid expressions raise ValueError.
+    """
+
+    @staticmethod
+    def evaluate_condition(
+        expression: str,
+        db_item: Dict,
+        names: Optional[Dict] = None,
+        values: Optional[Dict] = None
+    ) -> bool:
+        """
+        Evaluates a condition, key condition or filter expression
+
+        :param expression: expression string
+        :param db_item: ddb-formatted item; an empty dict for items that do not exist
+        :param names: ExpressionAttributeNames
+        :param values: ddb-formatted ExpressionAttributeValues
+        :return: bool
+        """
+        return _evaluate(ExpressionEvaluator.parse_condition(expression), db_item, names or {}, values or {})
+
+    @staticmethod
+    def apply_update(
+        expression: str,
+        db_item: Dict,
+        names: Optional[Dict] = None,
+        values: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Applies an update expression
+
+        :param expression: expression string
+        :param db_item: ddb-formatted item; not modified
+        :param names: ExpressionAttributeNames
+        :param values: ddb-formatted ExpressionAttributeValues
+        :return: updated copy of the item
+        """
+        actions = ExpressionEvaluator.parse_update(expression)
+        names = names or {}
+        values = values or {}
+
+        # Right-hand sides see the item as it was before the update
+        assignments = [(path, _evaluate_set_value(value, db_item, names, values)) for path, value in actions['SET']]
+        updated = _copy(db_item)
+        for path, value in assignments:
+            _set(updated, path, value, names)
+        # List elements are removed from the highest index down so earlier removals do not shift later ones
+        removals = sorted(actions['REMOVE'], key=lambda path: path[1][-1] if isinstance(path[1][-1], int) else -1)
+        for path in reversed(removals):
+            _remove(updated, path, names)
+        for path, value in actions['ADD']:
+            _add(updated, path, _operand(value, db_item, names, values), names)
+        for path, value in actions['DELETE']:
+            _delete(updated, path, _operand(value, db_item, names, values), names)
+        return updated
+
+    @staticmethod
+    def project(expression: Optional[str], db_item: Dict, names: Optional[Dict] = None) -> Dict:
+        """
+        Applies a projection expression
+
+        :param expression: expression string; if None, all attributes are kept
+        :param db_item: ddb-formatted item; not modified
+        :param names: ExpressionAttributeNames
+        :return: projected copy of the item
+        """
+        if expression is None:
+            return _copy(db_item)
+        names = names or {}
+        projected = {}
+        for path in ExpressionEvaluator.parse_projection(expression):
+            value = _get(db_item, path, names)
+            if value is not None:
+                _insert(projected, path[1], value, names)
+        return projected
+
+    @staticmethod
+    def get_key_value(
+        expression: str,
+        key_name: str,
+        names: Optional[Dict] = None,
+        values: Optional[Dict] = None
+    ) -> Optional[Dict]:
+        """
+        Returns the value a key condition requires the given attribute to be equal to
+
+        :param expression: key condition expression string
+        :param key_name: name of the partition key
+        :param names: ExpressionAttributeNames
+        :param values: ddb-formatted ExpressionAttributeValues
+        :return: ddb-formatted value; None if the expression has no equality on the attribute
+        """
+        pending = [ExpressionEvaluator.parse_condition(expression)]
+        names = names or {}
+        while pending:
+            node = pending.pop()
+            if node[0] == 'and':
+                pending.extend(node[1:])
+            elif node[0] == 'cmp' and node[1] == '=':
+                for path, value in ((node[2], node[3]), (node[3], node[2])):
+                    if path[0] == 'path' and value[0] == 'value' and len(path[1]) == 1:
+                        if _resolve_name(path[1][0], names) == key_name:
+                            return _operand(value, {}, names, values or {})
+        return None
+
+    @staticmethod
+    @lru_cache(maxsize=Constants.DYNAMODB_EXPRESSION_CACHE_SIZE)
+    def parse_condition(expression: str) -> tuple:
+        parser = _Parser(expression)
+        node = parser.condition()
+        parser.expect_end()
+        return node
+
+    @staticmethod
+    @lru_cache(maxsize=Constants.DYNAMODB_EXPRESSION_CACHE_SIZE)
+    def parse_update(expression: str) -> Dict[str, List]:
+        parser = _Parser(expression)
+        actions = parser.update()
+        parser.expect_end()
+        return actions
+
+    @staticmethod
+    @lru_cache(maxsize=Constants.DYNAMODB_EXPRESSION_CACHE_SIZE)
+    def parse_projection(expression: str) -> tuple:
+        parser = _Parser(expression)
+        paths = [parser.path()]
+        while parser.accept('op', ','):
+            paths.append(parser.path())
+        parser.expect_end()
+        return tuple(paths)
+
+    @staticmethod
+    def normalize(db_value: Dict):
+        """
+        Returns a hashable python value that compares equal for equal ddb-formatted values
+
+        :param db_value: ddb-formatted value
+        :return: tuple of type tag and value
+        """
+        (tag, value), = db_value.items()
+        if tag == 'N':
+            return tag, Decimal(value)
+        if tag == 'B':
+            return tag, bytes(getattr(value, 'value', value))
+        if tag == 'NS':
+            return tag, frozenset(Decimal(v) for v in value)
+        if tag == 'BS':
+            return tag, frozenset(bytes(getattr(v, 'value', v)) for v in value)
+        if tag == 'SS':
+            return tag, frozenset(value)
+        if tag == 'L':
+            return tag, tuple(ExpressionEvaluator.normalize(v) for v in value)
+        if tag == 'M':
+            return tag, tuple(sorted((k, ExpressionEvaluator.normalize(v)) for k, v in value.items()))
+        return tag, value
+
+    @staticmethod
+    def copy(db_value: Dict) -> Dict:
+        """
+        Returns a deep copy of a ddb-formatted item or value
+
+        :param db_value: ddb-formatted item or value
+        :return: copy sharing only immutable leaves
+        """
+        return _copy(db_value)
+
+    @staticmethod
+    def format_number(value: Decimal) -> str:
+        """
+        Formats a number the way DynamoDB returns it
+
+        :param value: Decimal
+        :return: string without exponent or trailing zeros
+        """
+        text = format(value.normalize(), 'f')
+        return '0' if text in ('-0', '') else text
+
+
+class _Parser:
+
+    def __init__(self, expression: str):
+        self.__tokens = []
+        position = 0
+        expression = expression.rstrip()
+        while position < len(expression):
+            match = _TOKEN.match(expression, position)
+            if match is None or match.end() == position:
+                raise ValueError(f'Invalid expression: syntax error near "{expression[position:position + 20]}"')
+            index = match.lastindex
+            self.__tokens.append((_KINDS[index - 1], match.group(index)))
+            position = match.end()
+        self.__position = 0
+
+    def peek(self, offset: int = 0):
+        position = self.__position + offset
+        return self.__tokens[position] if position < len(self.__tokens) else (None, None)
+
+    def next(self):
+        token = self.peek()
+        if token[0] is None:
+            raise ValueError('Invalid expression: unexpected end of expression')
+        self.__position += 1
+        return token
+
+    def accept(self, kind: str, text: str) -> bool:
+        if self.peek() == (kind, text):
+            self.__position += 1
+            return True
+        return False
+
+    def accept_keyword(self, keyword: str) -> bool:
+        kind, text = self.peek()
+        if kind == 'name' and not text.startswith('#') and text.upper() == keyword:
+            self.__position += 1
+            return True
+        return False
+
+    def expect(self, kind: str, text: str):
+        if not self.accept(kind, text):
+            raise ValueError(f'Invalid expression: expected "{text}", found "{self.peek()[1]}"')
+
+    def expect_end(self):
+        if self.peek()[0] is not None:
+            raise ValueError(f'Invalid expression: unexpected token "{self.peek()[1]}"')
+
+    def is_call(self, functions) -> bool:
+        kind, text = self.peek()
+        return kind == 'name' and text.lower() in functions and self.peek(1) == ('op', '(')
+
+    def path(self) -> tuple:
+        kind, text = self.next()
+        if kind != 'name':
+            raise ValueError(f'Invalid expression: expected attribute name, found "{text}"')
+        elements = [text]
+        while True:
+            if self.accept('op', '.'):
+                kind, text = self.next()
+                if kind != 'name':
+                    raise ValueError(f'Invalid expression: expected attribute name, found "{text}"')
+                elements.append(text)
+            elif self.accept('op', '['):
+                kind, text = self.next()
+                if kind != 'number':
+                    raise ValueError(f'Invalid expression: expected list index, found "{text}"')
+                elements.append(int(text))
+                self.expect('op', ']')
+            else:
+                return 'path', tuple(elements)
+
+    def operand(self) -> tuple:
+        kind, text = self.peek()
+        if kind == 'value':
+            self.next()
+            return 'value', text
+        if self.is_call(('size',)):
+            self.next()
+            self.next()
+            path = self.path()
+            self.expect('op', ')')
+            return 'size', path
+        return self.path()
+
+    def condition(self) -> tuple:
+        node = self.conjunction()
+        while self.accept_keyword('OR'):
+            node = ('or', node, self.conjunction())
+        return node
+
+    def conjunction(self) -> tuple:
+        node = self.negation()
+        while self.accept_keyword('AND'):
+            node = ('and', node, self.negation())
+        return node
+
+    def negation(self) -> tuple:
+        if self.accept_keyword('NOT'):
+            return 'not', self.negation()
+        return self.comparison()
+
+    def comparison(self) -> tuple:
+        if self.accept('op', '('):
+            node = self.condition()
+            self.expect('op', ')')
+            return node
+        if self.is_call(_FUNCTIONS):
+            function = self.next()[1].lower()
+            self.next()
+            args = [self.operand()]
+            while self.accept('op', ','):
+                args.append(self.operand())
+            self.expect('op', ')')
+            return 'func', function, tuple(args)
+
+        left = self.operand()
+        kind, text = self.peek()
+        if kind == 'op' and text in _COMPARATORS:
+            self.next()
+            return 'cmp', text, left, self.operand()
+        if self.accept_keyword('BETWEEN'):
+            low = self.operand()
+            if not self.accept_keyword('AND'):
+                raise ValueError('Invalid expression: expected AND in BETWEEN')
+            return 'between', left, low, self.operand()
+        if self.accept_keyword('IN'):
+            self.expect('op', '(')
+            candidates = [self.operand()]
+            while self.accept('op', ','):
+                candidates.append(self.operand())
+            self.expect('op', ')')
+            return 'in', left, tuple(candidates)
+        raise ValueError(f'Invalid expression: expected comparison, found "{text}"')
+
+    def update(self) -> Dict[str, List]:
+        actions = {clause: [] for clause in _UPDATE_CLAUSES}
+        while self.peek()[0] is not None:
+            kind, text = self.next()
+            clause = text.upper() if kind == 'name' else None
+            if clause not in actions:
+                raise ValueError(f'Invalid expression: expected SET, REMOVE, ADD or DELETE, found "{text}"')
+            while True:
+                if clause == 'SET':
+                    path = self.path()
+                    self.expect('op', '=')
+                    actions[clause].append((path, self.set_value()))
+                elif clause == 'REMOVE':
+                    actions[clause].append(self.path())
+                else:
+                    path = self.path()
+                    kind, text = self.next()
+                    if kind != 'value':
+                        raise ValueError(f'Invalid expression: expected value placeholder, found "{text}"')
+                    actions[clause].append((path, ('value', text)))
+                if not self.accept('op', ','):
+                    break
+        return actions
+
+    def set_value(self) -> tuple:
+        node = self.set_operand()
+        kind, text = self.peek()
+        if kind == 'op' and text in ('+', '-'):
+            self.next()
+            return 'arith', text, node, self.set_operand()
+        return node
+
+    def set_operand(self) -> tuple:
+        if self.is_call(('if_not_exists', 'list_append')):
+            function = self.next()[1].lower()
+            self.next()
+            first = self.path() if function == 'if_not_exists' else self.set_value()
+            self.expect('op', ',')
+            second = self.set_value()
+            self.expect('op', ')')
+            return function, first, second
+        return self.operand()
+
+
+def _resolve_name(element, names: Dict):
+    if isinstance(element, str) and element.startswith('#'):
+        if element not in names:
+            raise ValueError(f'Invalid expression: undefined expression attribute name {element}')
+        return names[element]
+    return element
+
+
+def _get(db_item: Dict, path: tuple, names: Dict) -> Optional[Dict]:
+    current = {'M': db_item}
+    for element in path[1]:
+        if isinstance(element, int):
+            values = current.get('L')
+            if values is None or element >= len(values):
+                return None
+            current = values[element]
+        else:
+            values = current.get('M')
+            if values is None:
+                return None
+            current = values.get(_resolve_name(element, names))
+            if current is None:
+                return None
+    return current
+
+
+def _operand(node: tuple, db_item: Dict, names: Dict, values: Dict) -> Optional[Dict]:
+    if node[0] == 'value':
+        if node[1] not in values:
+            raise ValueError(f'Invalid expression: undefined expression attribute value {node[1]}')
+        return values[node[1]]
+    if node[0] == 'size':
+        value = _get(db_item, node[1], names)
+        size = _size(value) if value is not None else None
+        return {'N': str(size)} if size is not None else None
+    return _get(db_item, node, names)
+
+
+def _size(db_value: Dict) -> Optional[int]:
+    (tag, value), = db_value.items()
+    if tag == 'S':
+        return len(value)
+    if tag == 'B':
+        return len(getattr(value, 'value', value))
+    if tag in _SET_TYPES or tag in ('L', 'M'):
+        return len(value)
+    return None
+
+
+def _compare(operator: str, left: Optional[Dict], right: Optional[Dict]) -> bool:
+    if left is None or right is None:
+        return operator == '<>' and (left is not None or right is not None)
+    left = ExpressionEvaluator.normalize(left)
+    right = ExpressionEvaluator.normalize(right)
+    if operator == '=':
+        return left == right
+    if operator == '<>':
+        return left != right
+    if left[0] != right[0] or left[0] not in _ORDERED_TYPES:
+        return False
+    if operator == '<':
+        return left[1] < right[1]
+    if operator == '<=':
+        return left[1] <= right[1]
+    if operator == '>':
+        return left[1] > right[1]
+    return left[1] >= right[1]
+
+
+def _evaluate(node: tuple, db_item: Dict, names: Dict, values: Dict) -> bool:
+    kind = node[0]
+    if kind == 'and':
+        return _evaluate(node[1], db_item, names, values) and _evaluate(node[2], db_item, names, values)
+    if kind == 'or':
+        return _evaluate(node[1], db_item, names, values) or _evaluate(node[2], db_item, names, values)
+    if kind == 'not':
+        return not _evaluate(node[1], db_item, names, values)
+    if kind == 'cmp':
+        return _compare(node[1], _operand(node[2], db_item, names, values), _operand(node[3], db_item, names, values))
+    if kind == 'between':
+        value = _operand(node[1], db_item, names, values)
+        return (
+            _compare('>=', value, _operand(node[2], db_item, names, values))
+            and _compare('<=', value, _operand(node[3], db_item, names, values))
+        )
+    if kind == 'in':
+        value = _operand(node[1], db_item, names, values)
+        return any(_compare('=', value, _operand(candidate, db_item, names, values)) for candidate in node[2])
+    if kind == 'func':
+        return _call(node[1], [_operand(arg, db_item, names, values) for arg in node[2]])
+    raise ValueError(f'Invalid expression: {kind} is not a condition')
+
+
+def _call(function: str, args: List[Optional[Dict]]) -> bool:
+    value = args[0]
+    if function == 'attribute_exists':
+        return value is not None
+    if function == 'attribute_not_exists':
+        return value is None
+    if value is None or args[1] is None:
+        return False
+    if function == 'attribute_type':
+        return next(iter(value)) == args[1].get('S')
+
+    (tag, content), = value.items()
+    (other_tag, other), = args[1].items()
+    if function == 'begins_with':
+        return tag == other_tag and tag in ('S', 'B') and content.startswith(other)
+    # contains
+    if tag == 'S':
+        return other_tag == 'S' and other in content
+    if tag in _SET_TYPES:
+        element = ExpressionEvaluator.normalize({tag[0]: other})[1] if other_tag == tag[0] else None
+        return element is not None and element in ExpressionEvaluator.normalize(value)[1]
+    if tag == 'L':
+        return any(_compare('=', element, args[1]) for element in content)
+    return False
+
+
+def _evaluate_set_value(node: tuple, db_item: Dict, names: Dict, values: Dict) -> Dict:
+    kind = node[0]
+    if kind == 'arith':
+        left = _evaluate_set_value(node[2], db_item, names, values)
+        right = _evaluate_set_value(node[3], db_item, names, values)
+        if 'N' not in left or 'N' not in right:
+            raise ValueError(f'Invalid UpdateExpression: Incorrect operand type for operator: {node[1]}')
+        if node[1] == '+':
+            result = Decimal(left['N']) + Decimal(right['N'])
+        else:
+            result = Decimal(left['N']) - Decimal(right['N'])
+        return {'N': ExpressionEvaluator.format_number(result)}
+    if kind == 'if_not_exists':
+        existing = _get(db_item, node[1], names)
+        return existing if existing is not None else _evaluate_set_value(node[2], db_item, names, values)
+    if kind == 'list_append':
+        first = _evaluate_set_value(node[1], db_item, names, values)
+        second = _evaluate_set_value(node[2], db_item, names, values)
+        if 'L' not in first or 'L' not in second:
+            raise ValueError('Invalid UpdateExpression: Incorrect operand type for function: list_append')
+        return {'L': first['L'] + second['L']}
+    value = _operand(node, db_item, names, values)
+    if value is None:
+        raise ValueError('The provided expression refers to an attribute that does not exist in the item')
+    return value
+
+
+def _parent(db_item: Dict, path: tuple, names: Dict) -> Optional[Dict]:
+    parent = db_item
+    container = None
+    for element in path[1][:-1]:
+        if isinstance(element, int):
+            values = container.get('L') if container is not None else None
+            if values is None or element >= len(values):
+                return None
+            container = values[element]
+        else:
+            values = container.get('M') if container is not None else parent
+            if values is None:
+                return None
+            container = values.get(_resolve_name(element, names))
+            if container is None:
+                return None
+    return container if container is not None else {'M': parent}
+
+
+def _set(db_item: Dict, path: tuple, value: Dict, names: Dict):
+    parent = _parent(db_item, path, names)
+    last = path[1][-1]
+    if isinstance(last, int) and parent is not None and 'L' in parent:
+        values = parent['L']
+        if last >= len(values):
+            values.append(value)
+        else:
+            values[last] = value
+    elif not isinstance(last, int) and parent is not None and 'M' in parent:
+        parent['M'][_resolve_name(last, names)] = value
+    else:
+        raise ValueError('The document path provided in the update expression is invalid for update')
+
+
+def _remove(db_item: Dict, path: tuple, names: Dict):
+    parent = _parent(db_item, path, names)
+    last = path[1][-1]
+    if parent is None:
+        return
+    if isinstance(last, int):
+        if last < len(parent.get('L', ())):
+            del parent['L'][last]
+    elif 'M' in parent:
+        parent['M'].pop(_resolve_name(last, names), None)
+
+
+def _add(db_item: Dict, path: tuple, value: Dict, names: Dict):
+    existing = _get(db_item, path, names)
+    (tag, content), = value.items()
+    if existing is None:
+        _set(db_item, path, value, names)
+    elif tag == 'N' and 'N' in existing:
+        _set(db_item, path, {'N': ExpressionEvaluator.format_number(Decimal(existing['N']) + Decimal(content))}, names)
+    elif tag in _SET_TYPES and tag in existing:
+        _set(db_item, path, {tag: _merge_set(tag, existing[tag], content)}, names)
+    else:
+        raise ValueError('Invalid UpdateExpression: Incorrect operand type for operator: ADD')
+
+
+def _delete(db_item: Dict, path: tuple, value: Dict, names: Dict):
+    existing = _get(db_item, path, names)
+    (tag, content), = value.items()
+    if tag not in _SET_TYPES:
+        raise ValueError('Invalid UpdateExpression: Incorrect operand type for operator: DELETE')
+    if existing is None:
+        return
+    if tag not in existing:
+        raise ValueError('Invalid UpdateExpression: Incorrect operand type for operator: DELETE')
+    removed = ExpressionEvaluator.normalize(value)[1]
+    remaining = [
+        element for element in existing[tag]
+        if ExpressionEvaluator.normalize({tag: [element]})[1] - removed
+    ]
+    if remaining:
+        _set(db_item, path, {tag: remaining}, names)
+    else:
+        _remove(db_item, path, names)
+
+
+def _merge_set(tag: str, existing: List, added: List) -> List:
+    seen = ExpressionEvaluator.normalize({tag: existing})[1]
+    merged = list(existing)
+    for element in added:
+        key = ExpressionEvaluator.normalize({tag: [element]})[1]
+        if not key <= seen:
+            merged.append(element)
+            seen = seen | key
+    return merged
+
+
+def _insert(projected: Dict, elements: tuple, value: Dict, names: Dict):
+    container = {'M': projected}
+    for position, element in enumerate(elements):
+        is_last = position == len(elements) - 1
+        if isinstance(element, int):
+            values = container.setdefault('L', [])
+            if is_last:
+                values.append(value)
+                return
+            # Projected list elements are compacted in the order they are requested
+            child = {'M': {}} if not isinstance(elements[position + 1], int) else {'L': []}
+            values.append(child)
+            container = child
+        else:
+            values = container.setdefault('M', {})
+            name = _resolve_name(element, names)
+            if is_last:
+                values[name] = value
+                return
+            if name not in values:
+                values[name] = {'M': {}} if not isinstance(elements[position + 1], int) else {'L': []}
+            container = values[name]
+
+
+def _copy(value):
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    return value
@@ -0,0 +1,200 @@
+import re
+
+from collections import namedtuple
+from functools import lru_cache
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+from icgphutils.aws.dynamodb.types import DBTypes
+from icgphutils.constants import Constants
+
+_SEGMENT = re.compile(r'([^\[\]]+)((?:\[\d+\])*)')
+_INDEX = re.compile(r'\[(\d+)\]')
+_MISSING = object()
+
+UpdateTemplate = namedtuple('UpdateTemplate', ['update_expression', 'condition_expression', 'names', 'values'])
+
+
+class UpdateExpressionBuilder:
+    """
+    Builds UpdateItem expressions from compiled templates cached per shape of the update
+
+    Names are top-level attribute names, so 'a.b' is the attribute named 'a.b'. With document_paths=True
+    they are document paths instead, e.g. 'balance.available' or 'history[0].amount'.
+    """
+
+    @staticmethod
+    def build(
+        keys: Dict,
+        attributes: Optional[Dict] = None,
+        add: Optional[Dict] = None,
+        remove: Optional[Iterable[str]] = None,
+        append: Optional[Dict] = None,
+        before: Optional[Dict] = None,
+        skip_zero_add: bool = False,
+        document_paths: bool = False
+    ) -> Optional[Dict]:
+        """
+        Builds the expression parameters of an update of an existing item
+
+        :param keys: dictionary of primary key and sort key (if any)
+        :param attributes: paths and values to SET
+        :param add: paths and numbers or sets to ADD
+        :param remove: paths to REMOVE
+        :param append: paths and lists to append to list attributes, created if missing
+        :param before: current item; when given, only changes against it are sent
+        :param skip_zero_add: leave out ADD deltas of 0; by default they are sent, as ADD 0 creates a missing
+            numeric attribute
+        :param document_paths: read the names of attributes, add, remove and append as document paths
+        :return: UpdateExpression, ConditionExpression, ExpressionAttributeNames and python-formatted
+            ExpressionAttributeValues, the last two only when not empty; None if there is nothing to update
+        """
+        attributes = dict(attributes or {})
+        add = dict(add or {})
+        remove = list(remove or [])
+        append = dict(append or {})
+
+        if before is not None:
+            get_value = UpdateExpressionBuilder.get_path if document_paths else UpdateExpressionBuilder.__get_attribute
+            attributes = {
+                path: value for path, value in attributes.items()
+                if UpdateExpressionBuilder.__differs(get_value(before, path), value)
+            }
+            remove = [path for path in remove if get_value(before, path) is not _MISSING]
+        # DynamoDB rejects empty sets
+        add = {
+            path: value for path, value in add.items()
+            if value != set() and not (skip_zero_add and value == 0)
+        }
+        append = {path: value for path, value in append.items() if value}
+
+        if not (attributes or add or remove or append):
+            return None
+
+        template = UpdateExpressionBuilder.compile(
+            tuple(keys), tuple(attributes), tuple(add), tuple(remove), tuple(append), document_paths
+        )
+        values = list(attributes.values()) + list(append.values()) + list(add.values())
+        expression_attribute_values = dict(zip(template.values, values))
+        if append:
+            expression_attribute_values[':empty'] = []
+        # DynamoDB rejects empty expression maps, e.g. the values of a REMOVE-only update
+        params = {'UpdateExpression': template.update_expression}
+        if template.condition_expression:
+            params['ConditionExpression'] = template.condition_expression
+        if template.names:
+            params['ExpressionAttributeNames'] = dict(template.names)
+        if expression_attribute_values:
+            params['ExpressionAttributeValues'] = expression_attribute_values
+        return params
+
+    @staticmethod
+    @lru_cache(maxsize=Constants.DYNAMODB_EXPRESSION_CACHE_SIZE)
+    def compile(
+        key_names: Tuple[str, ...],
+        set_paths: Tuple[str, ...],
+        add_paths: Tuple[str, ...],
+        remove_paths: Tuple[str, ...],
+        append_paths: Tuple[str, ...],
+        document_paths: bool = False
+    ) -> UpdateTemplate:
+        """
+        Compiles the expressions of an update shape
+
+        :param key_names: primary key and sort key (if any) names
+        :param set_paths: paths to SET
+        :param add_paths: paths to ADD
+        :param remove_paths: paths to REMOVE
+        :param append_paths: paths to append lists to
+        :param document_paths: split paths into document path segments; key names are never split
+        :return: UpdateTemplate with the value placeholders in SET, append, ADD order
+        """
+        names = {}
+
+        def placeholder(path: str, is_document_path: bool = document_paths) -> str:
+            parts = []
+            segments = UpdateExpressionBuilder.split_path(path) if is_document_path else ((path, ()),)
+            for name, indexes in segments:
+                if name not in names:
+                    names[name] = f'#n{len(names)}'
+                parts.append(names[name] + ''.join(f'[{index}]' for index in indexes))
+            return '.'.join(parts)
+
+        values = []
+
+        def value_placeholder() -> str:
+            values.append(f':v{len(values)}')
+            return values[-1]
+
+        set_clauses = [f'{placeholder(path)}={value_placeholder()}' for path in set_paths]
+        for path in append_paths:
+            target = placeholder(path)
+            set_clauses.append(f'{target}=list_append(if_not_exists({target},:empty),{value_placeholder()})')
+        add_clauses = [f'{placeholder(path)} {value_placeholder()}' for path in add_paths]
+        remove_clauses = [placeholder(path) for path in remove_paths]
+
+        sections = []
+        if set_clauses:
+            sections.append('SET ' + ','.join(set_clauses))
+        if add_clauses:
+            sections.append('ADD ' + ','.join(add_clauses))
+        if remove_clauses:
+            sections.append('REMOVE ' + ','.join(remove_clauses))
+
+        condition = ' AND '.join(f'attribute_exists({placeholder(key, False)})' for key in key_names)
+        return UpdateTemplate(
+            ' '.join(sections),
+            condition,
+            tuple((alias, name) for name, alias in names.items()),
+            tuple(values)
+        )
+
+    @staticmethod
+    @lru_cache(maxsize=Constants.DYNAMODB_EXPRESSION_CACHE_SIZE)
+    def split_path(path: str) -> Tuple[Tuple[str, Tuple[int, ...]], ...]:
+        """
+        Splits a document path into attribute names and list indexes
+
+        :param path: document path, e.g. 'orders[0].status'
+        :return: tuple of (name, indexes) per segment
+        """
+        segments = []
+        for segment in path.split('.'):
+            match = _SEGMENT.fullmatch(segment)
+            if match is None:
+                raise ValueError(f'Invalid attribute path: {path}')
+            segments.append((match.group(1), tuple(int(index) for index in _INDEX.findall(match.group(2)))))
+        return tuple(segments)
+
+    @staticmethod
+    def get_path(item: Dict, path: str):
+        """
+        Returns the value at a document path of an item
+
+        :param item: python-formatted item
+        :param path: document path
+        :return: value; a sentinel object if the path does not exist
+        """
+        value = item
+        for name, indexes in UpdateExpressionBuilder.split_path(path):
+            if not isinstance(value, dict) or name not in value:
+                return _MISSING
+            value = value[name]
+            for index in indexes:
+                if not isinstance(value, list) or index >= len(value):
+                    return _MISSING
+                value = value[index]
+        return value
+
+    @staticmethod
+    def __get_attribute(item: Dict, name: str):
+        return item.get(name, _MISSING)
+
+    @staticmethod
+    def __differs(current, value) -> bool:
+        if current is _MISSING:
+            return True
+        # Numbers may be Decimal on one side and float on the other
+        return DBTypes.replace_float(current) != DBTypes.replace_float(value)
@@ -0,0 +1,725 @@
+import bisect
+import math
+import random
+import threading
+import time
+import zlib
+
+from botocore.exceptions import ClientError
+from decimal import Decimal
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from icgphutils.aws.dynamodb.backend import DynamoDBBackend
+from icgphutils.aws.dynamodb.evaluator import ExpressionEvaluator
+from icgphutils.aws.dynamodb.types import DBTypes
+from icgphutils.constants import Constants
+
+
+class InMemoryBackend(DynamoDBBackend):
+    """
+    Thread-safe in-memory stand-in for DynamoDB, for load tests and offline benchmarks
+
+    Supports hash and hash/range keys, secondary indexes (projecting all attributes), condition,
+    filter, update and projection expressions, Query, Scan with Segment/TotalSegments, pagination
+    with Limit, LastEvaluatedKey and the 1 MB page size, batch and transactional reads and writes
+    and ReturnConsumedCapacity. PartiQL is not supported.
+
+    Latency, throttling and unprocessed batch items can be injected; with a seed, the sequence of
+    injected faults is reproducible.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        throttle_rate: float = 0.0,
+        unprocessed_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        :param latency: seconds added to every call
+        :param jitter: maximum random seconds added to latency
+        :param throttle_rate: probability of a call failing with ProvisionedThroughputExceededException
+        :param unprocessed_rate: probability of an item of a batch call being returned as unprocessed
+        :param seed: seed of the random generator used for jitter, throttling and unprocessed items
+        """
+        self.__latency = latency
+        self.__jitter = jitter
+        self.__throttle_rate = throttle_rate
+        self.__unprocessed_rate = unprocessed_rate
+        self.__random = random.Random(seed)
+        self.__random_lock = threading.Lock()
+        self.__tables = {}
+        self.__lock = threading.RLock()
+
+        self.calls = 0
+        self.throttled = 0
+
+    def create_table(self, **kwargs) -> Dict:
+        with self.__lock:
+            if kwargs['TableName'] in self.__tables:
+                raise _error('ResourceInUseException', f'Table already exists: {kwargs["TableName"]}', 'CreateTable')
+            table = _MemoryTable(kwargs)
+            self.__tables[table.name] = table
+            return {'TableDescription': table.describe()}
+
+    def delete_table(self, **kwargs) -> Dict:
+        with self.__lock:
+            table = self.__get_table(kwargs['TableName'], 'DeleteTable')
+            del self.__tables[table.name]
+            return {'TableDescription': table.describe()}
+
+    def describe_table(self, **kwargs) -> Dict:
+        # Control plane calls are not subject to injected latency and throttling
+        with self.__lock:
+            return {'Table': self.__get_table(kwargs['TableName'], 'DescribeTable').describe()}
+
+    def get_item(self, **kwargs) -> Dict:
+        return self.__run('GetItem', self.__get_item, kwargs)
+
+    def put_item(self, **kwargs) -> Dict:
+        return self.__run('PutItem', self.__put_item, kwargs)
+
+    def update_item(self, **kwargs) -> Dict:
+        return self.__run('UpdateItem', self.__update_item, kwargs)
+
+    def delete_item(self, **kwargs) -> Dict:
+        return self.__run('DeleteItem', self.__delete_item, kwargs)
+
+    def query(self, **kwargs) -> Dict:
+        return self.__run('Query', self.__query, kwargs)
+
+    def scan(self, **kwargs) -> Dict:
+        return self.__run('Scan', self.__scan, kwargs)
+
+    def batch_get_item(self, **kwargs) -> Dict:
+        return self.__run('BatchGetItem', self.__batch_get_item, kwargs)
+
+    def batch_write_item(self, **kwargs) -> Dict:
+        return self.__run('BatchWriteItem', self.__batch_write_item, kwargs)
+
+    def transact_get_items(self, **kwargs) -> Dict:
+        return self.__run('TransactGetItems', self.__transact_get_items, kwargs)
+
+    def transact_write_items(self, **kwargs) -> Dict:
+        return self.__run('TransactWriteItems', self.__transact_write_items, kwargs)
+
+    def __run(self, operation: str, func: Callable[[Dict], Dict], params: Dict) -> Dict:
+        with self.__random_lock:
+            self.calls += 1
+            delay = self.__latency + (self.__random.uniform(0, self.__jitter) if self.__jitter else 0)
+            throttled = bool(self.__throttle_rate) and self.__random.random() < self.__throttle_rate
+            if throttled:
+                self.throttled += 1
+        # Sleeping outside the lock lets concurrent calls overlap like network calls do
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            raise _error(
+                'ProvisionedThroughputExceededException',
+                'The level of configured provisioned throughput for the table was exceeded.',
+                operation
+            )
+        try:
+            with self.__lock:
+                return func(params)
+        except (KeyError, ValueError) as e:
+            raise _error('ValidationException', str(e), operation)
+
+    def __get_table(self, table_name: str, operation: str) -> '_MemoryTable':
+        table = self.__tables.get(table_name)
+        if table is None:
+            raise _error('ResourceNotFoundException', f'Requested resource not found: Table: {table_name}', operation)
+        return table
+
+    def __get_item(self, params: Dict) -> Dict:
+        table = self.__get_table(params['TableName'], 'GetItem')
+        db_item = table.get(params['Key'])
+        response = {}
+        size = 0
+        if db_item is not None:
+            response['Item'] = ExpressionEvaluator.project(
+                params.get('ProjectionExpression'), db_item, params.get('ExpressionAttributeNames')
+            )
+            size = DBTypes.estimate_size(db_item)
+        _add_capacity(response, params, table.name, read_units=_read_units(size, params.get('ConsistentRead', False)))
+        return response
+
+    def __put_item(self, params: Dict) -> Dict:
+        table = self.__get_table(params['TableName'], 'PutItem')
+        db_item = ExpressionEvaluator.copy(params['Item'])
+        existing = table.get(table.key_of(db_item))
+        if not _passes(params, existing):
+            raise _error('ConditionalCheckFailedException', 'The conditional request failed', 'PutItem')
+        table.put(db_item)
+
+        response = {}
+        if params.get('ReturnValues') == 'ALL_OLD' and existing is not None:
+            response['Attributes'] = ExpressionEvaluator.copy(existing)
+        _add_capacity(response, params, table.name, write_units=_write_units(db_item, existing))
+        return response
+
+    def __update_item(self, params: Dict) -> Dict:
+        table = self.__get_table(params['TableName'], 'UpdateItem')
+        existing = table.get(params['Key'])
+        if not _passes(params, existing):
+            raise _error('ConditionalCheckFailedException', 'The conditional request failed', 'UpdateItem')
+        updated = table.update(params, existing)
+        table.put(updated)
+
+        response = {}
+        attributes = _get_return_values(params.get('ReturnValues', 'NONE'), existing, updated)
+        if attributes is not None:
+            response['Attributes'] = attributes
+        _add_capacity(response, params, table.name, write_units=_write_units(updated, existing))
+        return response
+
+    def __delete_item(self, params: Dict) -> Dict:
+        table = self.__get_table(params['TableName'], 'DeleteItem')
+        existing = table.get(params['Key'])
+        if not _passes(params, existing):
+            raise _error('ConditionalCheckFailedException', 'The conditional request failed', 'DeleteItem')
+
+        response = {}
+        if existing is not None:
+            table.delete(params['Key'])
+            if params.get('ReturnValues') == 'ALL_OLD':
+                response['Attributes'] = existing
+        _add_capacity(response, params, table.name, write_units=_write_units(existing, None))
+        return response
+
+    def __query(self, params: Dict) -> Dict:
+        table = self.__get_table(params['TableName'], 'Query')
+        index_name = params.get('IndexName')
+        hash_key, _ = table.get_schema(index_name)
+        key_condition = params.get('KeyConditionExpression')
+        if key_condition is None:
+            raise ValueError('Either the KeyConditions or KeyConditionExpression parameter must be specified')
+        names = params.get('ExpressionAttributeNames')
+        values = params.get('ExpressionAttributeValues')
+        hash_value = ExpressionEvaluator.get_key_value(key_condition, hash_key, names, values)
+        if hash_value is None:
+            raise ValueError(f'Query condition missed key schema element: {hash_key}')
+
+        candidates = table.iter_query(
+            index_name, hash_value, params.get('ScanIndexForward', True), params.get('ExclusiveStartKey')
+        )
+        matching = (
+            db_item for db_item in candidates
+            if ExpressionEvaluator.evaluate_condition(key_condition, db_item, names, values)
+        )
+        return _read_page(table, matching, params)
+
+    def __scan(self, params: Dict) -> Dict:
+        table = self.__get_table(params['TableName'], 'Scan')
+        segment = params.get('Segment', 0)
+        total_segments = params.get('TotalSegments', 1)
+        if not 0 <= segment < total_segments:
+            raise ValueError('The Segment parameter must be less than the TotalSegments parameter')
+        candidates = table.iter_scan(params.get('IndexName'), segment, total_segments, params.get('ExclusiveStartKey'))
+        return _read_page(table, candidates, params)
+
+    def __batch_get_item(self, params: Dict) -> Dict:
+        request_items = params['RequestItems']
+        if sum(len(request['Keys']) for request in request_items.values()) > Constants.DYNAMODB_BATCH_GET_SIZE:
+            raise ValueError('Too many items requested for the BatchGetItem call')
+
+        responses = {}
+        unprocessed = {}
+        capacities = []
+        for table_name, request in request_items.items():
+            table = self.__get_table(table_name, 'BatchGetItem')
+            db_items = responses[table_name] = []
+            skipped = []
+            size = 0
+            for db_key in request['Keys']:
+                if self.__is_unprocessed():
+                    skipped.append(db_key)
+                    continue
+                db_item = table.get(db_key)
+                if db_item is not None:
+                    db_items.append(ExpressionEvaluator.project(
+                        request.get('ProjectionExpression'), db_item, request.get('ExpressionAttributeNames')
+                    ))
+                    size += DBTypes.estimate_size(db_item)
+            if skipped:
+                unprocessed[table_name] = dict(request, Keys=skipped)
+            capacities.append(_get_capacity(
+                params, table_name, read_units=_read_units(size, request.get('ConsistentRead', False))
+            ))
+
+        response = {'Responses': responses, 'UnprocessedKeys': unprocessed}
+        _add_capacities(response, capacities)
+        return response
+
+    def __batch_write_item(self, params: Dict) -> Dict:
+        request_items = params['RequestItems']
+        if sum(len(requests) for requests in request_items.values()) > Constants.DYNAMODB_BATCH_WRITE_SIZE:
+            raise ValueError('Too many items requested for the BatchWriteItem call')
+
+        unprocessed = {}
+        capacities = []
+        for table_name, requests in request_items.items():
+            table = self.__get_table(table_name, 'BatchWriteItem')
+            signatures = set()
+            for request in requests:
+                write = request.get('PutRequest') or request['DeleteRequest']
+                signature = DBTypes.get_key_signature(write['Key'] if 'Key' in write else table.key_of(write['Item']))
+                if signature in signatures:
+                    raise ValueError('Provided list of item keys contains duplicates')
+                signatures.add(signature)
+
+            write_units = 0
+            for request in requests:
+                if self.__is_unprocessed():
+                    unprocessed.setdefault(table_name, []).append(request)
+                elif 'PutRequest' in request:
+                    db_item = ExpressionEvaluator.copy(request['PutRequest']['Item'])
+                    write_units += _write_units(db_item, table.put(db_item))
+                else:
+                    write_units += _write_units(table.delete(request['DeleteRequest']['Key']), None)
+            capacities.append(_get_capacity(params, table_name, write_units=write_units))
+
+        response = {'UnprocessedItems': unprocessed}
+        _add_capacities(response, capacities)
+        return response
+
+    def __transact_get_items(self, params: Dict) -> Dict:
+        transact_items = params['TransactItems']
+        if len(transact_items) > Constants.DYNAMODB_TRANSACT_WRITE_SIZE:
+            raise ValueError('Member must have length less than or equal to 100')
+
+        responses = []
+        read_units = {}
+        for transact_item in transact_items:
+            request = transact_item['Get']
+            table = self.__get_table(request['TableName'], 'TransactGetItems')
+            db_item = table.get(request['Key'])
+            size = 0
+            if db_item is None:
+                responses.append({})
+            else:
+                responses.append({'Item': ExpressionEvaluator.project(
+                    request.get('ProjectionExpression'), db_item, request.get('ExpressionAttributeNames')
+                )})
+                size = DBTypes.estimate_size(db_item)
+            read_units[table.name] = read_units.get(table.name, 0) + 2 * _read_units(size, True)
+
+        response = {'Responses': responses}
+        _add_capacities(response, [
+            _get_capacity(params, table_name, read_units=units) for table_name, units in read_units.items()
+        ])
+        return response
+
+    def __transact_write_items(self, params: Dict) -> Dict:
+        transact_items = params['TransactItems']
+        if len(transact_items) > Constants.DYNAMODB_TRANSACT_WRITE_SIZE:
+            raise ValueError('Member must have length less than or equal to 100')
+
+        # Every operation is checked against the current state before any of them is applied
+        plan = []
+        reasons = []
+        signatures = set()
+        for transact_item in transact_items:
+            (action, request), = transact_item.items()
+            table = self.__get_table(request['TableName'], 'TransactWriteItems')
+            db_key = table.key_of(request['Item']) if action == 'Put' else request['Key']
+            signature = (table.name, DBTypes.get_key_signature(db_key))
+            if signature in signatures:
+                raise ValueError('Transaction request cannot include multiple operations on one item')
+            signatures.add(signature)
+
+            existing = table.get(db_key)
+            if not _passes(request, existing):
+                reasons.append({'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed'})
+                continue
+            reasons.append({'Code': 'None'})
+            if action == 'Put':
+                plan.append((table, db_key, ExpressionEvaluator.copy(request['Item']), existing))
+            elif action == 'Update':
+                plan.append((table, db_key, table.update(request, existing), existing))
+            elif action == 'Delete':
+                plan.append((table, db_key, None, existing))
+
+        if any(reason['Code'] != 'None' for reason in reasons):
+            codes = ', '.join(reason['Code'] for reason in reasons)
+            raise _error(
+                'TransactionCanceledException',
+                f'Transaction cancelled, please refer cancellation reasons for specific reasons [{codes}]',
+                'TransactWriteItems',
+                CancellationReasons=reasons
+            )
+
+        write_units = {}
+        for table, db_key, db_item, existing in plan:
+            if db_item is None:
+                table.delete(db_key)
+            else:
+                table.put(db_item)
+            write_units[table.name] = write_units.get(table.name, 0) + 2 * _write_units(db_item, existing)
+
+        response = {}
+        _add_capacities(response, [
+            _get_capacity(params, table_name, write_units=units) for table_name, units in write_units.items()
+        ])
+        return response
+
+    def __is_unprocessed(self) -> bool:
+        if not self.__unprocessed_rate:
+            return False
+        with self.__random_lock:
+            return self.__random.random() < self.__unprocessed_rate
+
+
+class _Partition:
+
+    __slots__ = ('token', 'keys', 'items')
+
+    def __init__(self, token: int):
+        self.token = token
+        self.keys = []
+        self.items = {}
+
+
+class _MemoryTable:
+    """
+    Items of a table grouped by partition; partitions are ordered by a hash of their key for scans
+    and items by range key within a partition
+    """
+
+    def __init__(self, definition: Dict):
+        self.name = definition['TableName']
+        self.definition = definition
+        self.hash_key, self.range_key = _parse_key_schema(definition['KeySchema'])
+        self.indexes = {}
+        for index in definition.get('GlobalSecondaryIndexes', []) + definition.get('LocalSecondaryIndexes', []):
+            self.indexes[index['IndexName']] = _parse_key_schema(index['KeySchema'])
+        self.partitions = {}
+        self.order = []
+        self.count = 0
+
+    def describe(self) -> Dict:
+        description = {
+            'TableName': self.name,
+            'TableStatus': 'ACTIVE',
+            'KeySchema': self.definition['KeySchema'],
+            'AttributeDefinitions': self.definition.get('AttributeDefinitions', []),
+            'ItemCount': self.count,
+            'ProvisionedThroughput': self.definition.get('ProvisionedThroughput', {
+                'ReadCapacityUnits': 0,
+                'WriteCapacityUnits': 0
+            })
+        }
+        for field in ('GlobalSecondaryIndexes', 'LocalSecondaryIndexes', 'BillingMode'):
+            if field in self.definition:
+                description[field] = self.definition[field]
+        return description
+
+    def get_schema(self, index_name: Optional[str]) -> Tuple[str, Optional[str]]:
+        if index_name is None:
+            return self.hash_key, self.range_key
+        if index_name not in self.indexes:
+            raise ValueError(f'The table does not have the specified index: {index_name}')
+        return self.indexes[index_name]
+
+    def key_of(self, db_item: Dict) -> Dict:
+        names = (self.hash_key, self.range_key) if self.range_key is not None else (self.hash_key,)
+        for name in names:
+            if name not in db_item:
+                raise ValueError(f'One or more parameter values were invalid: Missing the key {name} in the item')
+        return {name: db_item[name] for name in names}
+
+    def locate(self, db_key: Dict) -> tuple:
+        names = {self.hash_key, self.range_key} if self.range_key is not None else {self.hash_key}
+        if set(db_key) != names:
+            raise ValueError('The provided key element does not match the schema')
+        range_value = _key_value(db_key[self.range_key]) if self.range_key is not None else 0
+        return _key_value(db_key[self.hash_key]), range_value
+
+    def get(self, db_key: Dict) -> Optional[Dict]:
+        hash_value, range_value = self.locate(db_key)
+        partition = self.partitions.get(hash_value)
+        return partition.items.get(range_value) if partition is not None else None
+
+    def put(self, db_item: Dict) -> Optional[Dict]:
+        db_key = self.key_of(db_item)
+        hash_value, range_value = self.locate(db_key)
+        partition = self.partitions.get(hash_value)
+        if partition is None:
+            partition = self.partitions[hash_value] = _Partition(_token(db_key[self.hash_key]))
+            bisect.insort(self.order, (partition.token, hash_value))
+        existing = partition.items.get(range_value)
+        if existing is None:
+            bisect.insort(partition.keys, range_value)
+            self.count += 1
+        partition.items[range_value] = db_item
+        return existing
+
+    def delete(self, db_key: Dict) -> Optional[Dict]:
+        hash_value, range_value = self.locate(db_key)
+        partition = self.partitions.get(hash_value)
+        if partition is None or range_value not in partition.items:
+            return None
+        existing = partition.items.pop(range_value)
+        del partition.keys[bisect.bisect_left(partition.keys, range_value)]
+        self.count -= 1
+        if not partition.items:
+            del self.partitions[hash_value]
+            del self.order[bisect.bisect_left(self.order, (partition.token, hash_value))]
+        return existing
+
+    def update(self, params: Dict, existing: Optional[Dict]) -> Dict:
+        db_key = params['Key']
+        self.locate(db_key)
+        db_item = existing if existing is not None else db_key
+        if 'UpdateExpression' not in params:
+            return ExpressionEvaluator.copy(db_item)
+        updated = ExpressionEvaluator.apply_update(
+            params['UpdateExpression'],
+            db_item,
+            params.get('ExpressionAttributeNames'),
+            params.get('ExpressionAttributeValues')
+        )
+        for name, value in db_key.items():
+            normalized = ExpressionEvaluator.normalize(updated[name]) if name in updated else None
+            if normalized != ExpressionEvaluator.normalize(value):
+                raise ValueError(f'Cannot update attribute {name}. This attribute is part of the key')
+        return updated
+
+    def get_position_key(self, db_item: Dict, index_name: Optional[str]) -> Dict:
+        db_key = self.key_of(db_item)
+        if index_name is not None:
+            for name in self.indexes[index_name]:
+                if name is not None:
+                    db_key[name] = db_item[name]
+        return db_key
+
+    def iter_scan(
+        self,
+        index_name: Optional[str],
+        segment: int,
+        total_segments: int,
+        start_key: Optional[Dict]
+    ) -> Iterator[Dict]:
+        index_keys = [name for name in self.get_schema(index_name) if name is not None]
+        high = (segment + 1) * 2 ** 32 // total_segments
+        if start_key is not None:
+            hash_value, start_range = self.locate(self.key_of(start_key))
+            position = bisect.bisect_left(self.order, (_token(start_key[self.hash_key]), hash_value))
+        else:
+            hash_value = start_range = None
+            position = bisect.bisect_left(self.order, (segment * 2 ** 32 // total_segments,))
+
+        while position < len(self.order):
+            token, partition_value = self.order[position]
+            if token >= high:
+                return
+            partition = self.partitions[partition_value]
+            start = bisect.bisect_right(partition.keys, start_range) if partition_value == hash_value else 0
+            for range_value in partition.keys[start:]:
+                db_item = partition.items[range_value]
+                if all(name in db_item for name in index_keys):
+                    yield db_item
+            position += 1
+
+    def iter_query(
+        self,
+        index_name: Optional[str],
+        hash_value: Dict,
+        forward: bool,
+        start_key: Optional[Dict]
+    ) -> Iterator[Dict]:
+        if index_name is not None:
+            yield from self.__iter_index_query(index_name, hash_value, forward, start_key)
+            return
+
+        partition = self.partitions.get(_key_value(hash_value))
+        if partition is None:
+            return
+        keys = partition.keys
+        if start_key is not None:
+            _, start_range = self.locate(self.key_of(start_key))
+            position = bisect.bisect_right(keys, start_range) if forward else bisect.bisect_left(keys, start_range) - 1
+        else:
+            position = 0 if forward else len(keys) - 1
+        step = 1 if forward else -1
+        while 0 <= position < len(keys):
+            yield partition.items[keys[position]]
+            position += step
+
+    def __iter_index_query(
+        self,
+        index_name: str,
+        hash_value: Dict,
+        forward: bool,
+        start_key: Optional[Dict]
+    ) -> Iterator[Dict]:
+        # Indexes are not materialized; matching items are collected from the whole table
+        hash_key, range_key = self.indexes[index_name]
+        target = ExpressionEvaluator.normalize(hash_value)
+        entries = []
+        for token, partition_value in self.order:
+            partition = self.partitions[partition_value]
+            for range_value in partition.keys:
+                db_item = partition.items[range_value]
+                value = db_item.get(hash_key)
+                if value is None or (range_key is not None and range_key not in db_item):
+                    continue
+                if ExpressionEvaluator.normalize(value) == target:
+                    entries.append((self.__get_index_order(db_item, range_key, token), db_item))
+        entries.sort(key=lambda entry: entry[0], reverse=not forward)
+
+        start = None
+        if start_key is not None:
+            start = self.__get_index_order(start_key, range_key, _token(start_key[self.hash_key]))
+        for order, db_item in entries:
+            if start is None or (order > start if forward else order < start):
+                yield db_item
+
+    def __get_index_order(self, db_item: Dict, range_key: Optional[str], token: int) -> tuple:
+        hash_value, range_value = self.locate(self.key_of(db_item))
+        index_range = _key_value(db_item[range_key]) if range_key is not None else 0
+        return index_range, token, hash_value, range_value
+
+
+def _error(code: str, message: str, operation: str, **extra) -> ClientError:
+    response = {'Error': {'Code': code, 'Message': message}, 'ResponseMetadata': {'HTTPStatusCode': 400}}
+    response.update(extra)
+    return ClientError(response, operation)
+
+
+def _parse_key_schema(key_schema: List[Dict]) -> Tuple[str, Optional[str]]:
+    hash_key = None
+    range_key = None
+    for element in key_schema:
+        if element['KeyType'] == 'HASH':
+            hash_key = element['AttributeName']
+        else:
+            range_key = element['AttributeName']
+    return hash_key, range_key
+
+
+def _key_value(db_value: Dict):
+    (tag, value), = db_value.items()
+    if tag == 'N':
+        return Decimal(value)
+    if tag == 'B':
+        return bytes(getattr(value, 'value', value))
+    if tag == 'S':
+        return value
+    raise ValueError(f'Invalid attribute value type {tag} for a key attribute')
+
+
+def _token(db_value: Dict) -> int:
+    value = _key_value(db_value)
+    if isinstance(value, Decimal):
+        value = ExpressionEvaluator.format_number(value)
+    if isinstance(value, str):
+        value = value.encode()
+    return zlib.crc32(value)
+
+
+def _passes(params: Dict, existing: Optional[Dict]) -> bool:
+    expression = params.get('ConditionExpression')
+    if expression is None:
+        return True
+    return ExpressionEvaluator.evaluate_condition(
+        expression,
+        existing or {},
+        params.get('ExpressionAttributeNames'),
+        params.get('ExpressionAttributeValues')
+    )
+
+
+def _get_return_values(return_values: str, existing: Optional[Dict], updated: Dict) -> Optional[Dict]:
+    if return_values == 'ALL_NEW':
+        return ExpressionEvaluator.copy(updated)
+    if return_values == 'ALL_OLD':
+        return ExpressionEvaluator.copy(existing) if existing is not None else None
+    if return_values not in ('UPDATED_NEW', 'UPDATED_OLD'):
+        return None
+    existing = existing or {}
+    changed = [
+        name for name in set(existing) | set(updated)
+        if name not in existing or name not in updated
+        or ExpressionEvaluator.normalize(existing[name]) != ExpressionEvaluator.normalize(updated[name])
+    ]
+    source = updated if return_values == 'UPDATED_NEW' else existing
+    return {name: ExpressionEvaluator.copy(source[name]) for name in changed if name in source}
+
+
+def _read_page(table: _MemoryTable, candidates: Iterator[Dict], params: Dict) -> Dict:
+    limit = params.get('Limit')
+    filter_expression = params.get('FilterExpression')
+    projection = params.get('ProjectionExpression')
+    names = params.get('ExpressionAttributeNames')
+    values = params.get('ExpressionAttributeValues')
+
+    db_items = []
+    scanned = 0
+    size = 0
+    last = None
+    for db_item in candidates:
+        scanned += 1
+        size += DBTypes.estimate_size(db_item)
+        matches = filter_expression is None or ExpressionEvaluator.evaluate_condition(
+            filter_expression, db_item, names, values
+        )
+        if matches:
+            db_items.append(ExpressionEvaluator.project(projection, db_item, names))
+        if (limit is not None and scanned >= limit) or size >= Constants.DYNAMODB_PAGE_BYTES:
+            last = db_item
+            break
+
+    response = {'Count': len(db_items), 'ScannedCount': scanned}
+    if params.get('Select') != 'COUNT':
+        response['Items'] = db_items
+    if last is not None:
+        response['LastEvaluatedKey'] = table.get_position_key(last, params.get('IndexName'))
+    _add_capacity(response, params, table.name, read_units=_read_units(size, params.get('ConsistentRead', False)))
+    return response
+
+
+def _read_units(size: int, consistent_read: bool) -> float:
+    units = max(1, math.ceil(size / 4096))
+    return units if consistent_read else units / 2
+
+
+def _write_units(db_item: Optional[Dict], existing: Optional[Dict]) -> float:
+    size = max(
+        DBTypes.estimate_size(db_item) if db_item is not None else 0,
+        DBTypes.estimate_size(existing) if existing is not None else 0
+    )
+    return max(1, math.ceil(size / 1024))
+
+
+def _get_capacity(params: Dict, table_name: str, read_units: float = 0.0, write_units: float = 0.0) -> Optional[Dict]:
+    mode = params.get('ReturnConsumedCapacity', 'NONE')
+    if mode not in ('TOTAL', 'INDEXES'):
+        return None
+    capacity = {'TableName': table_name, 'CapacityUnits': read_units + write_units}
+    if read_units:
+        capacity['ReadCapacityUnits'] = read_units
+    if write_units:
+        capacity['WriteCapacityUnits'] = write_units
+    if mode == 'INDEXES':
+        capacity['Table'] = dict(capacity)
+        del capacity['Table']['TableName']
+    return capacity
+
+
+def _add_capacity(response: Dict, params: Dict, table_name: str, read_units: float = 0.0, write_units: float = 0.0):
+    capacity = _get_capacity(params, table_name, read_units, write_units)
+    if capacity is not None:
+        response['ConsumedCapacity'] = capacity
+
+
+def _add_capacities(response: Dict, capacities: List[Optional[Dict]]):
+    capacities = [capacity for capacity in capacities if capacity is not None]
+    if capacities:
+        response['ConsumedCapacity'] = capacities
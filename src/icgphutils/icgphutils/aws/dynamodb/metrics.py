@@ -0,0 +1,252 @@
+import logging
+import math
+import threading
+
+from collections import deque
+from collections import namedtuple
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from icgphutils.constants import Constants
+from icgphutils.log import FormatMessage
+from icgphutils.log import Logger
+
+
+CallMetrics = namedtuple('CallMetrics', [
+    'operation',
+    'table',
+    'index',
+    'read_units',
+    'write_units',
+    'items',
+    'response_bytes',
+    'latency',
+    'error'
+])
+
+
+class InMemoryAggregator:
+    """
+    Thread-safe sink aggregating calls per operation, table and index, with latency percentiles
+    over the most recent calls
+    """
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, max_samples: int = Constants.DYNAMODB_METRICS_MAX_SAMPLES):
+        """
+        :param max_samples: number of latencies kept per operation, table and index
+        """
+        self.__max_samples = max_samples
+        self.__groups = {}
+        self.__lock = threading.Lock()
+
+    def __call__(self, call: CallMetrics):
+        key = (call.operation, call.table, call.index)
+        with self.__lock:
+            group = self.__groups.get(key)
+            if group is None:
+                group = self.__groups[key] = {
+                    'calls': 0,
+                    'errors': 0,
+                    'read_units': 0.0,
+                    'write_units': 0.0,
+                    'items': 0,
+                    'response_bytes': 0,
+                    'latency': 0.0,
+                    'samples': deque(maxlen=self.__max_samples)
+                }
+            group['calls'] += 1
+            if call.error is not None:
+                group['errors'] += 1
+            group['read_units'] += call.read_units
+            group['write_units'] += call.write_units
+            group['items'] += call.items
+            group['response_bytes'] += call.response_bytes
+            group['latency'] += call.latency
+            group['samples'].append(call.latency)
+
+    def snapshot(self) -> List[Dict]:
+        """
+        Returns the aggregates, most expensive first
+
+        :return: list of dictionaries with totals and latency percentiles in seconds
+        """
+        with self.__lock:
+            groups = [(key, dict(group, samples=sorted(group['samples']))) for key, group in self.__groups.items()]
+
+        result = []
+        for (operation, table, index), group in groups:
+            samples = group.pop('samples')
+            entry = dict(group, operation=operation, table=table, index=index)
+            entry['mean_latency'] = group['latency'] / group['calls']
+            for percentile in InMemoryAggregator.PERCENTILES:
+                entry[f'p{percentile}'] = InMemoryAggregator.__percentile(samples, percentile)
+            result.append(entry)
+        return sorted(result, key=lambda entry: entry['read_units'] + entry['write_units'], reverse=True)
+
+    def reset(self):
+        with self.__lock:
+            self.__groups.clear()
+
+    @staticmethod
+    def __percentile(samples: List[float], percentile: float) -> float:
+        # Nearest-rank method
+        rank = max(1, math.ceil(percentile / 100 * len(samples)))
+        return samples[rank - 1]
+
+
+class LogSink:
+    """
+    Sink writing one line per call via Logger
+    """
+
+    def __init__(self, level: int = logging.DEBUG, slow_threshold: Optional[float] = None):
+        """
+        :param level: log level of the lines
+        :param slow_threshold: only log calls slower than this many seconds, and failed calls
+        """
+        self.__level = level
+        self.__slow_threshold = slow_threshold
+        self.__logger = Logger.get_logger()
+
+    def __call__(self, call: CallMetrics):
+        if self.__slow_threshold is not None and call.latency < self.__slow_threshold and call.error is None:
+            return
+        if not self.__logger.isEnabledFor(self.__level):
+            return
+        self.__logger.log(self.__level, FormatMessage(
+            '{0.operation} table={0.table} index={0.index} rcu={0.read_units} wcu={0.write_units} '
+            'items={0.items} bytes={0.response_bytes} latency={1:.2f}ms error={0.error}',
+            call,
+            call.latency * 1000
+        ))
+
+
+class CallbackSink:
+    """
+    Sink passing every call to a user function; exceptions raised by the function are logged and ignored
+    """
+
+    def __init__(self, callback: Callable[[CallMetrics], None]):
+        self.__callback = callback
+        self.__logger = Logger.get_logger()
+
+    def __call__(self, call: CallMetrics):
+        try:
+            self.__callback(call)
+        except Exception as e:
+            self.__logger.error(f'Metrics callback failed: {e}')
+
+
+class Instrumentation:
+    """
+    Collects consumed capacity, item count, response size and latency of DynamoDB calls into sinks
+
+    Any callable taking a CallMetrics can be used as a sink. A single instance can be shared by
+    several DynamoDB instances.
+    """
+
+    def __init__(
+        self,
+        sinks: Optional[List[Callable[[CallMetrics], None]]] = None,
+        return_consumed_capacity: Optional[str] = 'INDEXES'
+    ):
+        """
+        :param sinks: sinks called with every call
+        :param return_consumed_capacity: ReturnConsumedCapacity added to calls that do not set it; None leaves calls as is
+        """
+        self.__sinks = list(sinks or [])
+        self.__return_consumed_capacity = return_consumed_capacity
+
+    def add_sink(self, sink: Callable[[CallMetrics], None]):
+        self.__sinks.append(sink)
+
+    def prepare(self, params: Dict) -> Dict:
+        """
+        Asks for consumed capacity unless the call already does
+
+        :param params: request parameters
+        :return: request parameters
+        """
+        if self.__return_consumed_capacity is None or 'ReturnConsumedCapacity' in params:
+            return params
+        return dict(params, ReturnConsumedCapacity=self.__return_consumed_capacity)
+
+    def record(
+        self,
+        operation: str,
+        table_name: str,
+        is_read: bool,
+        params: Dict,
+        result: Optional[Dict],
+        latency: float,
+        error: Optional[str] = None
+    ):
+        """
+        Sends the metrics of a call to every sink
+
+        :param operation: name of the DynamoDB operation
+        :param table_name: name of the table
+        :param is_read: whether capacity units without a read/write breakdown are read units
+        :param params: request parameters
+        :param result: response; None if the call failed
+        :param latency: wall-clock time of the call in seconds
+        :param error: error code if the call failed
+        """
+        read_units = 0.0
+        write_units = 0.0
+        items = 0
+        response_bytes = 0
+        if result is not None:
+            read_units, write_units = Instrumentation.__get_units(result.get('ConsumedCapacity'), is_read)
+            items = Instrumentation.__count_items(result)
+            headers = result.get('ResponseMetadata', {}).get('HTTPHeaders', {})
+            response_bytes = int(headers.get('content-length', 0))
+
+        call = CallMetrics(
+            operation,
+            table_name,
+            params.get('IndexName'),
+            read_units,
+            write_units,
+            items,
+            response_bytes,
+            latency,
+            error
+        )
+        for sink in self.__sinks:
+            sink(call)
+
+    @staticmethod
+    def __get_units(consumed, is_read: bool):
+        if consumed is None:
+            return 0.0, 0.0
+        if isinstance(consumed, dict):
+            consumed = [consumed]
+        read_units = 0.0
+        write_units = 0.0
+        for capacity in consumed:
+            if 'ReadCapacityUnits' in capacity or 'WriteCapacityUnits' in capacity:
+                read_units += capacity.get('ReadCapacityUnits', 0)
+                write_units += capacity.get('WriteCapacityUnits', 0)
+            elif is_read:
+                read_units += capacity.get('CapacityUnits', 0)
+            else:
+                write_units += capacity.get('CapacityUnits', 0)
+        return read_units, write_units
+
+    @staticmethod
+    def __count_items(result: Dict) -> int:
+        if 'Items' in result:
+            return len(result['Items'])
+        if 'Item' in result:
+            return 1
+        responses = result.get('Responses')
+        if isinstance(responses, dict):
+            return sum(len(items) for items in responses.values())
+        if isinstance(responses, list):
+            return sum(1 for response in responses if response.get('Item') is not None)
+        return 0
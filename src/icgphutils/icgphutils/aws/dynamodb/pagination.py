@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+
+
+class Paginator:
+    """
+    Contains pagination utility methods
+    """
+
+    @staticmethod
+    def iter_pages(
+        fetch_page: Callable[[Dict], Dict],
+        request: Dict,
+        request_token: str = 'ExclusiveStartKey',
+        response_token: str = 'LastEvaluatedKey',
+        items_key: str = 'Items',
+        limit: Optional[int] = None,
+        prefetch: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Yields response pages lazily, following the continuation token of each page
+
+        :param fetch_page: function that takes the request parameters and returns a response page
+        :param request: request parameters of the first page
+        :param request_token: request parameter that carries the continuation token
+        :param response_token: response field that holds the continuation token
+        :param items_key: response field that holds the items of a page
+        :param limit: maximum number of items to return; pages are truncated and paging stops once reached
+        :param prefetch: fetch the next page in the background while the current page is consumed
+        :return: iterator of response pages
+        """
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        remaining = limit
+
+        def submit(params):
+            if executor is None:
+                return _Resolved(fetch_page, params)
+            return executor.submit(fetch_page, params)
+
+        try:
+            future = submit(dict(request))
+            while future is not None:
+                page = future.result()
+                token = page.get(response_token)
+
+                if remaining is not None:
+                    items = page.get(items_key, [])
+                    if len(items) >= remaining:
+                        page[items_key] = items[:remaining]
+                        token = None
+                    remaining -= len(page[items_key])
+
+                future = submit(dict(request, **{request_token: token})) if token is not None else None
+                yield page
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+
+class _Resolved:
+    """
+    Synchronous stand-in for a Future, used when prefetching is disabled
+    """
+
+    def __init__(self, fetch_page, params):
+        self.__fetch_page = fetch_page
+        self.__params = params
+
+    def result(self):
+        return self.__fetch_page(self.__params)
@@ -0,0 +1,52 @@
+from typing import Dict
+
+from icgphutils.aws.dynamodb.types import DBTypes
+
+
+class RequestParams:
+    """
+    Converts table-based request parameters to their client-based equivalent
+    """
+
+    # Fields that may hold boto3 condition objects, and whether they are key conditions
+    CONDITION_FIELDS = (
+        ('KeyConditionExpression', True),
+        ('FilterExpression', False),
+        ('ConditionExpression', False)
+    )
+    KEY_FIELDS = ('Key', 'ExclusiveStartKey')
+
+    @staticmethod
+    def to_client_params(table_name: str, params: Dict) -> Dict:
+        """
+        Builds condition objects into expression strings and serializes python values
+
+        :param table_name: name of the table
+        :param params: table-based request parameters
+        :return: client-based request parameters
+        """
+        client_params = dict(params, TableName=table_name)
+        names = dict(params.get('ExpressionAttributeNames') or {})
+        values = dict(params.get('ExpressionAttributeValues') or {})
+
+        # boto3 is imported on first use to keep it out of cold starts
+        from boto3.dynamodb.conditions import ConditionBase
+        from boto3.dynamodb.conditions import ConditionExpressionBuilder
+
+        builder = ConditionExpressionBuilder()
+        for field, is_key_condition in RequestParams.CONDITION_FIELDS:
+            condition = params.get(field)
+            if isinstance(condition, ConditionBase):
+                expression = builder.build_expression(condition, is_key_condition=is_key_condition)
+                client_params[field] = expression.condition_expression
+                names.update(expression.attribute_name_placeholders)
+                values.update(expression.attribute_value_placeholders)
+
+        if names:
+            client_params['ExpressionAttributeNames'] = names
+        if values:
+            client_params['ExpressionAttributeValues'] = DBTypes.convert_dict_to_db_item(values)
+        for field in RequestParams.KEY_FIELDS:
+            if field in params:
+                client_params[field] = DBTypes.convert_dict_to_db_item(params[field])
+        return client_params
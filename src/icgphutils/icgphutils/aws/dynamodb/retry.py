@@ -0,0 +1,44 @@
+import random
+import time
+
+from icgphutils.constants import Constants
+
+
+class Backoff:
+    """
+    Contains retry backoff utility methods
+    """
+
+    @staticmethod
+    def compute_delay(
+        attempt: int,
+        base: float = Constants.DYNAMODB_BACKOFF_BASE,
+        cap: float = Constants.DYNAMODB_BACKOFF_CAP
+    ) -> float:
+        """
+        Returns a jittered exponential delay for the given retry attempt
+
+        :param attempt: retry attempt number, starting at 1
+        :param base: delay of the first attempt in seconds
+        :param cap: maximum delay in seconds
+        :return: delay in seconds
+        """
+        return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+    @staticmethod
+    def sleep(
+        attempt: int,
+        base: float = Constants.DYNAMODB_BACKOFF_BASE,
+        cap: float = Constants.DYNAMODB_BACKOFF_CAP
+    ) -> float:
+        """
+        Sleeps for a jittered exponential delay
+
+        :param attempt: retry attempt number, starting at 1
+        :param base: delay of the first attempt in seconds
+        :param cap: maximum delay in seconds
+        :return: time slept in seconds
+        """
+        delay = Backoff.compute_delay(attempt, base, cap)
+        time.sleep(delay)
+        return delay
@@ -0,0 +1,121 @@
+import copy
+import threading
+
+from concurrent.futures import Future
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+
+from icgphutils.aws.dynamodb.types import DBTypes
+
+
+class SingleFlight:
+    """
+    Thread-safe coalescing of identical calls
+
+    While a call for a key is in flight, other threads asking for the same key wait for its result
+    instead of making their own call. Waiting threads receive a deep copy of the result, so callers
+    may modify what they get. A single instance can be shared by several DynamoDB instances; writes made
+    through them detach the calls in flight for the written keys, so later calls do not join a read
+    that started before the write.
+    """
+
+    def __init__(self):
+        self.__flights = {}
+        self.__calls = 0
+        self.__coalesced = 0
+        self.__lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Calls func, unless a call for the same key is in flight
+
+        :param key: hashable key of the call
+        :param func: function without arguments making the call
+        :return: result of func; exceptions of func are raised in every waiting thread
+        """
+        with self.__lock:
+            self.__calls += 1
+            future = self.__flights.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self.__flights[key] = Future()
+            else:
+                self.__coalesced += 1
+        if not is_leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = func()
+        except BaseException as e:
+            self.__land(key, future)
+            future.set_exception(e)
+            raise
+        self.__land(key, future)
+        future.set_result(result)
+        return result
+
+    def forget_item(self, table_name: str, db_item: Dict):
+        """
+        Detaches the reads in flight for the key of an item; calls already waiting still get their result
+
+        :param table_name: name of the table
+        :param db_item: ddb-formatted item or key
+        """
+        with self.__lock:
+            for key in [key for key in self.__flights if SingleFlight.is_item_key(key, table_name, db_item)]:
+                del self.__flights[key]
+
+    @staticmethod
+    def make_key(operation: str, table_name: str, keys: Dict, consistent_read: Optional[bool]) -> tuple:
+        """
+        Returns the key under which identical reads are coalesced
+
+        :param operation: name of the read, e.g. 'GetItem'
+        :param table_name: name of the table
+        :param keys: dictionary of primary key and sort key (if any)
+        :param consistent_read: consistency of the read
+        :return: hashable key
+        """
+        db_key = DBTypes.convert_dict_to_db_item(DBTypes.replace_float(keys))
+        return operation, table_name, DBTypes.get_key_signature(db_key), bool(consistent_read)
+
+    @staticmethod
+    def is_item_key(key: Hashable, table_name: str, db_item: Dict) -> bool:
+        """
+        Tells whether a key made by make_key reads the item
+
+        :param key: key of a call
+        :param table_name: name of the table of the item
+        :param db_item: ddb-formatted item or key
+        :return: True if the key has the table and key attributes of the item
+        """
+        if not isinstance(key, tuple) or len(key) != 4 or key[1] != table_name:
+            return False
+        signature = key[2]
+        if not all(name in db_item for name, _ in signature):
+            return False
+        return DBTypes.get_key_signature({name: db_item[name] for name, _ in signature}) == signature
+
+    def stats(self) -> Dict:
+        """
+        :return: dictionary with the number of calls, coalesced calls and calls in flight
+        """
+        with self.__lock:
+            return {'calls': self.__calls, 'coalesced': self.__coalesced, 'in_flight': len(self.__flights)}
+
+    def __land(self, key: Hashable, future: Future):
+        with self.__lock:
+            # A write may have detached the flight and a newer call taken its place
+            if self.__flights.get(key) is future:
+                del self.__flights[key]
+
+
+def __getattr__(name):
+    # AsyncSingleFlight lives in icgphutils.aws.dynamodb.aio so that asyncio is only imported by its users
+    if name == 'AsyncSingleFlight':
+        from icgphutils.aws.dynamodb.aio import AsyncSingleFlight
+        return AsyncSingleFlight
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,258 @@
+import threading
+import time
+
+from botocore.exceptions import ClientError
+from typing import Dict
+from typing import Optional
+
+from icgphutils.aws.dynamodb.retry import Backoff
+from icgphutils.constants import Constants
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at a fixed rate of units per second
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        :param rate: refill rate in units per second
+        :param burst: bucket size; defaults to one second worth of units
+        """
+        self.__rate = rate
+        self.__burst = burst
+        self.__tokens = self.capacity
+        self.__updated_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.__rate
+
+    @rate.setter
+    def rate(self, rate: float):
+        with self.__lock:
+            self.__refill()
+            self.__rate = rate
+            self.__tokens = min(self.__tokens, self.capacity)
+
+    @property
+    def capacity(self) -> float:
+        return self.__burst if self.__burst is not None else self.__rate
+
+    def acquire(self, units: float = 1) -> float:
+        """
+        Takes units from the bucket, waiting for them to be refilled if needed
+
+        :param units: number of units to take
+        :return: time waited in seconds
+        """
+        waited = 0.0
+        while True:
+            with self.__lock:
+                self.__refill()
+                # Requests larger than the bucket may proceed once it is full, leaving it in debt
+                needed = min(units, self.capacity)
+                if self.__tokens >= needed:
+                    self.__tokens -= units
+                    return waited
+                delay = (needed - self.__tokens) / self.__rate
+            time.sleep(delay)
+            waited += delay
+
+    def debit(self, units: float):
+        """
+        Takes units without waiting, e.g. to settle the difference with the actual consumed capacity
+
+        :param units: number of units to take; negative values give units back
+        """
+        with self.__lock:
+            self.__refill()
+            self.__tokens = min(self.__tokens - units, self.capacity)
+
+    def __refill(self):
+        now = time.monotonic()
+        self.__tokens = min(self.capacity, self.__tokens + (now - self.__updated_at) * self.__rate)
+        self.__updated_at = now
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-table token buckets for reads and writes whose rates adapt AIMD-style to throttling
+
+    Rates start at the configured or discovered capacity, are cut multiplicatively on every
+    throttling error and grow back additively on every success. Tables without a known capacity
+    are not rate limited, but throttled calls are still retried with full-jitter exponential backoff.
+    A single instance can be shared by several DynamoDB instances.
+    """
+
+    READ = 'read'
+    WRITE = 'write'
+
+    THROTTLING_ERRORS = (
+        'ProvisionedThroughputExceededException',
+        'ThrottlingException',
+        'RequestLimitExceeded'
+    )
+    THROTTLING_REASONS = (
+        'ThrottlingError',
+        'ProvisionedThroughputExceeded'
+    )
+    # Config options of the clients of limited tables, so that botocore does not retry throttled calls behind
+    # the limiter's back; max_attempts counts retries, so 0 leaves a single attempt
+    CLIENT_CONFIG = {'retries': {'max_attempts': 0, 'mode': 'standard'}}
+
+    def __init__(
+        self,
+        capacities: Optional[Dict[str, Dict[str, float]]] = None,
+        discover: bool = False,
+        max_attempts: int = Constants.DYNAMODB_THROTTLE_MAX_ATTEMPTS,
+        decrease: float = Constants.DYNAMODB_THROTTLE_DECREASE,
+        increase: float = Constants.DYNAMODB_THROTTLE_INCREASE,
+        min_rate: float = Constants.DYNAMODB_THROTTLE_MIN_RATE
+    ):
+        """
+        :param capacities: units per second per table name, e.g. {'orders': {'read': 100, 'write': 50}}
+        :param discover: read the provisioned capacity of tables that are not configured from DescribeTable
+        :param max_attempts: maximum number of attempts of a throttled call
+        :param decrease: factor applied to the rate on throttling
+        :param increase: units per second added to the rate on success
+        :param min_rate: lowest rate in units per second
+        """
+        self.__discover = discover
+        self.__max_attempts = max_attempts
+        self.__decrease = decrease
+        self.__increase = increase
+        self.__min_rate = min_rate
+        self.__buckets = {}
+        self.__max_rates = {}
+        self.__registered = set()
+        self.__lock = threading.Lock()
+
+        self.throttles = 0
+        self.retries = 0
+        self.wait_time = 0.0
+        self.backoff_time = 0.0
+
+        for table_name, capacity in (capacities or {}).items():
+            self.configure(table_name, capacity.get(self.READ), capacity.get(self.WRITE))
+
+    @property
+    def max_attempts(self) -> int:
+        return self.__max_attempts
+
+    def configure(self, table_name: str, read_capacity: Optional[float] = None, write_capacity: Optional[float] = None):
+        """
+        Sets the capacity of a table
+
+        :param table_name: name of the table
+        :param read_capacity: read units per second; if None, reads are not rate limited
+        :param write_capacity: write units per second; if None, writes are not rate limited
+        """
+        with self.__lock:
+            self.__registered.add(table_name)
+            for kind, capacity in ((self.READ, read_capacity), (self.WRITE, write_capacity)):
+                if capacity:
+                    self.__buckets[(table_name, kind)] = TokenBucket(capacity)
+                    self.__max_rates[(table_name, kind)] = capacity
+                else:
+                    self.__buckets.pop((table_name, kind), None)
+                    self.__max_rates.pop((table_name, kind), None)
+
+    def register(self, table_name: str, client):
+        """
+        Discovers the provisioned capacity of a table once, if discovery is enabled
+
+        :param table_name: name of the table
+        :param client: boto3 DynamoDB client
+        """
+        if not self.__discover or table_name in self.__registered:
+            return
+        try:
+            throughput = client.describe_table(TableName=table_name)['Table'].get('ProvisionedThroughput', {})
+        except ClientError:
+            # Without capacity the table is only protected by backoff
+            with self.__lock:
+                self.__registered.add(table_name)
+            return
+        # On-demand tables report zero capacity
+        self.configure(table_name, throughput.get('ReadCapacityUnits'), throughput.get('WriteCapacityUnits'))
+
+    def acquire(self, table_name: str, kind: str, units: float = 1):
+        """
+        Waits until the table has capacity for a call
+
+        :param table_name: name of the table
+        :param kind: READ or WRITE
+        :param units: estimated capacity units of the call
+        """
+        bucket = self.__buckets.get((table_name, kind))
+        if bucket is not None:
+            waited = bucket.acquire(units)
+            if waited:
+                with self.__lock:
+                    self.wait_time += waited
+
+    def settle(self, table_name: str, kind: str, units: float):
+        """
+        Charges the difference between the actual and estimated capacity units of a call
+
+        :param table_name: name of the table
+        :param kind: READ or WRITE
+        :param units: actual minus estimated capacity units
+        """
+        bucket = self.__buckets.get((table_name, kind))
+        if bucket is not None and units:
+            bucket.debit(units)
+
+    def on_success(self, table_name: str, kind: str):
+        bucket = self.__buckets.get((table_name, kind))
+        if bucket is not None:
+            max_rate = self.__max_rates[(table_name, kind)]
+            if bucket.rate < max_rate:
+                bucket.rate = min(max_rate, bucket.rate + self.__increase)
+
+    def on_throttle(self, table_name: str, kind: str, attempt: int) -> float:
+        """
+        Cuts the rate of the table and sleeps for a full-jitter exponential backoff
+
+        :param table_name: name of the table
+        :param kind: READ or WRITE
+        :param attempt: retry attempt number, starting at 1
+        :return: time slept in seconds
+        """
+        bucket = self.__buckets.get((table_name, kind))
+        if bucket is not None:
+            bucket.rate = max(self.__min_rate, bucket.rate * self.__decrease)
+        delay = Backoff.sleep(attempt)
+        with self.__lock:
+            self.throttles += 1
+            self.retries += 1
+            self.backoff_time += delay
+        return delay
+
+    @staticmethod
+    def is_throttling_error(error: ClientError) -> bool:
+        """
+        Tells whether an error was caused by throttling
+
+        :param error: botocore ClientError
+        :return: bool
+        """
+        code = error.response.get('Error', {}).get('Code')
+        if code in AdaptiveRateLimiter.THROTTLING_ERRORS:
+            return True
+        if code == 'TransactionCanceledException':
+            reasons = error.response.get('CancellationReasons') or []
+            return any(reason.get('Code') in AdaptiveRateLimiter.THROTTLING_REASONS for reason in reasons)
+        return False
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            'throttles': self.throttles,
+            'retries': self.retries,
+            'wait_time': self.wait_time,
+            'backoff_time': self.backoff_time,
+            'rates': {f'{table_name}:{kind}': bucket.rate for (table_name, kind), bucket in self.__buckets.items()}
+        }
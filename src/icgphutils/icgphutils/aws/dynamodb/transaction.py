@@ -0,0 +1,261 @@
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from icgphutils.aws.dynamodb.expressions import UpdateExpressionBuilder
+from icgphutils.aws.dynamodb.types import DBTypes
+from icgphutils.constants import Constants
+
+
+class TransactionBuilder:
+    """
+    Collects Put/Update/Delete/ConditionCheck operations, possibly across tables, and submits them
+    in a single TransactWriteItems call
+
+    By default, transactions over the 100-item / 4 MB limits of a call are refused. With atomic=False they
+    are split into as few calls as the limits allow; operations are then only atomic within each call.
+    """
+
+    def __init__(
+        self,
+        db,
+        table_name: str,
+        atomic: bool = True,
+        max_items: int = Constants.DYNAMODB_TRANSACT_WRITE_SIZE,
+        max_bytes: int = Constants.DYNAMODB_TRANSACT_WRITE_BYTES
+    ):
+        """
+        :param db: DynamoDB instance used to submit the operations
+        :param table_name: default table of the operations
+        :param atomic: raise if the operations do not fit in a single call; if False, they are split across
+            several non-atomic calls
+        :param max_items: maximum number of operations per call
+        :param max_bytes: maximum estimated request size per call
+        """
+        self.__db = db
+        self.__table_name = table_name
+        self.__atomic = atomic
+        self.__max_items = max_items
+        self.__max_bytes = max_bytes
+        self.__operations = []
+
+        self.calls = 0
+        self.consumed_capacity = {}
+        self.responses = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+
+    def __len__(self):
+        return len(self.__operations)
+
+    @staticmethod
+    def build_put(table_name: str, entry: Dict, keys: Optional[List] = None) -> Dict:
+        """
+        Builds a Put operation
+
+        :param table_name: name of the table
+        :param entry: dictionary of item to be added
+        :param keys: list of primary key and sort key; if None,operation is always overwrite
+        :return: TransactWriteItems operation
+        """
+        put = {
+            'Item': DBTypes.convert_dict_to_db_item(entry),
+            'TableName': table_name
+        }
+        if keys is not None:
+            put['ConditionExpression'] = ' AND '.join(f'attribute_not_exists({key})' for key in keys)
+        return {'Put': put}
+
+    @staticmethod
+    def build_update(
+        table_name: str,
+        keys: Dict,
+        attributes: Optional[Dict] = None,
+        add: Optional[Dict] = None,
+        remove: Optional[List[str]] = None,
+        append: Optional[Dict] = None,
+        before: Optional[Dict] = None,
+        skip_zero_add: bool = False,
+        document_paths: bool = False
+    ) -> Optional[Dict]:
+        """
+        Builds an Update operation of an existing item
+
+        :param table_name: name of the table
+        :param keys: dictionary of primary key and sort key (if any)
+        :param attributes: attribute names and values to SET
+        :param add: attribute names and numbers or sets to ADD
+        :param remove: attribute names to REMOVE
+        :param append: attribute names and lists to append to list attributes
+        :param before: current item; when given, only changes against it are sent
+        :param skip_zero_add: leave out ADD deltas of 0
+        :param document_paths: read the names as document paths, e.g. 'a.b[0]'
+        :return: TransactWriteItems operation; None if there is nothing to update
+        """
+        params = UpdateExpressionBuilder.build(
+            keys, attributes, add, remove, append, before, skip_zero_add, document_paths
+        )
+        if params is None:
+            return None
+        if 'ExpressionAttributeValues' in params:
+            params['ExpressionAttributeValues'] = DBTypes.convert_dict_to_db_item(params['ExpressionAttributeValues'])
+        return {
+            'Update': dict(
+                params,
+                Key=DBTypes.convert_dict_to_db_item(keys),
+                TableName=table_name
+            )
+        }
+
+    @staticmethod
+    def get_written_items(transact_items: List[Dict]) -> List[Tuple[str, Dict]]:
+        """
+        Returns the items written by TransactWriteItems operations
+
+        :param transact_items: TransactWriteItems operations
+        :return: list of table names and ddb-formatted keys (Update, Delete) or items (Put)
+        """
+        written = []
+        for transact_item in transact_items:
+            for operation in ('Put', 'Update', 'Delete'):
+                request = transact_item.get(operation)
+                if request is not None:
+                    written.append((request['TableName'], request.get('Key') or request['Item']))
+        return written
+
+    @staticmethod
+    def build_conditional(
+        operation: str,
+        table_name: str,
+        keys: Dict,
+        condition_expression: Optional[str] = None,
+        expression_attribute_names: Optional[Dict] = None,
+        expression_attribute_values: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Builds a Delete or ConditionCheck operation
+
+        :param operation: 'Delete' or 'ConditionCheck'
+        :param table_name: name of the table
+        :param keys: dictionary of primary key and sort key (if any)
+        :param condition_expression: condition that must hold for the transaction to succeed
+        :param expression_attribute_names: placeholders of attribute names in the condition
+        :param expression_attribute_values: placeholders of python-formatted values in the condition
+        :return: TransactWriteItems operation
+        """
+        request = {
+            'Key': DBTypes.convert_dict_to_db_item(keys),
+            'TableName': table_name
+        }
+        if condition_expression is not None:
+            request['ConditionExpression'] = condition_expression
+        if expression_attribute_names:
+            request['ExpressionAttributeNames'] = expression_attribute_names
+        if expression_attribute_values:
+            request['ExpressionAttributeValues'] = DBTypes.convert_dict_to_db_item(expression_attribute_values)
+        return {operation: request}
+
+    def put(self, entry: Dict, keys: Optional[List] = None, table_name: Optional[str] = None):
+        self.__operations.append(TransactionBuilder.build_put(table_name or self.__table_name, entry, keys))
+        return self
+
+    def update(
+        self,
+        keys: Dict,
+        attributes: Optional[Dict] = None,
+        add: Optional[Dict] = None,
+        remove: Optional[List[str]] = None,
+        append: Optional[Dict] = None,
+        before: Optional[Dict] = None,
+        table_name: Optional[str] = None,
+        skip_zero_add: bool = False,
+        document_paths: bool = False
+    ):
+        operation = TransactionBuilder.build_update(
+            table_name or self.__table_name, keys, attributes, add, remove, append, before, skip_zero_add,
+            document_paths
+        )
+        if operation is not None:
+            self.__operations.append(operation)
+        return self
+
+    def delete(
+        self,
+        keys: Dict,
+        condition_expression: Optional[str] = None,
+        expression_attribute_names: Optional[Dict] = None,
+        expression_attribute_values: Optional[Dict] = None,
+        table_name: Optional[str] = None
+    ):
+        self.__operations.append(TransactionBuilder.build_conditional(
+            'Delete', table_name or self.__table_name, keys,
+            condition_expression, expression_attribute_names, expression_attribute_values
+        ))
+        return self
+
+    def condition_check(
+        self,
+        keys: Dict,
+        condition_expression: str,
+        expression_attribute_names: Optional[Dict] = None,
+        expression_attribute_values: Optional[Dict] = None,
+        table_name: Optional[str] = None
+    ):
+        self.__operations.append(TransactionBuilder.build_conditional(
+            'ConditionCheck', table_name or self.__table_name, keys,
+            condition_expression, expression_attribute_names, expression_attribute_values
+        ))
+        return self
+
+    def add_operation(self, operation: Dict):
+        """
+        Adds a ready-made TransactWriteItems operation
+
+        :param operation: ddb-formatted TransactWriteItems operation
+        """
+        self.__operations.append(operation)
+        return self
+
+    def commit(self) -> List[Dict]:
+        """
+        Submits the collected operations
+
+        :return: list of TransactWriteItems responses
+        """
+        batches = self.__split()
+        if self.__atomic and len(batches) > 1:
+            raise ValueError(f'Transaction of {len(self.__operations)} operations does not fit in a single call')
+
+        self.__operations = []
+        for batch in batches:
+            response = self.__db.transact_write_items(TransactItems=batch, ReturnConsumedCapacity='TOTAL')
+            self.calls += 1
+            self.responses.append(response)
+            for capacity in response.get('ConsumedCapacity', []):
+                table_name = capacity['TableName']
+                self.consumed_capacity[table_name] = (
+                    self.consumed_capacity.get(table_name, 0) + capacity.get('CapacityUnits', 0)
+                )
+        return self.responses
+
+    def __split(self) -> List[List[Dict]]:
+        batches = []
+        batch = []
+        batch_bytes = 0
+        for operation in self.__operations:
+            size = DBTypes.estimate_size(operation)
+            if batch and (len(batch) >= self.__max_items or batch_bytes + size > self.__max_bytes):
+                batches.append(batch)
+                batch = []
+                batch_bytes = 0
+            batch.append(operation)
+            batch_bytes += size
+        if batch:
+            batches.append(batch)
+        return batches
@@ -1,6 +1,9 @@
+from decimal import Context
 from decimal import Decimal
-from boto3.dynamodb.types import TypeDeserializer
-from boto3.dynamodb.types import TypeSerializer
+
+from icgphutils.aws.dynamodb.codec import DBCodec
+
+_KEY_CONTEXT = Context(prec=38)
 
 
 class DBTypes:
@@ -15,10 +18,17 @@ class DBTypes:
         :param db_item: Data to be converted
         :return: dict containing python-formatted data
         """
-        deserializer = TypeDeserializer()
-        deserialized_dict = {k: deserializer.deserialize(v) for k, v in db_item.items()}
-        item = DBTypes.__replace_decimal(deserialized_dict)
-        return item
+        return DBCodec.deserialize(db_item)
+
+    @staticmethod
+    def convert_db_dict_to_decimal_item(db_item: dict) -> dict:
+        """
+        Converts a ddb-formatted dict to its python equivalent, keeping numbers as Decimal
+        the same way table-based operations do
+        :param db_item: Data to be converted
+        :return: dict containing python-formatted data
+        """
+        return DBCodec.deserialize_decimal(db_item)
 
     @staticmethod
     def convert_db_list_to_generic_item(db_list: list) -> list:
@@ -49,19 +59,7 @@ class DBTypes:
         :param generic_info: Data to be converted
         :return: dict containing ddb-formatted data
         """
-
-        serializer = TypeSerializer()
-        serialized_dict = {}
-
-        for k, v in generic_info.items():
-            if isinstance(v, float):
-                serialized_dict[k] = {'N': str(v)}
-            elif isinstance(v, dict) and v:
-                serialized_dict[k] = {'M': DBTypes.convert_dict_to_db_item(v)}
-            else:
-                serialized_dict[k] = serializer.serialize(v)
-
-        return serialized_dict
+        return DBCodec.serialize(generic_info)
 
     @staticmethod
     def convert_list_to_db_item(generic_list: list) -> list:
@@ -84,6 +82,49 @@ class DBTypes:
 
         return db_item_list
 
+    @staticmethod
+    def get_key_signature(db_key: dict) -> tuple:
+        """
+        Returns a hashable signature of a ddb-formatted primary key
+        :param db_key: ddb-formatted dict of primary key and sort key (if any)
+        :return: tuple that is equal for equal keys
+        """
+        signature = []
+        for name, value in db_key.items():
+            value_type, value = next(iter(value.items()))
+            if value_type == 'N':
+                # DynamoDB returns numbers in canonical form, e.g. '2.5' for a key sent as '2.50'; its numbers
+                # have up to 38 significant digits, more than the default context keeps
+                value = str(Decimal(value).normalize(_KEY_CONTEXT))
+            signature.append((name, (value_type, value)))
+        return tuple(sorted(signature))
+
+    @staticmethod
+    def estimate_size(db_item: dict) -> int:
+        """
+        Returns a rough estimate of the wire size of a ddb-formatted dict
+        :param db_item: ddb-formatted data
+        :return: estimated size in bytes
+        """
+        # Containers and type tags count as a few bytes each
+        size = 0
+        pending = [db_item]
+        while pending:
+            value = pending.pop()
+            if isinstance(value, dict):
+                size += 4 * len(value)
+                for k, v in value.items():
+                    size += len(k)
+                    pending.append(v)
+            elif isinstance(value, (list, tuple)):
+                size += 4 * len(value)
+                pending.extend(value)
+            elif isinstance(value, (str, bytes)):
+                size += len(value)
+            else:
+                size += 8
+        return size
+
     @staticmethod
     def __replace_decimal(obj):
         """
@@ -131,3 +172,13 @@ class DBTypes:
                 return float(obj)
         else:
             return obj
+
+    @staticmethod
+    def replace_float(obj):
+        """
+        Replaces float into Decimal
+
+        :param obj: dictionary
+        :return: copy of dictionary with replaced float value; unchanged containers are shared
+        """
+        return DBCodec.replace_float(obj)
@@ -0,0 +1,301 @@
+import atexit
+import threading
+import time
+import weakref
+
+from botocore.exceptions import BotoCoreError
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+from icgphutils.aws.dynamodb.retry import Backoff
+from icgphutils.aws.dynamodb.throttle import AdaptiveRateLimiter
+from icgphutils.aws.dynamodb.types import DBTypes
+from icgphutils.constants import Constants
+from icgphutils.log import Logger
+
+# Buffers flushed at interpreter exit; weak references, so that registering does not keep a buffer alive
+_exit_buffers = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_at_exit():
+    for buffer in list(_exit_buffers):
+        try:
+            buffer.flush()
+        except Exception as e:
+            Logger.get_logger().error(f'Write-behind flush at exit failed: {e}')
+
+
+class WriteBehindBuffer:
+    """
+    Thread-safe buffer that coalesces updates of the same items and writes them in the background
+
+    Successive SET values of a path overwrite each other and ADD deltas are summed, so a burst of updates
+    of a hot key costs a single UpdateItem. Pending updates are flushed when max_pending items are pending,
+    max_delay seconds after the oldest pending update, and on flush() and close().
+    Lambda freezes or stops the execution environment without running exit handlers, so handlers must call
+    flush() before returning, or use the buffer as a context manager, or pending updates may never be written.
+    Updates that fail with throttling or transient errors are queued again under the updates made since, so
+    ADD deltas are not lost, and retried by a timer; other failures are dropped and reported to on_error.
+    Updates go through DynamoDB.update_item, so items must exist. Reads through the DynamoDB instance do not
+    see pending updates.
+    """
+
+    RETRYABLE_ERRORS = AdaptiveRateLimiter.THROTTLING_ERRORS + (
+        'InternalServerError',
+        'ServiceUnavailable',
+        'TransactionConflictException'
+    )
+
+    def __init__(
+        self,
+        db,
+        max_pending: int = Constants.DYNAMODB_WRITE_BEHIND_MAX_PENDING,
+        max_delay: Optional[float] = Constants.DYNAMODB_WRITE_BEHIND_MAX_DELAY,
+        max_workers: int = Constants.DYNAMODB_MAX_WORKERS,
+        flush_at_exit: bool = False,
+        on_error: Optional[Callable[[Dict, Exception], None]] = None,
+        document_paths: bool = False
+    ):
+        """
+        :param db: DynamoDB instance the updates are written with
+        :param max_pending: number of pending items that triggers a flush
+        :param max_delay: maximum time in seconds an update stays pending, and delay of retries; if None, only
+            size and explicit flushes write, and failed updates are retried with exponential backoff
+        :param max_workers: maximum number of concurrent UpdateItem calls per flush
+        :param flush_at_exit: also flush at interpreter exit, for long-running processes; exit handlers do not
+            run when Lambda freezes or stops the environment
+        :param on_error: called with the keys and the error of every dropped update; if None, dropped updates
+            are logged
+        :param document_paths: read the names of updates as document paths, e.g. 'a.b[0]'
+        """
+        self.__db = db
+        self.__max_pending = max_pending
+        self.__max_delay = max_delay
+        self.__max_workers = max_workers
+        self.__on_error = on_error
+        self.__document_paths = document_paths
+        self.__logger = Logger.get_logger()
+        self.__pending = {}
+        self.__timer = None
+        self.__timer_due = None
+        self.__failed_flushes = 0
+        self.__lock = threading.Lock()
+        self.__flush_lock = threading.Lock()
+        self.__stats = {
+            'updates': 0,
+            'flushed_updates': 0,
+            'writes': 0,
+            'errors': 0,
+            'retries': 0,
+            'dropped': 0,
+            'flushes': 0,
+            'flush_latency': 0.0,
+            'max_flush_latency': 0.0
+        }
+        if flush_at_exit:
+            _exit_buffers.add(self)
+
+    def update(self, keys: Dict, attributes: Optional[Dict] = None, add: Optional[Dict] = None):
+        """
+        Queues an update of an item
+
+        :param keys: dictionary of primary key and sort key (if any)
+        :param attributes: attribute names and values to SET; later values of a name win
+        :param add: attribute names and numbers or sets to ADD; deltas of a name are summed
+        """
+        keys = DBTypes.replace_float(keys)
+        signature = DBTypes.get_key_signature(DBTypes.convert_dict_to_db_item(keys))
+        attributes = DBTypes.replace_float(attributes or {})
+        add = DBTypes.replace_float(add or {})
+
+        with self.__lock:
+            self.__stats['updates'] += 1
+            entry = self.__pending.get(signature)
+            if entry is None:
+                entry = self.__pending[signature] = WriteBehindBuffer.__new_entry(signature, keys)
+            entry['updates'] += 1
+            WriteBehindBuffer.__merge(entry, attributes, add)
+            if len(self.__pending) >= self.__max_pending:
+                # Flushed by a timer thread, so that the caller does not wait for the writes
+                if self.__timer is None or self.__timer_due > time.monotonic():
+                    self.__schedule(0)
+            elif self.__timer is None and self.__max_delay is not None:
+                self.__schedule(self.__max_delay)
+
+    def flush(self) -> int:
+        """
+        Writes all pending updates with concurrent UpdateItem calls
+
+        Updates failed with throttling or transient errors are queued again, ahead of updates made since, and
+        retried by a timer; other failed updates are dropped and reported to on_error. The first error is raised.
+
+        :return: number of items written
+        """
+        with self.__flush_lock:
+            with self.__lock:
+                entries = list(self.__pending.values())
+                self.__pending = {}
+                if self.__timer is not None:
+                    self.__timer.cancel()
+                    self.__timer = None
+            if not entries:
+                return 0
+
+            started_at = time.monotonic()
+            workers = min(self.__max_workers, len(entries))
+            if workers == 1:
+                errors = [self.__write(entries[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    errors = list(executor.map(self.__write, entries))
+            latency = time.monotonic() - started_at
+
+            failed = [(entry, error) for entry, error in zip(entries, errors) if error is not None]
+            retried = [entry for entry, error in failed if WriteBehindBuffer.is_retryable_error(error)]
+            dropped = [(entry, error) for entry, error in failed if not WriteBehindBuffer.is_retryable_error(error)]
+            with self.__lock:
+                for entry in retried:
+                    self.__requeue(entry)
+                self.__stats['flushed_updates'] += sum(
+                    entry['updates'] for entry, error in zip(entries, errors) if error is None
+                )
+                self.__stats['writes'] += len(entries) - len(failed)
+                self.__stats['errors'] += len(failed)
+                self.__stats['retries'] += len(retried)
+                self.__stats['dropped'] += len(dropped)
+                self.__stats['flushes'] += 1
+                self.__stats['flush_latency'] += latency
+                self.__stats['max_flush_latency'] = max(self.__stats['max_flush_latency'], latency)
+                self.__failed_flushes = self.__failed_flushes + 1 if retried else 0
+                if retried:
+                    delay = self.__max_delay
+                    if delay is None:
+                        delay = Backoff.compute_delay(self.__failed_flushes)
+                    self.__schedule(delay)
+            for entry, error in dropped:
+                self.__report(entry, error)
+            if failed:
+                raise failed[0][1]
+            return len(entries)
+
+    def close(self):
+        """
+        Flushes pending updates and stops flushing at interpreter exit
+        """
+        _exit_buffers.discard(self)
+        self.flush()
+
+    def stats(self) -> Dict:
+        """
+        :return: dictionary with the number of updates, flushed updates, writes, errors, retried and dropped
+            updates and flushes, the number of pending items, the coalescing ratio (flushed updates per
+            successful UpdateItem call) and the mean and max flush latency in seconds
+        """
+        with self.__lock:
+            stats = dict(self.__stats, pending=len(self.__pending))
+        stats['coalescing_ratio'] = stats['flushed_updates'] / stats['writes'] if stats['writes'] else 0.0
+        stats['flush_latency'] = stats['flush_latency'] / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
+
+    @staticmethod
+    def is_retryable_error(error: Exception) -> bool:
+        """
+        Tells whether a failed update is queued again
+
+        :param error: error of the update
+        :return: True for throttling, transient service and connection errors
+        """
+        if isinstance(error, BotoCoreError):
+            return True
+        if isinstance(error, ClientError):
+            code = error.response.get('Error', {}).get('Code')
+            return code in WriteBehindBuffer.RETRYABLE_ERRORS or AdaptiveRateLimiter.is_throttling_error(error)
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __schedule(self, delay: float):
+        # Called with the lock held
+        if self.__timer is not None:
+            self.__timer.cancel()
+        self.__timer = threading.Timer(delay, self.__flush_in_background)
+        self.__timer.daemon = True
+        self.__timer_due = time.monotonic() + delay
+        self.__timer.start()
+
+    def __flush_in_background(self):
+        # Timer flushes have no caller to raise to; failed updates are retried or reported by flush
+        try:
+            self.flush()
+        except ClientError:
+            # Logged by DynamoDB
+            pass
+        except Exception as e:
+            self.__logger.error(f'Write-behind flush failed: {e}')
+
+    def __report(self, entry: Dict, error: Exception):
+        if self.__on_error is None:
+            self.__logger.error(f'Write-behind update of {entry["keys"]} dropped: {error}')
+            return
+        try:
+            self.__on_error(entry['keys'], error)
+        except Exception as e:
+            self.__logger.error(f'Write-behind error callback failed: {e}')
+
+    def __write(self, entry: Dict) -> Optional[Exception]:
+        try:
+            self.__db.update_item(
+                entry['keys'],
+                attributes=entry['attributes'] or None,
+                add=entry['add'] or None,
+                document_paths=self.__document_paths
+            )
+            return None
+        except ClientError as e:
+            # Logged by DynamoDB
+            return e
+        except Exception as e:
+            self.__logger.error(f'Write-behind update of {entry["keys"]} failed: {e}')
+            return e
+
+    def __requeue(self, entry: Dict):
+        # The failed update happened first, so updates queued since are applied on top of it
+        newer = self.__pending.get(entry['signature'])
+        if newer is not None:
+            WriteBehindBuffer.__merge(entry, newer['attributes'], newer['add'])
+            entry['updates'] += newer['updates']
+        self.__pending[entry['signature']] = entry
+
+    @staticmethod
+    def __new_entry(signature: tuple, keys: Dict) -> Dict:
+        return {'signature': signature, 'keys': keys, 'attributes': {}, 'add': {}, 'updates': 0}
+
+    @staticmethod
+    def __merge(entry: Dict, attributes: Dict, add: Dict):
+        for path, value in attributes.items():
+            entry['add'].pop(path, None)
+            entry['attributes'][path] = value
+        for path, delta in add.items():
+            if path in entry['attributes']:
+                entry['attributes'][path] = WriteBehindBuffer.__combine(entry['attributes'][path], delta)
+            elif path in entry['add']:
+                entry['add'][path] = WriteBehindBuffer.__combine(entry['add'][path], delta)
+            else:
+                entry['add'][path] = delta
+
+    @staticmethod
+    def __combine(value, delta):
+        if isinstance(value, (set, frozenset)):
+            return set(value) | set(delta)
+        if isinstance(value, (int, Decimal)) and not isinstance(value, bool):
+            return value + delta
+        raise ValueError(f'Cannot ADD {delta!r} to {value!r}')
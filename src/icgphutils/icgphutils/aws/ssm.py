@@ -1,13 +1,181 @@
-import boto3
-import os
+import threading
 
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from icgphutils.aws.client import LazyClient
+from icgphutils.cache import TTLCache
 from icgphutils.constants import Constants
+from icgphutils.log import Logger
 
 
 class SSM:
-    gl_client = boto3.client('ssm', region_name=os.getenv('REGION', Constants.DEFAULT_REGION))
+    """
+    Parameter Store access with a process-wide cache that survives warm invocations
+
+    Decrypted and plaintext values are cached separately, so a value read with decrypt=True is never
+    returned to a caller that did not ask for decryption.
+    """
+
+    gl_client = LazyClient('ssm')
+
+    __plain_cache = TTLCache(max_entries=Constants.SSM_CACHE_MAX_ENTRIES, ttl=Constants.SSM_CACHE_TTL)
+    __decrypted_cache = TTLCache(max_entries=Constants.SSM_CACHE_MAX_ENTRIES, ttl=Constants.SSM_CACHE_TTL)
+    __stale_while_revalidate = False
+    __refreshing = set()
+    __lock = threading.Lock()
+
+    @classmethod
+    def configure(
+        cls,
+        ttl: Optional[float] = Constants.SSM_CACHE_TTL,
+        max_entries: Optional[int] = Constants.SSM_CACHE_MAX_ENTRIES,
+        stale_while_revalidate: bool = False
+    ):
+        """
+        Replaces the cache, dropping cached values
+
+        :param ttl: time-to-live of cached values in seconds; if None, values do not expire
+        :param max_entries: maximum number of cached values per cache
+        :param stale_while_revalidate: return expired values immediately and refresh them in the background
+        """
+        cls.__plain_cache = TTLCache(max_entries=max_entries, ttl=ttl)
+        cls.__decrypted_cache = TTLCache(max_entries=max_entries, ttl=ttl)
+        cls.__stale_while_revalidate = stale_while_revalidate
 
     @classmethod
     def get_parameter(cls, key, decrypt=False):
+        """
+        Returns a parameter, from the cache when it holds a live value
+
+        :param key: parameter name
+        :param decrypt: decrypt SecureString values
+        :return: parameter value
+        """
+        cache = cls.__get_cache(decrypt)
+        found, value, expired = cache.lookup(key, allow_stale=cls.__stale_while_revalidate)
+        if found:
+            if expired:
+                cls.__refresh_in_background(key, decrypt)
+            return value
+
         resp = cls.gl_client.get_parameter(Name=key, WithDecryption=decrypt)
-        return resp['Parameter']['Value']
+        value = resp['Parameter']['Value']
+        cache.set(key, value)
+        return value
+
+    @classmethod
+    def get_parameters(cls, keys: List[str], decrypt: bool = False) -> Dict[str, str]:
+        """
+        Returns many parameters, fetching the ones not cached with concurrent GetParameters calls of up to
+        10 names
+
+        :param keys: parameter names
+        :param decrypt: decrypt SecureString values
+        :return: dictionary of parameter name to value; parameters that do not exist are left out
+        """
+        cache = cls.__get_cache(decrypt)
+        values = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            found, value, expired = cache.lookup(key, allow_stale=cls.__stale_while_revalidate)
+            if found:
+                if expired:
+                    cls.__refresh_in_background(key, decrypt)
+                values[key] = value
+            else:
+                missing.append(key)
+        if not missing:
+            return values
+
+        chunks = [missing[i:i + Constants.SSM_BATCH_SIZE] for i in range(0, len(missing), Constants.SSM_BATCH_SIZE)]
+        if len(chunks) == 1:
+            values.update(cls.__fetch(chunks[0], decrypt))
+        else:
+            # Imported here to keep concurrent.futures out of cold starts that only read single parameters
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(Constants.SSM_MAX_WORKERS, len(chunks))) as executor:
+                for fetched in executor.map(lambda chunk: cls.__fetch(chunk, decrypt), chunks):
+                    values.update(fetched)
+        return values
+
+    @classmethod
+    def prefetch_path(cls, path: str, decrypt: bool = False, recursive: bool = True) -> Dict[str, str]:
+        """
+        Caches all parameters under a path, e.g. at cold start
+
+        :param path: parameter hierarchy, e.g. '/service/prod/'
+        :param decrypt: decrypt SecureString values
+        :param recursive: include parameters in nested hierarchies
+        :return: dictionary of parameter name to value
+        """
+        cache = cls.__get_cache(decrypt)
+        values = {}
+        request = {'Path': path, 'Recursive': recursive, 'WithDecryption': decrypt}
+        while True:
+            resp = cls.gl_client.get_parameters_by_path(**request)
+            for parameter in resp.get('Parameters', []):
+                cache.set(parameter['Name'], parameter['Value'])
+                values[parameter['Name']] = parameter['Value']
+            next_token = resp.get('NextToken')
+            if not next_token:
+                return values
+            request['NextToken'] = next_token
+
+    @classmethod
+    def invalidate(cls, key: Optional[str] = None):
+        """
+        Drops a cached parameter, decrypted and plaintext
+
+        :param key: parameter name; if None, all parameters are dropped
+        """
+        for cache in (cls.__plain_cache, cls.__decrypted_cache):
+            if key is None:
+                cache.clear()
+            else:
+                cache.pop(key)
+
+    @classmethod
+    def stats(cls) -> Dict:
+        """
+        :return: dictionary with the statistics of the plaintext and decrypted caches, including hits and misses
+        """
+        return {'plain': cls.__plain_cache.stats, 'decrypted': cls.__decrypted_cache.stats}
+
+    @classmethod
+    def __get_cache(cls, decrypt: bool) -> TTLCache:
+        return cls.__decrypted_cache if decrypt else cls.__plain_cache
+
+    @classmethod
+    def __fetch(cls, keys: List[str], decrypt: bool) -> Dict[str, str]:
+        resp = cls.gl_client.get_parameters(Names=keys, WithDecryption=decrypt)
+        cache = cls.__get_cache(decrypt)
+        values = {}
+        for parameter in resp.get('Parameters', []):
+            cache.set(parameter['Name'], parameter['Value'])
+            values[parameter['Name']] = parameter['Value']
+        if resp.get('InvalidParameters'):
+            Logger.get_logger().warning(f'SSM parameters not found: {resp["InvalidParameters"]}')
+        return values
+
+    @classmethod
+    def __refresh_in_background(cls, key: str, decrypt: bool):
+        with cls.__lock:
+            if (key, decrypt) in cls.__refreshing:
+                return
+            cls.__refreshing.add((key, decrypt))
+
+        def refresh():
+            try:
+                resp = cls.gl_client.get_parameter(Name=key, WithDecryption=decrypt)
+                cls.__get_cache(decrypt).set(key, resp['Parameter']['Value'])
+            except Exception as e:
+                # The stale value keeps being served until a refresh succeeds
+                Logger.get_logger().warning(f'Refreshing SSM parameter {key} failed: {e}')
+            finally:
+                with cls.__lock:
+                    cls.__refreshing.discard((key, decrypt))
+
+        threading.Thread(target=refresh, daemon=True).start()
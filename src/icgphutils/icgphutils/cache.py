@@ -0,0 +1,152 @@
+import threading
+import time
+
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry and an optional byte budget
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        """
+        :param max_entries: maximum number of entries; least recently used entries are evicted first
+        :param max_bytes: maximum total size of entries as measured by sizeof
+        :param ttl: default time-to-live of entries in seconds; if None, entries do not expire
+        :param sizeof: function returning the size of a value; required with max_bytes
+        """
+        if max_bytes is not None and sizeof is None:
+            raise ValueError('sizeof is required when max_bytes is set')
+
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__ttl = ttl
+        self.__sizeof = sizeof
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.lookup(key, count=False)[0]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the value of a live entry
+
+        :param key: cache key
+        :param default: value returned when the key is missing or expired
+        :return: cached value
+        """
+        found, value, _ = self.lookup(key)
+        return value if found else default
+
+    def lookup(self, key: Hashable, count: bool = True, allow_stale: bool = False) -> tuple:
+        """
+        Looks up an entry, telling apart missing keys from cached None values
+
+        :param key: cache key
+        :param count: update the hit and miss counters
+        :param allow_stale: return expired entries instead of dropping them
+        :return: tuple of (found, value, expired)
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+            expired = False
+            if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+                expired = True
+                if not allow_stale:
+                    self.__remove(key)
+                    self.expirations += 1
+                    entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return False, None, False
+            self.__entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return True, entry[0], expired
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Adds or replaces an entry, evicting least recently used entries as needed
+
+        :param key: cache key
+        :param value: value to be cached
+        :param ttl: time-to-live in seconds; defaults to the cache ttl
+        """
+        if ttl is None:
+            ttl = self.__ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = self.__sizeof(value) if self.__sizeof is not None else 0
+
+        with self.__lock:
+            if key in self.__entries:
+                self.__remove(key)
+            if self.__max_bytes is not None and size > self.__max_bytes:
+                # Would evict everything else and still not fit
+                self.evictions += 1
+                return
+            self.__entries[key] = (value, expires_at, size)
+            self.__bytes += size
+            while self.__entries and (
+                (self.__max_entries is not None and len(self.__entries) > self.__max_entries)
+                or (self.__max_bytes is not None and self.__bytes > self.__max_bytes)
+            ):
+                self.__remove(next(iter(self.__entries)))
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> bool:
+        """
+        Removes an entry
+
+        :param key: cache key
+        :return: True if an entry was removed
+        """
+        with self.__lock:
+            if key not in self.__entries:
+                return False
+            self.__remove(key)
+            self.invalidations += 1
+            return True
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__bytes = 0
+
+    @property
+    def stats(self) -> Dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'entries': len(self.__entries),
+            'bytes': self.__bytes
+        }
+
+    def __remove(self, key: Hashable):
+        self.__bytes -= self.__entries.pop(key)[2]
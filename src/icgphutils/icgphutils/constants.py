@@ -5,7 +5,52 @@ class Constants:
     DEFAULT_LOG_LEVEL = 'DEBUG'
     ZULU_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
 
+    # AWS clients
+    AWS_MAX_POOL_CONNECTIONS = 50
+    AWS_CONNECT_TIMEOUT = 10
+    AWS_READ_TIMEOUT = 60
+    AWS_TCP_KEEPALIVE = True
+
+    # SSM
+    SSM_CACHE_TTL = 300
+    SSM_CACHE_MAX_ENTRIES = 1024
+    SSM_BATCH_SIZE = 10
+    SSM_MAX_WORKERS = 4
+
+    # Authorizer
+    AUTHORIZER_CACHE_MAX_TTL = 300
+    AUTHORIZER_CACHE_NEGATIVE_TTL = 10
+    AUTHORIZER_CACHE_MAX_ENTRIES = 10000
+
+    # Lambda
+    LAMBDA_MAX_WORKERS = 16
+
     # Precision
     FIAT_PRECISION = 5
     CRYPTO_PRECISION = 8
     DEFAULT_STEP_VALUE = 0.00000001
+
+    # DynamoDB
+    DYNAMODB_BATCH_WRITE_SIZE = 25
+    DYNAMODB_BATCH_GET_SIZE = 100
+    DYNAMODB_BATCH_STATEMENT_SIZE = 25
+    DYNAMODB_TRANSACT_WRITE_SIZE = 100
+    DYNAMODB_TRANSACT_WRITE_BYTES = 4 * 1024 * 1024
+    DYNAMODB_MAX_WORKERS = 8
+    DYNAMODB_SCAN_QUEUE_SIZE = 16
+    DYNAMODB_MAX_RETRIES = 8
+    DYNAMODB_BACKOFF_BASE = 0.05
+    DYNAMODB_BACKOFF_CAP = 5.0
+    DYNAMODB_CACHE_TTL = 300
+    DYNAMODB_CACHE_MAX_ENTRIES = 10000
+    DYNAMODB_CACHE_GENERATION_STRIPES = 1024
+    DYNAMODB_EXPRESSION_CACHE_SIZE = 1024
+    DYNAMODB_THROTTLE_MAX_ATTEMPTS = 10
+    DYNAMODB_THROTTLE_DECREASE = 0.5
+    DYNAMODB_THROTTLE_INCREASE = 1.0
+    DYNAMODB_THROTTLE_MIN_RATE = 1.0
+    DYNAMODB_METRICS_MAX_SAMPLES = 1024
+    DYNAMODB_PAGE_BYTES = 1024 * 1024
+    DYNAMODB_WRITE_BEHIND_MAX_PENDING = 100
+    DYNAMODB_WRITE_BEHIND_MAX_DELAY = 1.0
+    DYNAMODB_COUNTER_SHARDS = 10
@@ -1,9 +1,10 @@
-import json
 from typing import Union
 from typing import List
 from typing import Optional
 from typing import Any
 
+from icgphutils.jsoncodec import JsonCodec
+
 
 class HttpUtils:
     # HTTP Constants
@@ -39,16 +40,17 @@ class HttpUtils:
     ) -> dict:
         """
         Generates HTTP response to be returned to client
-        :param response_payload: Response payload
+        :param response_payload: Response payload; may hold Decimal, datetime and set values
         :param status_code: Status code of response
         :return: Response dictionary
         """
-        body = json.dumps(response_payload)
+        encoded_body = JsonCodec.dumps_bytes(response_payload)
+        body = encoded_body.decode('utf-8')
 
         # Add headers as necessary
         headers = {
             'Content-Type': 'application/json',
-            'Content-Length': str(len(body)),
+            'Content-Length': str(len(encoded_body)),
             'Access-Control-Allow-Origin': '*',
             'Access-Control-Allow-Methods': 'GET,PUT,POST,DELETE,OPTIONS,PATCH',
             'Access-Control-Allow-Headers':
@@ -1,13 +1,58 @@
+import hashlib
+import time
+
 from typing import Dict
 from typing import Optional
 from icgphutils.aws.awslambda import Lambda
+from icgphutils.cache import TTLCache
+from icgphutils.constants import Constants
 from icgphutils.log import Logger
 from icgphutils.log import FormatMessage
 
 
 class CognitoCustomAuthorizer:
+    """
+    Authorizes API Gateway requests with Cognito tokens decoded by a separate Lambda function
+
+    Decisions are cached per token and group for the lifetime of the token, up to max_ttl, so repeated
+    requests with the same token do not invoke the decoder. Tokens are only kept as SHA-256 hashes.
+    Denials are cached for a short negative_ttl. Decoder failures (invocation errors, function errors and
+    payloads that are not a JSON object) are not cached.
+    """
+
     gl_logger = Logger.get_logger()
 
+    __decision_cache = TTLCache(max_entries=Constants.AUTHORIZER_CACHE_MAX_ENTRIES)
+    __max_ttl = Constants.AUTHORIZER_CACHE_MAX_TTL
+    __negative_ttl = Constants.AUTHORIZER_CACHE_NEGATIVE_TTL
+
+    @classmethod
+    def configure_cache(
+        cls,
+        max_ttl: float = Constants.AUTHORIZER_CACHE_MAX_TTL,
+        negative_ttl: float = Constants.AUTHORIZER_CACHE_NEGATIVE_TTL,
+        max_entries: int = Constants.AUTHORIZER_CACHE_MAX_ENTRIES
+    ):
+        """
+        Replaces the decision cache, dropping cached decisions
+
+        :param max_ttl: maximum time in seconds an Allow decision is cached, even if the token lives longer;
+            0 disables caching
+        :param negative_ttl: time in seconds a Deny decision is cached; 0 disables caching of denials
+        :param max_entries: maximum number of cached decisions; least recently used ones are evicted first
+        """
+        cls.__decision_cache = TTLCache(max_entries=max_entries)
+        cls.__max_ttl = max_ttl
+        cls.__negative_ttl = negative_ttl
+
+    @classmethod
+    def clear_cache(cls):
+        cls.__decision_cache.clear()
+
+    @classmethod
+    def cache_stats(cls) -> Dict:
+        return cls.__decision_cache.stats
+
     @staticmethod
     def __generate_policy(principal_id, effect, resource, context):
         return {
@@ -25,7 +70,6 @@ class CognitoCustomAuthorizer:
             "context": context
         }
 
-
     @classmethod
     def authorize(
         cls,
@@ -34,23 +78,33 @@ class CognitoCustomAuthorizer:
         method_arn: str,
         group: Optional[str] = None
     ) -> Dict:
+        cache_key = (hashlib.sha256(token.encode('utf-8')).hexdigest(), group)
+        found, decision, _ = cls.__decision_cache.lookup(cache_key)
+        if found:
+            principal_id, effect, context = decision
+            return CognitoCustomAuthorizer.__generate_policy(
+                principal_id, effect, method_arn, dict(context) if context is not None else None
+            )
+
         # Default
         policy = CognitoCustomAuthorizer.__generate_policy('CognitoCustomAuthorizer', 'Deny', method_arn, None)
+        # Failures of the decoder may be transient, so only its decisions are cached
+        ttl = 0
 
         try:
-            decoded_message = Lambda.invoke(
+            result = Lambda.try_invoke(
                 function_name=token_decoder_function_name,
                 payload=dict(id_token=token)
             )
-        except Exception as e:
-            cls.gl_logger.error(
-                FormatMessage(
-                    'Exception: {}',
-                    e
+            decoded_message = result['Payload']
+            if result['Error'] is not None or not isinstance(decoded_message, dict):
+                cls.gl_logger.error(
+                    FormatMessage(
+                        'Error: {}',
+                        result['Error'] or decoded_message
+                    )
                 )
-            )
-        else:
-            if decoded_message.get('claims') is not None:
+            elif decoded_message.get('claims') is not None:
                 groups = decoded_message['claims'].get('cognito:groups', [])
                 if group is None or group in groups:
                     principal_id = decoded_message['claims']['email']
@@ -58,7 +112,8 @@ class CognitoCustomAuthorizer:
                     if 'cognito:groups' in context:
                         # Convert list to comma-delimited string
                         context['cognito:groups'] = ",".join(context['cognito:groups'])
-                    policy = CognitoCustomAuthorizer.__generate_policy(principal_id, 'Allow', method_arn, decoded_message['claims'])
+                    policy = CognitoCustomAuthorizer.__generate_policy(principal_id, 'Allow', method_arn, dict(context))
+                    ttl = CognitoCustomAuthorizer.__get_allow_ttl(context, cls.__max_ttl)
                 else:
                     cls.gl_logger.error(
                         FormatMessage(
@@ -67,6 +122,7 @@ class CognitoCustomAuthorizer:
                             group
                         )
                     )
+                    ttl = cls.__negative_ttl
             else:
                 cls.gl_logger.error(
                     FormatMessage(
@@ -74,4 +130,31 @@ class CognitoCustomAuthorizer:
                         decoded_message
                     )
                 )
+                ttl = cls.__negative_ttl
+        except Exception as e:
+            cls.gl_logger.error(
+                FormatMessage(
+                    'Exception: {}',
+                    e
+                )
+            )
+            policy = CognitoCustomAuthorizer.__generate_policy('CognitoCustomAuthorizer', 'Deny', method_arn, None)
+            ttl = 0
+
+        if ttl > 0:
+            # Callers get their own copy of the context, so the cached one cannot be modified
+            context = policy['context']
+            cls.__decision_cache.set(cache_key, (
+                policy['principalId'],
+                policy['policyDocument']['Statement'][0]['Effect'],
+                dict(context) if context is not None else None
+            ), ttl=ttl)
         return policy
+
+    @staticmethod
+    def __get_allow_ttl(claims: Dict, max_ttl: float) -> float:
+        try:
+            expires_in = float(claims['exp']) - time.time()
+        except (KeyError, TypeError, ValueError):
+            return max_ttl
+        return min(expires_in, max_ttl)
@@ -0,0 +1,158 @@
+import datetime
+import json
+
+from decimal import Decimal
+from typing import Any
+from typing import Optional
+from typing import Union
+
+
+class JsonCodec:
+    """
+    JSON encoding and decoding through the fastest available backend: orjson, then ujson, then json
+
+    Decimal values, as returned by DynamoDB, are written as numbers when that is exact and as strings
+    otherwise, the same on every backend; datetime, date and time values are written as ISO 8601 strings and
+    sets as lists, without converting the data beforehand. Documents with integers beyond 64 bits, which
+    orjson rejects, are written by the stdlib encoder. ujson is only used by versions that pass Decimal to
+    default=; those that convert it to float themselves lose precision. The backend is picked on first use,
+    so importing this module does not import any of them.
+    """
+
+    ORJSON = 'orjson'
+    UJSON = 'ujson'
+    JSON = 'json'
+    BACKENDS = (ORJSON, UJSON, JSON)
+
+    __backend = None
+    __dumps_bytes = None
+    __loads = None
+
+    @classmethod
+    def dumps(cls, obj: Any) -> str:
+        """
+        Serializes data to a JSON string
+
+        :param obj: data to be serialized
+        :return: compact JSON string
+        """
+        return cls.dumps_bytes(obj).decode('utf-8')
+
+    @classmethod
+    def dumps_bytes(cls, obj: Any) -> bytes:
+        """
+        Serializes data to UTF-8 encoded JSON, the native output of orjson
+
+        :param obj: data to be serialized
+        :return: compact JSON bytes
+        """
+        if cls.__dumps_bytes is None:
+            cls.set_backend()
+        return cls.__dumps_bytes(obj)
+
+    @classmethod
+    def loads(cls, data: Union[str, bytes, bytearray]) -> Any:
+        """
+        Deserializes JSON
+
+        :param data: JSON string or UTF-8 encoded bytes
+        :return: deserialized data
+        """
+        if cls.__loads is None:
+            cls.set_backend()
+        return cls.__loads(data)
+
+    @classmethod
+    def get_backend(cls) -> str:
+        if cls.__backend is None:
+            cls.set_backend()
+        return cls.__backend
+
+    @classmethod
+    def set_backend(cls, backend: Optional[str] = None):
+        """
+        Selects the backend
+
+        :param backend: one of BACKENDS; if None, the first installed one is used, skipping ujson versions
+            that do not pass Decimal, datetime and set values to default=
+        """
+        if backend is not None and backend not in JsonCodec.BACKENDS:
+            raise ValueError(f'Unknown JSON backend {backend}')
+
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_default)
+
+        def dumps_stdlib(obj):
+            return encoder.encode(obj).encode('utf-8')
+
+        for name in (backend,) if backend is not None else JsonCodec.BACKENDS:
+            if name == JsonCodec.ORJSON:
+                try:
+                    import orjson
+                except ImportError:
+                    if backend is not None:
+                        raise
+                    continue
+                option = orjson.OPT_NON_STR_KEYS
+
+                def dumps_orjson(obj):
+                    try:
+                        return orjson.dumps(obj, default=_default, option=option)
+                    except orjson.JSONEncodeError:
+                        # Integers beyond 64 bits; unserializable objects are raised again by the stdlib
+                        return dumps_stdlib(obj)
+
+                cls.__dumps_bytes = staticmethod(dumps_orjson)
+                cls.__loads = staticmethod(orjson.loads)
+            elif name == JsonCodec.UJSON:
+                try:
+                    import ujson
+                except ImportError:
+                    if backend is not None:
+                        raise
+                    continue
+                if not _supports_default(ujson):
+                    # Versions before 5.4 ignore or reject default=, and released versions write Decimal as a
+                    # float without calling it
+                    if backend is not None:
+                        raise ImportError(
+                            f'ujson {getattr(ujson, "__version__", "")} does not pass Decimal values to default='
+                        )
+                    continue
+                cls.__dumps_bytes = staticmethod(
+                    lambda obj: ujson.dumps(obj, ensure_ascii=False, default=_default).encode('utf-8')
+                )
+                cls.__loads = staticmethod(ujson.loads)
+            else:
+                cls.__dumps_bytes = staticmethod(dumps_stdlib)
+                cls.__loads = staticmethod(json.loads)
+            cls.__backend = name
+            return
+
+
+def _supports_default(ujson) -> bool:
+    try:
+        output = ujson.dumps({'i': Decimal('12'), 'p': Decimal('0.1234567890123456789'), 's': {1}}, default=_default)
+        return output == '{"i":12,"p":"0.1234567890123456789","s":[1]}'
+    except Exception:
+        return False
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return _from_decimal(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _from_decimal(value: Decimal) -> Union[int, float, str]:
+    # Integers are exact at any size; other numbers become floats only when the float reads back as the same
+    # number, e.g. not with more than 17 significant digits, and strings otherwise
+    if not value.is_finite():
+        return str(value)
+    if value == value.to_integral_value():
+        return int(value)
+    number = float(value)
+    return number if Decimal(repr(number)) == value else str(value)
@@ -2,7 +2,7 @@ import logging
 import sys
 import os
 
-from icgphutils import Constants
+from icgphutils.constants import Constants
 
 
 class Logger:
@@ -13,7 +13,7 @@ class Logger:
     @classmethod
     def get_logger(
         cls,
-        log_level=os.getenv('LOG_LEVEL', "DEBUG"),
+        log_level=os.getenv('LOG_LEVEL', Constants.DEFAULT_LOG_LEVEL),
         logger_name='ICGPHLogger',
         propagate_log=False,
     ):
@@ -0,0 +1,541 @@
+"""
+Tests of InMemoryBackend and the ExpressionEvaluator behind it
+
+Usage: python -m pytest tests
+"""
+import pytest
+
+from botocore.exceptions import ClientError
+
+from icgphutils.aws.dynamodb import DynamoDB
+from icgphutils.aws.dynamodb.evaluator import ExpressionEvaluator
+from icgphutils.aws.dynamodb.memory import InMemoryBackend
+
+ITEM = {
+    'pk': {'S': 'ACCOUNT#1'},
+    'balance': {'N': '100.50'},
+    'currency': {'S': 'PHP'},
+    'tags': {'SS': ['bank', 'deposit']},
+    'limits': {'M': {'daily': {'N': '500'}, 'tiers': {'L': [{'N': '1'}, {'N': '5'}]}}},
+    'history': {'L': [{'S': 'open'}, {'S': 'fund'}]},
+    'active': {'BOOL': True}
+}
+VALUES = {
+    ':php': {'S': 'PHP'},
+    ':usd': {'S': 'USD'},
+    ':low': {'N': '50'},
+    ':high': {'N': '200'},
+    ':balance': {'N': '100.5'},
+    ':bank': {'S': 'bank'},
+    ':fund': {'S': 'fund'},
+    ':prefix': {'S': 'ACC'},
+    ':two': {'N': '2'},
+    ':ss': {'S': 'SS'},
+    ':daily': {'N': '500'}
+}
+
+
+def evaluate(expression, names=None):
+    return ExpressionEvaluator.evaluate_condition(expression, ITEM, names, VALUES)
+
+
+def error_code(excinfo) -> str:
+    return excinfo.value.response['Error']['Code']
+
+
+@pytest.fixture
+def backend():
+    backend = InMemoryBackend()
+    backend.create_table(
+        TableName='trades',
+        KeySchema=[{'AttributeName': 'symbol', 'KeyType': 'HASH'}, {'AttributeName': 'seq', 'KeyType': 'RANGE'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'symbol', 'AttributeType': 'S'},
+            {'AttributeName': 'seq', 'AttributeType': 'N'},
+            {'AttributeName': 'account', 'AttributeType': 'S'}
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': 'by_account',
+            'KeySchema': [{'AttributeName': 'account', 'KeyType': 'HASH'}, {'AttributeName': 'seq', 'KeyType': 'RANGE'}],
+            'Projection': {'ProjectionType': 'ALL'}
+        }]
+    )
+    for symbol in ('BTC', 'ETH'):
+        for seq in range(1, 11):
+            item = {
+                'symbol': {'S': symbol},
+                'seq': {'N': str(seq)},
+                'price': {'N': str(seq * 10)},
+                'side': {'S': 'BUY' if seq % 2 else 'SELL'},
+                'code': {'S': f'T{seq:03d}'}
+            }
+            if seq % 3:
+                # Items without the attribute are left out of the sparse index
+                item['account'] = {'S': f'A{seq % 2}'}
+            backend.put_item(TableName='trades', Item=item)
+    return backend
+
+
+def query(backend, expression, values, **kwargs):
+    return backend.query(
+        TableName='trades', KeyConditionExpression=expression, ExpressionAttributeValues=values, **kwargs
+    )
+
+
+def seqs(page):
+    return [int(item['seq']['N']) for item in page['Items']]
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('currency = :php', True),
+    ('currency <> :usd', True),
+    ('balance = :balance', True),
+    ('balance > :low', True),
+    ('balance >= :high', False),
+    ('balance < :high', True),
+    ('balance <= :low', False),
+    ('currency < :low', False),
+    ('balance BETWEEN :low AND :high', True),
+    ('balance BETWEEN :high AND :low', False),
+    ('currency IN (:usd, :php)', True),
+    ('currency IN (:usd)', False),
+    ('currency = :usd OR balance > :low AND active = active', True),
+    ('(currency = :usd OR balance > :low) AND NOT currency = :php', False),
+    ('NOT NOT currency = :php', True),
+    ('attribute_exists(currency) AND attribute_not_exists(missing)', True),
+    ('attribute_exists(limits.daily) AND attribute_not_exists(limits.weekly)', True),
+    ('attribute_type(tags, :ss)', True),
+    ('begins_with(pk, :prefix)', True),
+    ('contains(tags, :bank)', True),
+    ('contains(history, :fund)', True),
+    ('contains(currency, :usd)', False),
+    ('size(history) = :two', True),
+    ('size(limits.tiers) > :two', False),
+    ('limits.daily = :daily', True),
+    ('limits.tiers[1] > limits.tiers[0]', True),
+    ('history[5] = :fund', False),
+    ('missing <> :php', True),
+    ('missing = :php', False)
+])
+def test_condition_expressions(expression, expected):
+    assert evaluate(expression) is expected
+
+
+def test_condition_expression_names():
+    assert evaluate('#c = :php AND #l.#d = :daily', {'#c': 'currency', '#l': 'limits', '#d': 'daily'})
+
+
+@pytest.mark.parametrize('expression', [
+    'currency = :undefined',
+    '#undefined = :php',
+    'currency = ',
+    'currency :php',
+    'balance BETWEEN :low :high',
+    'currency = :php extra'
+])
+def test_invalid_condition_expressions(expression):
+    with pytest.raises(ValueError):
+        evaluate(expression)
+
+
+def test_apply_update_set_arithmetic_and_functions():
+    updated = ExpressionEvaluator.apply_update(
+        'SET balance = balance + :amount, opened = if_not_exists(opened, :now), currency = if_not_exists(currency, :usd),'
+        ' history = list_append(history, :events), limits.daily = :daily',
+        ITEM,
+        values={
+            ':amount': {'N': '0.25'},
+            ':now': {'S': '2022-10-01'},
+            ':usd': {'S': 'USD'},
+            ':events': {'L': [{'S': 'close'}]},
+            ':daily': {'N': '1000'}
+        }
+    )
+    assert updated['balance'] == {'N': '100.75'}
+    assert updated['opened'] == {'S': '2022-10-01'}
+    assert updated['currency'] == {'S': 'PHP'}
+    assert updated['history'] == {'L': [{'S': 'open'}, {'S': 'fund'}, {'S': 'close'}]}
+    assert updated['limits']['M']['daily'] == {'N': '1000'}
+    # The item passed in is left untouched
+    assert ITEM['balance'] == {'N': '100.50'}
+
+
+def test_apply_update_remove_add_delete():
+    updated = ExpressionEvaluator.apply_update(
+        'REMOVE history[0], limits.tiers[0], active ADD balance :delta, visits :one, tags :new DELETE tags :old',
+        ITEM,
+        values={
+            ':delta': {'N': '-0.5'},
+            ':one': {'N': '1'},
+            ':new': {'SS': ['vip']},
+            ':old': {'SS': ['deposit']}
+        }
+    )
+    assert updated['history'] == {'L': [{'S': 'fund'}]}
+    assert updated['limits']['M']['tiers'] == {'L': [{'N': '5'}]}
+    assert 'active' not in updated
+    assert updated['balance'] == {'N': '100'}
+    assert updated['visits'] == {'N': '1'}
+    assert sorted(updated['tags']['SS']) == ['bank', 'vip']
+
+
+def test_apply_update_rejects_invalid_operands():
+    with pytest.raises(ValueError):
+        ExpressionEvaluator.apply_update('SET total = currency + :one', ITEM, values={':one': {'N': '1'}})
+    with pytest.raises(ValueError):
+        ExpressionEvaluator.apply_update('ADD currency :one', ITEM, values={':one': {'N': '1'}})
+    with pytest.raises(ValueError):
+        ExpressionEvaluator.apply_update('SET copy = missing', ITEM)
+
+
+def test_projection_expression():
+    projected = ExpressionEvaluator.project('currency, #l.daily, history[1], missing', ITEM, {'#l': 'limits'})
+    assert projected == {
+        'currency': {'S': 'PHP'},
+        'limits': {'M': {'daily': {'N': '500'}}},
+        'history': {'L': [{'S': 'fund'}]}
+    }
+
+
+@pytest.mark.parametrize('expression, values, expected', [
+    ('symbol = :s', {}, list(range(1, 11))),
+    ('symbol = :s AND seq = :n', {':n': {'N': '4'}}, [4]),
+    ('symbol = :s AND seq < :n', {':n': {'N': '4'}}, [1, 2, 3]),
+    ('symbol = :s AND seq <= :n', {':n': {'N': '4'}}, [1, 2, 3, 4]),
+    ('symbol = :s AND seq > :n', {':n': {'N': '8'}}, [9, 10]),
+    ('symbol = :s AND seq >= :n', {':n': {'N': '8'}}, [8, 9, 10]),
+    ('symbol = :s AND seq BETWEEN :a AND :b', {':a': {'N': '3'}, ':b': {'N': '5'}}, [3, 4, 5]),
+    (':s = symbol', {}, list(range(1, 11)))
+])
+def test_query_key_conditions(backend, expression, values, expected):
+    page = query(backend, expression, dict(values, **{':s': {'S': 'BTC'}}))
+    assert seqs(page) == expected
+
+
+def test_query_begins_with_on_string_range_key():
+    backend = InMemoryBackend()
+    backend.create_table(
+        TableName='events',
+        KeySchema=[{'AttributeName': 'pk', 'KeyType': 'HASH'}, {'AttributeName': 'sk', 'KeyType': 'RANGE'}]
+    )
+    for sk in ('ORDER#1', 'ORDER#2', 'TRADE#1'):
+        backend.put_item(TableName='events', Item={'pk': {'S': 'A'}, 'sk': {'S': sk}})
+    page = backend.query(
+        TableName='events',
+        KeyConditionExpression='pk = :pk AND begins_with(sk, :prefix)',
+        ExpressionAttributeValues={':pk': {'S': 'A'}, ':prefix': {'S': 'ORDER#'}}
+    )
+    assert [item['sk']['S'] for item in page['Items']] == ['ORDER#1', 'ORDER#2']
+
+
+def test_query_descending(backend):
+    page = query(backend, 'symbol = :s', {':s': {'S': 'ETH'}}, ScanIndexForward=False, Limit=3)
+    assert seqs(page) == [10, 9, 8]
+
+
+def test_query_without_hash_key_condition_is_rejected(backend):
+    with pytest.raises(ClientError) as excinfo:
+        query(backend, 'seq = :n', {':n': {'N': '1'}})
+    assert error_code(excinfo) == 'ValidationException'
+
+
+def test_query_filter_counts_scanned_items(backend):
+    page = query(
+        backend, 'symbol = :s', {':s': {'S': 'BTC'}, ':buy': {'S': 'BUY'}, ':p': {'N': '50'}},
+        FilterExpression='side = :buy AND price > :p'
+    )
+    assert seqs(page) == [7, 9]
+    assert page['Count'] == 2
+    assert page['ScannedCount'] == 10
+
+
+def test_query_select_count(backend):
+    page = query(backend, 'symbol = :s', {':s': {'S': 'BTC'}}, Select='COUNT')
+    assert 'Items' not in page
+    assert page['Count'] == 10
+
+
+def test_query_pagination(backend):
+    collected = []
+    params = {}
+    pages = 0
+    while True:
+        page = query(backend, 'symbol = :s', {':s': {'S': 'BTC'}}, Limit=4, **params)
+        collected.extend(seqs(page))
+        pages += 1
+        if 'LastEvaluatedKey' not in page:
+            break
+        assert set(page['LastEvaluatedKey']) == {'symbol', 'seq'}
+        params = {'ExclusiveStartKey': page['LastEvaluatedKey']}
+    assert collected == list(range(1, 11))
+    assert pages == 3
+
+
+def test_query_pagination_applies_limit_before_filter(backend):
+    page = query(
+        backend, 'symbol = :s', {':s': {'S': 'BTC'}, ':sell': {'S': 'SELL'}},
+        FilterExpression='side = :sell', Limit=3
+    )
+    assert seqs(page) == [2]
+    assert page['ScannedCount'] == 3
+    assert page['LastEvaluatedKey'] == {'symbol': {'S': 'BTC'}, 'seq': {'N': '3'}}
+
+
+def test_query_projection(backend):
+    page = query(
+        backend, 'symbol = :s AND seq = :n', {':s': {'S': 'BTC'}, ':n': {'N': '2'}},
+        ProjectionExpression='#p, code', ExpressionAttributeNames={'#p': 'price'}
+    )
+    assert page['Items'] == [{'price': {'N': '20'}, 'code': {'S': 'T002'}}]
+
+
+def test_gsi_query_and_pagination(backend):
+    expected = [(seq, symbol) for seq in (1, 5, 7) for symbol in ('BTC', 'ETH')]
+    collected = []
+    params = {}
+    while True:
+        page = backend.query(
+            TableName='trades',
+            IndexName='by_account',
+            KeyConditionExpression='account = :a AND seq <= :n',
+            ExpressionAttributeValues={':a': {'S': 'A1'}, ':n': {'N': '7'}},
+            Limit=2,
+            **params
+        )
+        collected.extend((int(item['seq']['N']), item['symbol']['S']) for item in page['Items'])
+        if 'LastEvaluatedKey' not in page:
+            break
+        # Index pages resume from the table key and the index key
+        assert set(page['LastEvaluatedKey']) == {'symbol', 'seq', 'account'}
+        params = {'ExclusiveStartKey': page['LastEvaluatedKey']}
+    assert sorted(collected) == expected
+    assert [seq for seq, _ in collected] == sorted(seq for seq, _ in collected)
+
+
+def test_gsi_scan_is_sparse(backend):
+    page = backend.scan(TableName='trades', IndexName='by_account')
+    assert page['Count'] == 14
+    assert all('account' in item for item in page['Items'])
+
+
+def test_gsi_unknown_index_is_rejected(backend):
+    with pytest.raises(ClientError) as excinfo:
+        backend.query(
+            TableName='trades', IndexName='missing', KeyConditionExpression='symbol = :s',
+            ExpressionAttributeValues={':s': {'S': 'BTC'}}
+        )
+    assert error_code(excinfo) == 'ValidationException'
+
+
+def test_scan_pagination_and_segments(backend):
+    def scan_all(**kwargs):
+        keys = []
+        params = {}
+        while True:
+            page = backend.scan(TableName='trades', Limit=3, **kwargs, **params)
+            keys.extend((item['symbol']['S'], int(item['seq']['N'])) for item in page['Items'])
+            if 'LastEvaluatedKey' not in page:
+                return keys
+            params = {'ExclusiveStartKey': page['LastEvaluatedKey']}
+
+    everything = scan_all()
+    assert len(everything) == len(set(everything)) == 20
+    segments = [scan_all(Segment=segment, TotalSegments=4) for segment in range(4)]
+    assert sorted(key for segment in segments for key in segment) == sorted(everything)
+
+    with pytest.raises(ClientError) as excinfo:
+        backend.scan(TableName='trades', Segment=4, TotalSegments=4)
+    assert error_code(excinfo) == 'ValidationException'
+
+
+def test_scan_filter(backend):
+    page = backend.scan(
+        TableName='trades',
+        FilterExpression='attribute_not_exists(account) AND symbol IN (:btc)',
+        ExpressionAttributeValues={':btc': {'S': 'BTC'}}
+    )
+    assert sorted(seqs(page)) == [3, 6, 9]
+
+
+def test_get_item_projection_and_missing_item(backend):
+    key = {'symbol': {'S': 'BTC'}, 'seq': {'N': '1'}}
+    assert backend.get_item(TableName='trades', Key=key, ProjectionExpression='code')['Item'] == {'code': {'S': 'T001'}}
+    assert 'Item' not in backend.get_item(TableName='trades', Key={'symbol': {'S': 'XRP'}, 'seq': {'N': '1'}})
+    with pytest.raises(ClientError) as excinfo:
+        backend.get_item(TableName='trades', Key={'symbol': {'S': 'BTC'}})
+    assert error_code(excinfo) == 'ValidationException'
+
+
+def test_conditional_put(backend):
+    item = {'symbol': {'S': 'BTC'}, 'seq': {'N': '1'}, 'price': {'N': '1'}}
+    with pytest.raises(ClientError) as excinfo:
+        backend.put_item(TableName='trades', Item=item, ConditionExpression='attribute_not_exists(symbol)')
+    assert error_code(excinfo) == 'ConditionalCheckFailedException'
+
+    response = backend.put_item(
+        TableName='trades', Item=item, ConditionExpression='price = :p',
+        ExpressionAttributeValues={':p': {'N': '10'}}, ReturnValues='ALL_OLD'
+    )
+    assert response['Attributes']['price'] == {'N': '10'}
+
+
+def test_conditional_update(backend):
+    key = {'symbol': {'S': 'BTC'}, 'seq': {'N': '2'}}
+    with pytest.raises(ClientError) as excinfo:
+        backend.update_item(
+            TableName='trades', Key=key, UpdateExpression='SET price = :p', ConditionExpression='side = :buy',
+            ExpressionAttributeValues={':p': {'N': '1'}, ':buy': {'S': 'BUY'}}
+        )
+    assert error_code(excinfo) == 'ConditionalCheckFailedException'
+
+    response = backend.update_item(
+        TableName='trades', Key=key, UpdateExpression='SET price = price + :p ADD fills :one',
+        ConditionExpression='side = :sell',
+        ExpressionAttributeValues={':p': {'N': '1'}, ':one': {'N': '1'}, ':sell': {'S': 'SELL'}},
+        ReturnValues='UPDATED_NEW'
+    )
+    assert response['Attributes'] == {'price': {'N': '21'}, 'fills': {'N': '1'}}
+
+
+def test_update_creates_missing_item_unless_conditioned(backend):
+    key = {'symbol': {'S': 'XRP'}, 'seq': {'N': '1'}}
+    with pytest.raises(ClientError) as excinfo:
+        backend.update_item(
+            TableName='trades', Key=key, UpdateExpression='SET price = :p',
+            ConditionExpression='attribute_exists(symbol)', ExpressionAttributeValues={':p': {'N': '1'}}
+        )
+    assert error_code(excinfo) == 'ConditionalCheckFailedException'
+    backend.update_item(
+        TableName='trades', Key=key, UpdateExpression='SET price = :p', ExpressionAttributeValues={':p': {'N': '1'}}
+    )
+    assert backend.get_item(TableName='trades', Key=key)['Item'] == dict(key, price={'N': '1'})
+
+
+def test_update_of_key_attribute_is_rejected(backend):
+    with pytest.raises(ClientError) as excinfo:
+        backend.update_item(
+            TableName='trades', Key={'symbol': {'S': 'BTC'}, 'seq': {'N': '1'}},
+            UpdateExpression='SET seq = :n', ExpressionAttributeValues={':n': {'N': '99'}}
+        )
+    assert error_code(excinfo) == 'ValidationException'
+
+
+def test_conditional_delete(backend):
+    key = {'symbol': {'S': 'BTC'}, 'seq': {'N': '1'}}
+    with pytest.raises(ClientError) as excinfo:
+        backend.delete_item(
+            TableName='trades', Key=key, ConditionExpression='price > :p', ExpressionAttributeValues={':p': {'N': '10'}}
+        )
+    assert error_code(excinfo) == 'ConditionalCheckFailedException'
+    response = backend.delete_item(TableName='trades', Key=key, ReturnValues='ALL_OLD')
+    assert response['Attributes']['code'] == {'S': 'T001'}
+    assert 'Item' not in backend.get_item(TableName='trades', Key=key)
+
+
+def test_transact_write_items_is_atomic(backend):
+    key = {'symbol': {'S': 'BTC'}, 'seq': {'N': '1'}}
+    put = {'Put': {'TableName': 'trades', 'Item': {'symbol': {'S': 'XRP'}, 'seq': {'N': '1'}}}}
+    failing_check = {'ConditionCheck': {
+        'TableName': 'trades', 'Key': key, 'ConditionExpression': 'price = :p',
+        'ExpressionAttributeValues': {':p': {'N': '0'}}
+    }}
+    with pytest.raises(ClientError) as excinfo:
+        backend.transact_write_items(TransactItems=[put, failing_check])
+    assert error_code(excinfo) == 'TransactionCanceledException'
+    assert [reason['Code'] for reason in excinfo.value.response['CancellationReasons']] == [
+        'None', 'ConditionalCheckFailed'
+    ]
+    assert 'Item' not in backend.get_item(TableName='trades', Key={'symbol': {'S': 'XRP'}, 'seq': {'N': '1'}})
+
+    update = {'Update': {
+        'TableName': 'trades', 'Key': key, 'UpdateExpression': 'ADD price :p',
+        'ExpressionAttributeValues': {':p': {'N': '5'}}
+    }}
+    delete = {'Delete': {'TableName': 'trades', 'Key': {'symbol': {'S': 'BTC'}, 'seq': {'N': '2'}}}}
+    backend.transact_write_items(TransactItems=[put, update, delete])
+    items = backend.transact_get_items(TransactItems=[
+        {'Get': {'TableName': 'trades', 'Key': key}},
+        {'Get': {'TableName': 'trades', 'Key': {'symbol': {'S': 'BTC'}, 'seq': {'N': '2'}}}},
+        {'Get': {'TableName': 'trades', 'Key': {'symbol': {'S': 'XRP'}, 'seq': {'N': '1'}}}}
+    ])['Responses']
+    assert items[0]['Item']['price'] == {'N': '15'}
+    assert items[1] == {}
+    assert 'Item' in items[2]
+
+
+def test_transact_write_items_rejects_two_operations_on_one_item(backend):
+    key = {'symbol': {'S': 'BTC'}, 'seq': {'N': '1'}}
+    with pytest.raises(ClientError) as excinfo:
+        backend.transact_write_items(TransactItems=[
+            {'Delete': {'TableName': 'trades', 'Key': key}},
+            {'Put': {'TableName': 'trades', 'Item': dict(key, price={'N': '1'})}}
+        ])
+    assert error_code(excinfo) == 'ValidationException'
+
+
+def test_batch_write_and_get(backend):
+    keys = [{'symbol': {'S': 'XRP'}, 'seq': {'N': str(seq)}} for seq in range(3)]
+    response = backend.batch_write_item(RequestItems={'trades': [
+        {'PutRequest': {'Item': dict(key, price={'N': '1'})}} for key in keys
+    ] + [{'DeleteRequest': {'Key': {'symbol': {'S': 'BTC'}, 'seq': {'N': '1'}}}}]})
+    assert response['UnprocessedItems'] == {}
+
+    response = backend.batch_get_item(RequestItems={'trades': {
+        'Keys': keys + [{'symbol': {'S': 'BTC'}, 'seq': {'N': '1'}}],
+        'ProjectionExpression': 'seq'
+    }})
+    assert sorted(item['seq']['N'] for item in response['Responses']['trades']) == ['0', '1', '2']
+    assert response['UnprocessedKeys'] == {}
+
+    with pytest.raises(ClientError) as excinfo:
+        backend.batch_write_item(RequestItems={'trades': [
+            {'DeleteRequest': {'Key': keys[0]}}, {'DeleteRequest': {'Key': keys[0]}}
+        ]})
+    assert error_code(excinfo) == 'ValidationException'
+
+
+def test_consumed_capacity(backend):
+    page = query(backend, 'symbol = :s', {':s': {'S': 'BTC'}}, ReturnConsumedCapacity='TOTAL', ConsistentRead=True)
+    assert page['ConsumedCapacity'] == {'TableName': 'trades', 'CapacityUnits': 1, 'ReadCapacityUnits': 1}
+    response = backend.put_item(
+        TableName='trades', Item={'symbol': {'S': 'XRP'}, 'seq': {'N': '1'}}, ReturnConsumedCapacity='TOTAL'
+    )
+    assert response['ConsumedCapacity']['WriteCapacityUnits'] == 1
+
+
+def test_injected_faults_are_reproducible():
+    def run():
+        backend = InMemoryBackend(throttle_rate=0.5, seed=7)
+        backend.create_table(TableName='t', KeySchema=[{'AttributeName': 'pk', 'KeyType': 'HASH'}])
+        outcomes = []
+        for i in range(20):
+            try:
+                backend.put_item(TableName='t', Item={'pk': {'S': str(i)}})
+                outcomes.append(True)
+            except ClientError as e:
+                assert e.response['Error']['Code'] == 'ProvisionedThroughputExceededException'
+                outcomes.append(False)
+        return outcomes
+
+    outcomes = run()
+    assert outcomes == run()
+    assert not all(outcomes) and any(outcomes)
+
+
+def test_dynamodb_on_memory_backend(backend):
+    db = DynamoDB('trades', backend=backend)
+    db.add_item({'symbol': 'XRP', 'seq': 1, 'price': 0.5, 'code': 'T001'})
+    db.update_item({'symbol': 'XRP', 'seq': 1}, {'price': 0.75}, add={'fills': 2})
+    item = db.get_item({'symbol': 'XRP', 'seq': 1})
+    assert item['price'] == pytest.approx(0.75)
+    assert item['fills'] == 2
+
+    with pytest.raises(ClientError):
+        db.update_item({'symbol': 'XRP', 'seq': 2}, {'price': 1})
+    with pytest.raises(ClientError):
+        db.add_item({'symbol': 'XRP', 'seq': 1}, keys=['symbol', 'seq'])
+    assert [item['seq'] for item in db.iter_query(
+        KeyConditionExpression='symbol = :s AND seq > :n',
+        ExpressionAttributeValues={':s': 'BTC', ':n': 7},
+        Limit=2
+    )] == [8, 9, 10]